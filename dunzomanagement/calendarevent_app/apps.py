@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CalendareventAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'calendarevent_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,95 @@
+"""
+Versioned cache for calendar feeds.
+
+Every user has a calendar version number. Anything that can change what
+get_user_calendar_events() returns for a user bumps that user's version
+when its transaction commits,
+which makes every cached window for them unreachable at once. The version
+also feeds the ETag, so a client that already holds the current window
+gets a 304 without the database being touched.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from project_app.models import Project
+from task_app.models import Assignment
+
+CALENDAR_VERSION_KEY = 'calendar:version:{}'
+CALENDAR_EVENTS_KEY = 'calendar:events:{}:{}:{}'
+
+
+def _initial_version():
+    # Time based, so a version that was evicted never comes back with an old number
+    return int(time.time() * 1000)
+
+
+def get_calendar_version(user_id):
+    """Current calendar version of a user"""
+    key = CALENDAR_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_calendar_versions(user_ids):
+    """Invalidate every cached calendar window of the given users once the transaction commits"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def bump():
+        for user_id in user_ids:
+            key = CALENDAR_VERSION_KEY.format(user_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, _initial_version(), None)
+
+    # After commit, so a window read in between is never cached under the new version
+    transaction.on_commit(bump)
+
+
+def calendar_window_key(user_id, version, start, end):
+    """Cache key of one (user, window) result at a given version"""
+    window = hashlib.md5(f'{start}|{end}'.encode()).hexdigest()
+    return CALENDAR_EVENTS_KEY.format(user_id, version, window)
+
+
+def calendar_etag(user_id, version, start, end):
+    """Weak ETag for one (user, window) result at a given version"""
+    digest = hashlib.md5(f'{user_id}|{version}|{start}|{end}'.encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def get_cached_window(key):
+    return cache.get(key)
+
+
+def set_cached_window(key, body):
+    cache.set(key, body, settings.CALENDAR_CACHE_TIMEOUT)
+
+
+def task_audience(task_ids):
+    """Users whose calendars show the given tasks: project members and assignees"""
+    user_ids = set(
+        Project.user_id.through.objects.filter(
+            project__task__task_id__in=task_ids
+        ).values_list('user_id', flat=True)
+    )
+    user_ids.update(
+        Assignment.objects.filter(task_id__in=task_ids).values_list('user_id', flat=True)
+    )
+    return user_ids
+
+
+def bump_for_tasks(task_ids, extra_user_ids=()):
+    """Invalidate the calendars of everyone who can see the given tasks"""
+    user_ids = task_audience(task_ids)
+    user_ids.update(extra_user_ids)
+    bump_calendar_versions(user_ids)
@@ -0,0 +1,96 @@
+"""
+Tokens and change tracking for the iCalendar subscription feed.
+
+Feed tokens are signed user ids, so the feed URL authenticates the
+subscriber without a session. Sync tokens are signed timestamps handed out
+with every feed response. A client that sends its last sync token back
+only receives the events changed or deleted since then, limited to the
+ones on its own calendar.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from project_app.models import Project
+from task_app.models import Assignment, Task
+from .models import CalendarEvent, CalendarEventTombstone
+
+FEED_SALT = 'calendarevent_app.feed'
+SYNC_SALT = 'calendarevent_app.sync'
+
+
+def make_feed_token(user_id):
+    return signing.dumps(user_id, salt=FEED_SALT)
+
+
+def read_feed_token(token):
+    """User id of a feed token, or None if it is not valid"""
+    try:
+        return signing.loads(token, salt=FEED_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def make_sync_token(user_id, moment=None):
+    moment = moment or timezone.now()
+    return signing.dumps({'u': user_id, 't': moment.isoformat()}, salt=SYNC_SALT, compress=True)
+
+
+def read_sync_token(token, user_id):
+    """Timestamp a sync token was issued at, or None if it is invalid or expired"""
+    try:
+        data = signing.loads(token, salt=SYNC_SALT, max_age=settings.CALENDAR_SYNC_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if data.get('u') != user_id:
+        return None
+    return parse_datetime(data.get('t', ''))
+
+
+def changed_since(user_id, since):
+    """Ids of the user's events updated and of the user's events deleted after ``since``"""
+    project_ids = Project.user_id.through.objects.filter(user_id=user_id).values('project_id')
+    task_ids = Assignment.objects.filter(user_id=user_id).values('task_id')
+
+    updated_ids = set(
+        CalendarEvent.objects.filter(updated_at__gt=since).filter(
+            Q(task_id__project_id__in=project_ids) | Q(task_id__in=task_ids)
+            | Q(user_id=user_id) | Q(participants=user_id)
+        ).values_list('event_id', flat=True)
+    )
+    deleted_ids = set(
+        CalendarEventTombstone.objects.filter(deleted_at__gt=since).filter(
+            Q(project_id__in=project_ids) | Q(task_id__in=task_ids) | Q(users=user_id)
+        ).values_list('event_id', flat=True)
+    )
+    return updated_ids, deleted_ids - updated_ids
+
+
+def touch_event(event_id):
+    """Mark an event changed after a write that bypassed the ORM"""
+    CalendarEvent.objects.filter(pk=event_id).update(updated_at=timezone.now())
+
+
+def deletion_audience(event):
+    """Tombstone fields saying whose calendars an event is on; read them before it is deleted"""
+    if event.task_id_id is not None:
+        project_id = Task.objects.filter(pk=event.task_id_id).values_list('project_id', flat=True).first()
+        return {'project_id': project_id}
+    user_ids = set(event.participants.values_list('id', flat=True))
+    if event.user_id:
+        user_ids.add(event.user_id)
+    return {'user_ids': user_ids}
+
+
+def record_deletion(event_id, task_id=None, project_id=None, user_ids=()):
+    """Leave a tombstone for a deleted event and drop the ones no sync token can reach"""
+    tombstone, _ = CalendarEventTombstone.objects.update_or_create(
+        event_id=event_id, defaults={'task_id': task_id, 'project_id': project_id}
+    )
+    tombstone.users.set(user_ids)
+    expired = timezone.now() - timedelta(seconds=settings.CALENDAR_SYNC_TOKEN_MAX_AGE)
+    CalendarEventTombstone.objects.filter(deleted_at__lt=expired).delete()
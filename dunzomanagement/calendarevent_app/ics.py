@@ -0,0 +1,95 @@
+"""
+Minimal iCalendar (RFC 5545) writer for the calendar subscription feed.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+PRODID = '-//Dunzo//Project Calendar//EN'
+
+
+def escape_text(value):
+    """Escape a TEXT property value"""
+    return (str(value or '')
+            .replace('\\', '\\\\')
+            .replace(';', '\\;')
+            .replace(',', '\\,')
+            .replace('\r\n', '\\n')
+            .replace('\n', '\\n'))
+
+
+def format_datetime(value):
+    """UTC date-time in the basic format, e.g. 20250101T093000Z"""
+    if value.tzinfo is not None:
+        value = value.astimezone(dt_timezone.utc)
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def fold(line):
+    """Fold a content line to at most 75 octets, continuing with a leading space"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts)
+
+
+def event_uid(event_id):
+    return f'event-{event_id}@dunzo'
+
+
+def render_event(event, stamp):
+    """VEVENT lines for one row of get_user_calendar_events"""
+    start = event['start_date'] or event['end_date']
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{event_uid(event["event_id"])}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART:{format_datetime(start)}',
+        f'DTEND:{format_datetime(event["end_date"])}',
+        f'SUMMARY:{escape_text(event["title"])}',
+        f'CATEGORIES:{escape_text(event["event_type"])}',
+    ]
+    if event.get('description'):
+        lines.append(f'DESCRIPTION:{escape_text(event["description"])}')
+    if event.get('project_title'):
+        lines.append(f'LOCATION:{escape_text(event["project_title"])}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def render_cancellation(event_id, stamp):
+    """VEVENT lines telling the client an event no longer exists"""
+    return [
+        'BEGIN:VEVENT',
+        f'UID:{event_uid(event_id)}',
+        f'DTSTAMP:{stamp}',
+        'STATUS:CANCELLED',
+        'END:VEVENT',
+    ]
+
+
+def render_calendar(events, cancelled_ids=(), name='Dunzo', sync_token=None):
+    """Render a VCALENDAR document with CRLF line endings"""
+    stamp = format_datetime(datetime.now(dt_timezone.utc))
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ]
+    if sync_token:
+        lines.append(f'X-DUNZO-SYNC-TOKEN:{sync_token}')
+    for event in events:
+        lines.extend(render_event(event, stamp))
+    for event_id in cancelled_ids:
+        lines.extend(render_cancellation(event_id, stamp))
+    lines.append('END:VCALENDAR')
+    return ''.join(fold(line) + '\r\n' for line in lines)
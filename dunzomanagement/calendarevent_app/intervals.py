@@ -0,0 +1,55 @@
+"""
+Static interval tree over half-open [start, end) intervals.
+
+Intervals are kept sorted by start in a flat list that is read as an
+implicit balanced binary search tree (the middle element of every range is
+its root). Each node also stores the largest end found in its subtree, so
+an overlap query can skip whole subtrees and runs in O(log n + k).
+The structure is plain lists and tuples, which keeps it cheap to pickle
+into the cache.
+"""
+
+
+class IntervalTree:
+
+    def __init__(self, intervals=()):
+        # Each interval is a (start, end, payload) tuple
+        self.items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self.max_end = [None] * len(self.items)
+        if self.items:
+            self._build(0, len(self.items) - 1)
+
+    def _build(self, lo, hi):
+        mid = (lo + hi) // 2
+        max_end = self.items[mid][1]
+        if lo < mid:
+            max_end = max(max_end, self._build(lo, mid - 1))
+        if mid < hi:
+            max_end = max(max_end, self._build(mid + 1, hi))
+        self.max_end[mid] = max_end
+        return max_end
+
+    def __len__(self):
+        return len(self.items)
+
+    def overlapping(self, start, end):
+        """Return every interval that overlaps [start, end), ordered by start"""
+        found = []
+        stack = [(0, len(self.items) - 1)]
+        while stack:
+            lo, hi = stack.pop()
+            if lo > hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_end[mid] <= start:
+                # Nothing in this subtree ends after the query starts
+                continue
+            stack.append((lo, mid - 1))
+            item_start, item_end, _ = self.items[mid]
+            if item_start < end:
+                if item_end > start:
+                    found.append(self.items[mid])
+                # Right subtree starts at or after item_start, so it may still overlap
+                stack.append((mid + 1, hi))
+        found.sort(key=lambda item: (item[0], item[1]))
+        return found
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.test import AsyncClient, Client, override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of a JSON endpoint through the WSGI and the ASGI "
+        "request handlers at high concurrency. The WSGI run is limited to "
+        "--wsgi-threads concurrent requests, like a threaded WSGI worker; the "
+        "ASGI run keeps --concurrency requests in flight on one event loop. "
+        "Both run in-process against the configured database, with the same "
+        "middleware, so the numbers compare the handlers rather than a web server. "
+        "The run stops with an error if any request does not return 2xx."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/calendar/api/events/',
+                            help='URL to request (default /calendar/api/events/)')
+        parser.add_argument('--username', required=True,
+                            help='Existing user the requests are authenticated as')
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Requests per run (default 500)')
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Requests in flight at once (default 50)')
+        parser.add_argument('--wsgi-threads', type=int, default=4,
+                            help='Threads serving the WSGI run (default 4)')
+        parser.add_argument('--mode', choices=('both', 'wsgi', 'asgi'), default='both')
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        # One log line per request would drown the results
+        logging.getLogger('dunzomanagement.instrumentation').setLevel(logging.WARNING)
+
+        # The test clients send Host: testserver, which ALLOWED_HOSTS would
+        # answer with 400 DisallowedHost for every request
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            login = Client()
+            login.force_login(user)
+            self.cookies = login.cookies
+
+            # Fail before timing anything if the endpoint only returns errors
+            self.check_statuses('Warm-up', [(login.get(options['path']).status_code, 0)])
+
+            if options['mode'] in ('both', 'wsgi'):
+                self.report('WSGI', *self.run_wsgi(options))
+            if options['mode'] in ('both', 'asgi'):
+                self.report('ASGI', *asyncio.run(self.run_asgi(options)))
+
+    def run_wsgi(self, options):
+        """Requests from --concurrency callers, served by --wsgi-threads threads"""
+        def fetch(_):
+            client = Client()
+            client.cookies = self.cookies
+            start = time.perf_counter()
+            response = client.get(options['path'])
+            return response.status_code, time.perf_counter() - start
+
+        threads = min(options['wsgi_threads'], options['concurrency'])
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(fetch, range(options['requests'])))
+        return results, time.perf_counter() - start
+
+    async def run_asgi(self, options):
+        """Requests kept --concurrency deep on a single event loop"""
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        client = AsyncClient()
+        client.cookies = self.cookies
+
+        async def fetch():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(options['path'])
+                return response.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[fetch() for _ in range(options['requests'])])
+        return results, time.perf_counter() - start
+
+    def check_statuses(self, label, results):
+        statuses = Counter(status for status, _ in results)
+        failed = {status: count for status, count in statuses.items() if not 200 <= status < 300}
+        if failed:
+            raise CommandError(
+                f'{label}: {sum(failed.values())} of {len(results)} requests to the benchmarked path '
+                f'did not succeed (status {failed}); the timings would measure error pages'
+            )
+
+    def report(self, label, results, elapsed):
+        self.check_statuses(label, results)
+        latencies = sorted(duration * 1000 for _, duration in results)
+        statuses = Counter(status for status, _ in results)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+        self.stdout.write(
+            f'{label}: {len(results)} requests in {elapsed:.2f}s = {len(results) / elapsed:.1f} req/s, '
+            f'latency p50 {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms, '
+            f'status {dict(statuses)}'
+        )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarevent_app', '0003_remove_calendarevent_project_id'),
+        ('task_app', '0008_choice_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarevent',
+            name='type',
+            field=models.CharField(choices=[('Deadline', 'Deadline'), ('Milestone', 'Milestone'), ('Meeting', 'Meeting'), ('Event', 'Event')], default='Event', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['task_id', 'type', 'start_time'], name='event_task_type_start_idx'),
+        ),
+    ]
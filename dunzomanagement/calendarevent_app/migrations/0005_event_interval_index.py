@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarevent_app', '0004_choice_columns'),
+        ('task_app', '0008_choice_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['task_id', 'end_time', 'start_time'], name='event_task_interval_idx'),
+        ),
+    ]
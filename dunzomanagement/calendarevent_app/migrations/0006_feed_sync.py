@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarevent_app', '0005_event_interval_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarEventTombstone',
+            fields=[
+                ('event_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('task_id', models.IntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
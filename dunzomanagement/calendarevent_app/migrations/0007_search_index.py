@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Full-text index used by dunzomanagement.search; see
+# task_app/migrations/0009_search_indexes.py
+SEARCH_INDEXES = {
+    'postgresql': [
+        (
+            "CREATE INDEX event_search_idx ON calendarevent_app_calendarevent "
+            "USING GIN (to_tsvector('english', title))",
+            "DROP INDEX event_search_idx",
+        ),
+    ],
+    'mysql': [
+        (
+            "CREATE FULLTEXT INDEX event_search_idx ON calendarevent_app_calendarevent (title)",
+            "DROP INDEX event_search_idx ON calendarevent_app_calendarevent",
+        ),
+    ],
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    for create, _ in SEARCH_INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(create)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for _, drop in SEARCH_INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(drop)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarevent_app', '0006_feed_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarevent_app', '0007_search_index'),
+        ('task_app', '0009_search_indexes'),
+        ('user_app', '0003_archived_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendarevent',
+            name='participants',
+            field=models.ManyToManyField(blank=True, related_name='meetings', to='user_app.user'),
+        ),
+        migrations.AddField(
+            model_name='calendarevent',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='created_events', to='user_app.user'),
+        ),
+        migrations.AlterField(
+            model_name='calendarevent',
+            name='task_id',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='task_app.task'),
+        ),
+        migrations.AddIndex(
+            model_name='calendarevent',
+            index=models.Index(fields=['user', 'end_time', 'start_time'], name='event_user_interval_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calendarevent_app', '0008_meeting_people'),
+        ('user_app', '0003_archived_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calendareventtombstone',
+            name='project_id',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='calendareventtombstone',
+            name='users',
+            field=models.ManyToManyField(blank=True, related_name='+', to='user_app.user'),
+        ),
+    ]
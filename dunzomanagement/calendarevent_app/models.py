@@ -1,17 +1,51 @@
 from django.db import models
 from task_app.models import Task
 from project_app.models import Project
+from user_app.models import User
 
 # Create your models here.
 class CalendarEvent(models.Model):
     event_id = models.AutoField(primary_key=True)
 
-    task_id = models.ForeignKey(Task, on_delete=models.CASCADE)
+    # Meetings written by create_calendar_event have no task: their creator
+    # and participants say whose calendars they are on
+    task_id = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='created_events'
+    )
+    participants = models.ManyToManyField(User, related_name='meetings', blank=True)
     title = models.TextField(max_length=100)
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
-    type = (
-        'Deadline',
-        'Milestone',
-        'Meeting'
-    )
\ No newline at end of file
+    TYPE_CHOICES = [
+        ('Deadline', 'Deadline'),
+        ('Milestone', 'Milestone'),
+        ('Meeting', 'Meeting'),
+        ('Event', 'Event'),
+    ]
+
+    type = models.CharField(max_length=20, choices=TYPE_CHOICES, default='Event')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task_id', 'type', 'start_time'], name='event_task_type_start_idx'),
+            # Busy-time loading for conflict checks: a task's events ending after a point in time
+            models.Index(fields=['task_id', 'end_time', 'start_time'], name='event_task_interval_idx'),
+            models.Index(fields=['user', 'end_time', 'start_time'], name='event_user_interval_idx'),
+        ]
+
+
+class CalendarEventTombstone(models.Model):
+    """Marks a deleted event so incremental feed syncs can report the removal"""
+    event_id = models.IntegerField(primary_key=True)
+    task_id = models.IntegerField(null=True, blank=True)
+    # Whose calendars the event was on: members of the task's project, or a
+    # meeting's creator and participants
+    project_id = models.IntegerField(null=True, blank=True, db_index=True)
+    users = models.ManyToManyField(User, related_name='+', blank=True)
+    deleted_at = models.DateTimeField(auto_now=True, db_index=True)
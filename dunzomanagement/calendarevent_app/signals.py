@@ -0,0 +1,91 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from dunzomanagement.search import index_deleted, index_saved
+from project_app.models import Project
+from task_app.models import Task, Assignment
+from .cache import bump_calendar_versions, bump_for_tasks
+from .feed import deletion_audience, record_deletion
+from .models import CalendarEvent
+
+# Task fields that show up in calendar feeds
+CALENDAR_TASK_FIELDS = {'title', 'due_date', 'project_id'}
+
+
+@receiver(post_save, sender=CalendarEvent)
+@receiver(pre_delete, sender=CalendarEvent)
+def event_changed(sender, instance, **kwargs):
+    if instance.task_id_id is None:
+        # A meeting: on the calendars of its creator and participants
+        user_ids = set(instance.participants.values_list('id', flat=True)) if instance.pk else set()
+        if instance.user_id:
+            user_ids.add(instance.user_id)
+        bump_calendar_versions(user_ids)
+    else:
+        bump_for_tasks([instance.task_id_id])
+
+
+@receiver(m2m_changed, sender=CalendarEvent.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is a User
+        bump_calendar_versions([instance.pk])
+    elif action == 'pre_clear':
+        bump_calendar_versions(instance.participants.values_list('id', flat=True))
+    else:
+        bump_calendar_versions(pk_set or [])
+
+
+@receiver(pre_delete, sender=CalendarEvent)
+def event_deleting(sender, instance, **kwargs):
+    # Participants and the task may be gone by post_delete
+    instance._feed_audience = deletion_audience(instance)
+
+
+@receiver(post_delete, sender=CalendarEvent)
+def event_deleted(sender, instance, **kwargs):
+    """Feed clients syncing incrementally need to hear about removals"""
+    record_deletion(instance.pk, instance.task_id_id, **getattr(instance, '_feed_audience', {}))
+
+
+@receiver(post_save, sender=CalendarEvent)
+def event_saved_for_search(sender, instance, update_fields=None, **kwargs):
+    index_saved(instance, update_fields)
+
+
+@receiver(post_delete, sender=CalendarEvent)
+def event_deleted_for_search(sender, instance, **kwargs):
+    index_deleted(instance)
+
+
+@receiver(post_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and not CALENDAR_TASK_FIELDS.intersection(update_fields):
+        return
+    bump_for_tasks([instance.pk])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(pre_delete, sender=Assignment)
+def assignment_changed(sender, instance, **kwargs):
+    bump_for_tasks([instance.task_id_id], [instance.user_id_id])
+
+
+@receiver(m2m_changed, sender=Project.user_id.through)
+def membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Joining or leaving a project adds or removes its deadlines from a calendar"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is a User
+        bump_calendar_versions([instance.pk])
+    elif action == 'pre_clear':
+        bump_calendar_versions(instance.user_id.values_list('id', flat=True))
+    else:
+        bump_calendar_versions(pk_set or [])
@@ -1,3 +1,258 @@
-from django.test import TestCase
+import datetime
+import random
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User as AuthUser
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from project_app.models import Project
+from task_app.models import Task
+from user_app.models import User
+from .busy import find_conflicts
+from .cache import bump_calendar_versions, get_calendar_version
+from .feed import changed_since
+from .freebusy import bitmap_periods, busy_bitmap, free_busy, suggest_slots, working_hours_mask
+from .intervals import IntervalTree
+from .models import CalendarEvent
+
+
+def at(hour, minute=0):
+    return timezone.make_aware(datetime.datetime(2030, 1, 7, hour, minute))
+
+
+class MeetingConflictTests(TestCase):
+    """Meetings have no task: their creator and participants must still be seen as busy"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner, self.guest, self.other = [
+            User.objects.create(name=name, email=f'{name.lower()}@example.com', password_hash='x', role='Member')
+            for name in ('Ada', 'Grace', 'Alan')
+        ]
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.project.user_id.add(self.owner, self.guest, self.other)
+        AuthUser.objects.create_user(id=self.other.pk, username='alan', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.other.pk))
+
+    def book(self, start, end, creator, participants):
+        # What create_calendar_event writes for ScheduleMeeting
+        meeting = CalendarEvent.objects.create(
+            task_id=None, user=creator, title='Standup', type='Meeting', start_time=start, end_time=end
+        )
+        meeting.participants.add(*participants)
+        return meeting
+
+    def schedule(self, start, end, participants):
+        return self.client.post(reverse('calendarevent_app:schedule_meeting'), {
+            'project_id': self.project.project_id,
+            'title': 'Review',
+            'start_date': start,
+            'end_date': end,
+            'participants[]': [user.pk for user in participants],
+        }, HTTP_ACCEPT='application/json')
+
+    def test_overlapping_meeting_is_rejected(self):
+        first = self.book(at(10), at(11), self.owner, [self.guest])
+
+        response = self.schedule('2030-01-07T10:30', '2030-01-07T11:30', [self.owner, self.guest])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            sorted((conflict['user_id'], conflict['event_id']) for conflict in response.json()['conflicts']),
+            sorted([(self.owner.pk, first.pk), (self.guest.pk, first.pk)])
+        )
+
+    def test_meeting_edits_reach_cached_busy_times(self):
+        self.assertEqual(find_conflicts([self.guest.pk], at(10), at(11)), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting = self.book(at(10), at(11), self.owner, [self.guest])
+        self.assertEqual([c['event_id'] for c in find_conflicts([self.guest.pk], at(10), at(11))], [meeting.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            meeting.participants.remove(self.guest)
+        self.assertEqual(find_conflicts([self.guest.pk], at(10), at(11)), [])
+        self.assertEqual(find_conflicts([self.owner.pk], at(11), at(12)), [])
+
+
+class SlotBitmapTests(SimpleTestCase):
+    """Free/busy bit math on 15-minute slots"""
+
+    slot = datetime.timedelta(minutes=15)
+
+    def test_busy_intervals_round_out_to_whole_slots(self):
+        bitmap = busy_bitmap([
+            (at(9, 20), at(9, 40), None),
+            # A deadline has no length and still occupies its slot
+            (at(10), at(10), None),
+        ], at(9), 16, self.slot)
+        self.assertEqual(bitmap, 0b10110)
+
+    def test_periods_are_the_runs_of_set_bits(self):
+        self.assertEqual(bitmap_periods(0b11100110, at(9), self.slot), [
+            (at(9, 15), at(9, 45)),
+            (at(10, 15), at(11)),
+        ])
+
+    def test_suggestions_are_earliest_non_overlapping_runs(self):
+        free = 0b1111000111111
+        self.assertEqual(suggest_slots(free, 3, 5), [0, 3, 9])
+        self.assertEqual(suggest_slots(free, 5, 5), [0])
+        self.assertEqual(suggest_slots(free, 7, 5), [])
+
+    def test_working_hours_skip_nights_and_weekends(self):
+        # 2030-01-07 is a Monday; seven days of 96 slots
+        mask = working_hours_mask(at(0), 7 * 96, self.slot, 9, 17)
+        self.assertEqual(bitmap_periods(mask, at(0), self.slot)[0], (at(9), at(17)))
+        self.assertEqual(len(bitmap_periods(mask, at(0), self.slot)), 5)
+
+    def test_twenty_users_over_a_month_in_milliseconds(self):
+        rng = random.Random(0)
+        window_start, slot_count = at(0), 31 * 96
+        trees = {}
+        for user_id in range(20):
+            items = []
+            for day in range(31):
+                for _ in range(6):
+                    start = window_start + datetime.timedelta(days=day, minutes=rng.randrange(8 * 60, 18 * 60, 5))
+                    items.append((start, start + datetime.timedelta(minutes=rng.choice((15, 30, 60, 90))), None))
+            trees[user_id] = IntervalTree(items)
+
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            working = working_hours_mask(window_start, slot_count, self.slot, 9, 17)
+            busy, starts = free_busy(trees, window_start, slot_count, self.slot, working, 2, 5)
+            timings.append(time.perf_counter() - started)
+
+        self.assertEqual(len(busy), 20)
+        # Well under the interactive budget of the meeting form
+        self.assertLess(min(timings), 0.05)
+
+
+class FreeBusyAPITests(TestCase):
+    """Meetings show as busy time in the API"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner, self.guest = [
+            User.objects.create(name=name, email=f'{name.lower()}@example.com', password_hash='x', role='Member')
+            for name in ('Ada', 'Grace')
+        ]
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.project.user_id.add(self.owner, self.guest)
+        AuthUser.objects.create_user(id=self.owner.pk, username='ada', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.owner.pk))
+
+    def test_meeting_is_busy(self):
+        meeting = CalendarEvent.objects.create(
+            task_id=None, user=self.owner, title='Standup', type='Meeting', start_time=at(10), end_time=at(11)
+        )
+        meeting.participants.add(self.guest)
+
+        response = self.client.get(reverse('calendarevent_app:freebusy_api'), {
+            'project_id': self.project.project_id,
+            'users': f'{self.guest.pk}',
+            'start': at(9).isoformat(),
+            'end': at(12).isoformat(),
+            'duration': 60,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['busy'][str(self.guest.pk)], [[at(10).isoformat(), at(11).isoformat()]])
+        self.assertEqual(body['suggestions'], [
+            {'start': at(9).isoformat(), 'end': at(10).isoformat()},
+            {'start': at(11).isoformat(), 'end': at(12).isoformat()},
+        ])
+
+
+class CalendarCacheTests(TestCase):
+    """Calendar versions move only once the change that invalidates them commits"""
+
+    def setUp(self):
+        cache.clear()
+        self.member, self.outsider = [
+            User.objects.create(name=name, email=f'{name.lower()}@example.com', password_hash='x', role='Member')
+            for name in ('Ada', 'Alan')
+        ]
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.project.user_id.add(self.member)
+
+    def test_bump_waits_for_commit(self):
+        version = get_calendar_version(self.member.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_calendar_versions([self.member.pk])
+            self.assertEqual(get_calendar_version(self.member.pk), version)
+        self.assertEqual(get_calendar_version(self.member.pk), version + 1)
+
+    def test_rolled_back_change_keeps_the_version(self):
+        version = get_calendar_version(self.member.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    bump_calendar_versions([self.member.pk])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(get_calendar_version(self.member.pk), version)
+
+    def test_task_change_bumps_project_members_only(self):
+        member_version = get_calendar_version(self.member.pk)
+        outsider_version = get_calendar_version(self.outsider.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(project_id=self.project, title='Write report', description='',
+                                due_date=datetime.date(2030, 1, 7))
+
+        self.assertGreater(get_calendar_version(self.member.pk), member_version)
+        self.assertEqual(get_calendar_version(self.outsider.pk), outsider_version)
+
+
+class FeedChangesTests(TestCase):
+    """Incremental feed syncs only see changes and cancellations on the subscriber's calendar"""
+
+    def setUp(self):
+        self.ada, self.grace, self.alan = [
+            User.objects.create(name=name, email=f'{name.lower()}@example.com', password_hash='x', role='Member')
+            for name in ('Ada', 'Grace', 'Alan')
+        ]
+        self.ours = Project.objects.create(project_name='Ours', start_date=datetime.date.today())
+        self.ours.user_id.add(self.ada)
+        self.theirs = Project.objects.create(project_name='Theirs', start_date=datetime.date.today())
+        self.theirs.user_id.add(self.alan)
+        self.since = timezone.now() - datetime.timedelta(minutes=1)
+
+    def event(self, project=None, creator=None, participants=()):
+        task = None
+        if project:
+            task = Task.objects.create(project_id=project, title='Write report', description='')
+        event = CalendarEvent.objects.create(
+            task_id=task, user=creator, title='Standup', type='Meeting' if creator else 'Deadline',
+            start_time=at(10), end_time=at(11)
+        )
+        event.participants.add(*participants)
+        return event
+
+    def test_updates_are_limited_to_the_users_calendar(self):
+        ours = self.event(project=self.ours)
+        meeting = self.event(creator=self.grace, participants=[self.ada])
+        self.event(project=self.theirs)
+
+        self.assertEqual(changed_since(self.ada.pk, self.since), ({ours.pk, meeting.pk}, set()))
+        self.assertEqual(changed_since(self.grace.pk, self.since), ({meeting.pk}, set()))
+
+    def test_cancellations_are_limited_to_the_users_calendar(self):
+        ours = self.event(project=self.ours)
+        theirs = self.event(project=self.theirs)
+        meeting = self.event(creator=self.grace, participants=[self.ada])
+        ours_id, theirs_id, meeting_id = ours.pk, theirs.pk, meeting.pk
+        ours.task_id.delete()
+        theirs.delete()
+        meeting.delete()
+
+        self.assertEqual(changed_since(self.ada.pk, self.since), (set(), {ours_id, meeting_id}))
+        self.assertEqual(changed_since(self.grace.pk, self.since), (set(), {meeting_id}))
+        self.assertEqual(changed_since(self.alan.pk, self.since), (set(), {theirs_id}))
@@ -19,7 +19,8 @@ from django.urls import path
 from .views import (
     GetCalendar, GetEventDetails, ScheduleMeeting, CreateEvent,
     EditEvent, RescheduleMeeting, DeleteEvent, CalendarAPI,
-    GetProjectMembersAPI, get_calendar  # Legacy function
+    GetProjectMembersAPI, FreeBusyAPI, ExportCalendar, CalendarFeed, CalendarFeedLink,
+    get_calendar  # Legacy function
 )
 
 app_name = 'calendarevent_app'
@@ -42,7 +43,13 @@ urlpatterns = [
 
     # API Endpoints
     path('api/events/', CalendarAPI.as_view(), name='calendar_api'),
+    path('api/events/export/', ExportCalendar.as_view(), name='calendar_export'),
     path('api/project/<int:project_id>/members/', GetProjectMembersAPI.as_view(), name='project_members_api'),
+    path('api/freebusy/', FreeBusyAPI.as_view(), name='freebusy_api'),
+
+    # iCalendar subscription feed
+    path('feed/', CalendarFeedLink.as_view(), name='calendar_feed_link'),
+    path('feed/<str:token>.ics', CalendarFeed.as_view(), name='calendar_feed'),
 
     # Legacy URL (for backward compatibility)
     path('legacy/', get_calendar, name='calendar_legacy'),
@@ -33,17 +33,36 @@
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import HttpResponseForbidden, JsonResponse, HttpResponse, HttpResponseNotModified, Http404
+from django.urls import reverse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.views import View
 from django.utils.decorators import method_decorator
+from django.utils import timezone
+from django.conf import settings
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from .models import CalendarEvent
+from dunzomanagement.asyncdb import run_db
+from dunzomanagement.streaming import EXPORT_FORMATS, iterate_cursor, streaming_export
+from .busy import find_conflicts, get_busy_trees
+from .freebusy import bitmap_periods, free_busy, working_hours_mask
+from .feed import (
+    make_feed_token, read_feed_token, make_sync_token, read_sync_token,
+    changed_since, deletion_audience, touch_event, record_deletion
+)
+from .ics import render_calendar
+from .cache import (
+    get_calendar_version, bump_calendar_versions, bump_for_tasks,
+    calendar_window_key, calendar_etag, get_cached_window, set_cached_window
+)
 from project_app.models import Project
+from project_app.cache import cached_lookup, USER_PROJECTS_KEY, PROJECT_MEMBERS_KEY
 from user_app.models import User
 from task_app.models import Task
 
@@ -56,38 +75,92 @@ EDIT_EVENT_TEMPLATE = 'calendarevent_app/edit_event.html'
 RESCHEDULE_TEMPLATE = 'calendarevent_app/reschedule_meeting.html'
 DELETE_EVENT_TEMPLATE = 'calendarevent_app/delete_event.html'
 
+CALENDAR_EXPORT_FIELDS = [
+    'event_id', 'event_type', 'title', 'description', 'start_date', 'end_date',
+    'project_id', 'project_title', 'task_id', 'task_title',
+]
+
 
 # ========== HELPER FUNCTIONS ==========
 def get_user_projects(user_id):
-    """Get all projects the user is a member of"""
-    with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT p.project_id, p.title 
-            FROM project_app_project p
-            INNER JOIN project_app_projectmembership pm ON p.project_id = pm.project_id
-            WHERE pm.user_id = %s AND p.status = 'Active'
-            ORDER BY p.title
-        """, [user_id])
-        return cursor.fetchall()
+    """Get all projects the user is a member of (cached until membership changes)"""
+    return cached_lookup(
+        USER_PROJECTS_KEY.format(user_id),
+        lambda: _fetch_user_projects(user_id)
+    )
 
 
 def get_project_members(project_id):
-    """Get all members of a project"""
+    """Get all members of a project (cached until membership changes)"""
+    return cached_lookup(
+        PROJECT_MEMBERS_KEY.format(project_id),
+        lambda: _fetch_project_members(project_id)
+    )
+
+
+# Both lookups read Project.user_id, the membership table whose changes the
+# project_app signals invalidate these caches on
+
+def _fetch_user_projects(user_id):
+    """Query the projects the user is a member of as (project_id, name) rows"""
+    return list(
+        Project.objects.filter(user_id=user_id, status='Active')
+        .order_by('project_name')
+        .values_list('project_id', 'project_name')
+    )
+
+
+def _fetch_project_members(project_id):
+    """Query the members of a project as (user_id, name, email, role) rows"""
+    role_order = Case(
+        When(role='Admin', then=Value(1)),
+        When(role='Manager', then=Value(2)),
+        default=Value(3),
+        output_field=IntegerField(),
+    )
+    return list(
+        User.objects.filter(projects=project_id)
+        .order_by(role_order, 'name')
+        .values_list('id', 'name', 'email', 'role')
+    )
+
+
+def fetch_calendar_events(user_id, start_date=None, end_date=None, event_ids=None):
+    """Rows of get_user_calendar_events as dicts, optionally only the given events"""
     with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT u.user_id, u.username, u.email, pm.role
-            FROM user_app_user u
-            INNER JOIN project_app_projectmembership pm ON u.user_id = pm.user_id
-            WHERE pm.project_id = %s
-            ORDER BY 
-                CASE pm.role 
-                    WHEN 'Leader' THEN 1
-                    WHEN 'Manager' THEN 2
-                    WHEN 'Member' THEN 3
-                END,
-                u.username
-        """, [project_id])
-        return cursor.fetchall()
+        if event_ids is None:
+            cursor.execute("""
+                SELECT * FROM get_user_calendar_events(%s, %s, %s)
+            """, [user_id, start_date, end_date])
+        else:
+            cursor.execute("""
+                SELECT * FROM get_user_calendar_events(%s, %s, %s) WHERE event_id = ANY(%s)
+            """, [user_id, start_date, end_date, sorted(event_ids)])
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def wants_json(request):
+    """True for AJAX callers that send or expect JSON"""
+    return (request.content_type == 'application/json'
+            or 'application/json' in request.headers.get('Accept', ''))
+
+
+def conflict_response(request, template, context, conflicts):
+    """Report double-booked participants as JSON (409) or as a form error"""
+    message = 'Some participants are already booked at this time'
+    if wants_json(request):
+        return JsonResponse({'success': False, 'message': message, 'conflicts': conflicts}, status=409)
+    context.update({'error': message, 'conflicts': conflicts, 'form_data': request.POST})
+    return render(request, template, context)
+
+
+def get_meeting_participant_ids(event):
+    """Creator and attendees of a meeting, read from the same data as the permission checks"""
+    participant_ids = set(event.participants.values_list('id', flat=True))
+    if event.user_id:
+        participant_ids.add(event.user_id)
+    return participant_ids
 
 
 # ========== STORED PROCEDURES CLASS-BASED VIEWS ==========
@@ -326,6 +399,15 @@ class ScheduleMeeting(View):
                 start_date = datetime.strptime(start_date_str, '%Y-%m-%dT%H:%M')
                 end_date = datetime.strptime(end_date_str, '%Y-%m-%dT%H:%M')
 
+            # Refuse to double-book participants unless explicitly overridden
+            if request.POST.get('ignore_conflicts') != 'on':
+                conflicts = find_conflicts(participant_ids, start_date, end_date)
+                if conflicts:
+                    return conflict_response(request, self.template, {
+                        'projects': get_user_projects(request.user.id),
+                        'members': get_project_members(project_id),
+                    }, conflicts)
+
             # Call the stored procedure
             with connection.cursor() as cursor:
                 cursor.execute("""
@@ -352,6 +434,7 @@ class ScheduleMeeting(View):
                     event_id, message = result
 
                     if event_id > 0:
+                        bump_calendar_versions(participant_ids)
                         return redirect('calendarevent_app:event_details', event_id=event_id)
                     else:
                         projects = get_user_projects(request.user.id)
@@ -450,6 +533,7 @@ class CreateEvent(View):
                     event_id, message = result
 
                     if event_id > 0:
+                        bump_calendar_versions([request.user.id])
                         return redirect('calendarevent_app:event_details', event_id=event_id)
                     else:
                         return render(request, self.template, {
@@ -595,6 +679,8 @@ class EditEvent(View):
                     success, message = result
 
                     if success:
+                        touch_event(event_id)
+                        bump_for_tasks([event.task_id_id], (participant_ids or []) + [request.user.id])
                         return redirect('calendarevent_app:event_details', event_id=event_id)
                     else:
                         context = self._get_edit_context(event, request.user.id)
@@ -692,6 +778,20 @@ class RescheduleMeeting(View):
                     'error': 'Start date must be before end date'
                 })
 
+            # Check the meeting's people against the new slot; meetings are not
+            # tied to a task, so its assignees say nothing about who attends
+            if request.POST.get('ignore_conflicts') != 'on':
+                participant_ids = get_meeting_participant_ids(event)
+                if not participant_ids:
+                    return render(request, self.template, {
+                        'event': event,
+                        'error': 'The participants of this meeting could not be determined'
+                    })
+                participant_ids.add(request.user.id)
+                conflicts = find_conflicts(participant_ids, start_date, end_date, exclude_event_id=event.pk)
+                if conflicts:
+                    return conflict_response(request, self.template, {'event': event}, conflicts)
+
             # Call the update stored procedure (only update dates)
             with connection.cursor() as cursor:
                 cursor.execute("""
@@ -714,6 +814,8 @@ class RescheduleMeeting(View):
                     success, message = result
 
                     if success:
+                        touch_event(event_id)
+                        bump_for_tasks([event.task_id_id], [request.user.id])
                         return redirect('calendarevent_app:event_details', event_id=event_id)
                     else:
                         return render(request, self.template, {
@@ -773,6 +875,8 @@ class DeleteEvent(View):
                 if event.user_id != request.user.id and not event.participants.filter(id=request.user.id).exists():
                     return HttpResponseForbidden("Only meeting creator or participants can delete this meeting")
 
+            audience = deletion_audience(event)
+
             # Call the delete stored procedure
             with connection.cursor() as cursor:
                 cursor.execute("""
@@ -785,6 +889,8 @@ class DeleteEvent(View):
                     success, message = result
 
                     if success:
+                        record_deletion(event_id, event.task_id_id, **audience)
+                        bump_for_tasks([event.task_id_id], [request.user.id])
                         return redirect('calendarevent_app:calendar')
                     else:
                         return render(request, self.template, {
@@ -810,10 +916,10 @@ class CalendarAPI(View):
 
     @method_decorator(login_required)
     @method_decorator(csrf_exempt)
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    async def dispatch(self, *args, **kwargs):
+        return await super().dispatch(*args, **kwargs)
 
-    def get(self, request):
+    async def get(self, request):
         """Get calendar events as JSON (for AJAX calendar widgets)"""
         try:
             start_str = request.GET.get('start')
@@ -827,41 +933,65 @@ class CalendarAPI(View):
             if end_str:
                 end_date = datetime.fromisoformat(end_str.replace('Z', '+00:00'))
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM get_user_calendar_events(%s, %s, %s)
-                """, [request.user.id, start_date, end_date])
-
-                events = []
-                columns = [col[0] for col in cursor.description]
-                for row in cursor.fetchall():
-                    event = dict(zip(columns, row))
-
-                    # Format for FullCalendar
-                    events.append({
-                        'id': event['event_id'],
-                        'title': event['title'],
-                        'start': event['start_date'].isoformat() if event['start_date'] else event[
-                            'end_date'].isoformat(),
-                        'end': event['end_date'].isoformat(),
-                        'allDay': event['start_date'] is None or event['start_date'].date() == event['end_date'].date(),
-                        'color': self._get_event_color(event['event_type']),
-                        'extendedProps': {
-                            'type': event['event_type'],
-                            'description': event['description'],
-                            'project_id': event['project_id'],
-                            'project_title': event['project_title'],
-                            'task_id': event['task_id'],
-                            'task_title': event['task_title'],
-                            'is_participant': event['is_participant']
-                        }
-                    })
-
-                return JsonResponse(events, safe=False)
+            user = await request.auser()
+            etag, body = await run_db(
+                self._load_window, user.id, start_date, end_date,
+                request.headers.get('If-None-Match', '')
+            )
+            if body is None:
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+            response = HttpResponse(body, content_type='application/json')
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
 
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
 
+    def _load_window(self, user_id, start_date, end_date, if_none_match):
+        """Return (etag, JSON body), or (etag, None) when the client's copy is current"""
+        # Unchanged windows are answered from the version number alone
+        version = get_calendar_version(user_id)
+        etag = calendar_etag(user_id, version, start_date, end_date)
+        if etag in if_none_match:
+            return etag, None
+
+        cache_key = calendar_window_key(user_id, version, start_date, end_date)
+        body = get_cached_window(cache_key)
+        if body is None:
+            events = self._get_events(user_id, start_date, end_date)
+            body = json.dumps(events, cls=DjangoJSONEncoder)
+            set_cached_window(cache_key, body)
+        return etag, body
+
+    def _get_events(self, user_id, start_date, end_date):
+        """Run get_user_calendar_events and format the rows for FullCalendar"""
+        events = []
+        for event in fetch_calendar_events(user_id, start_date, end_date):
+            # Format for FullCalendar
+            events.append({
+                'id': event['event_id'],
+                'title': event['title'],
+                'start': event['start_date'].isoformat() if event['start_date'] else event[
+                    'end_date'].isoformat(),
+                'end': event['end_date'].isoformat(),
+                'allDay': event['start_date'] is None or event['start_date'].date() == event['end_date'].date(),
+                'color': self._get_event_color(event['event_type']),
+                'extendedProps': {
+                    'type': event['event_type'],
+                    'description': event['description'],
+                    'project_id': event['project_id'],
+                    'project_title': event['project_title'],
+                    'task_id': event['task_id'],
+                    'task_title': event['task_title'],
+                    'is_participant': event['is_participant']
+                }
+            })
+        return events
+
     def _get_event_color(self, event_type):
         """Get color for event type"""
         colors = {
@@ -872,16 +1002,44 @@ class CalendarAPI(View):
         return colors.get(event_type, '#6c757d')  # Gray default
 
 
-class GetProjectMembersAPI(View):
+class ExportCalendar(View):
 
     @method_decorator(login_required)
     def dispatch(self, *args, **kwargs):
         return super().dispatch(*args, **kwargs)
 
-    def get(self, request, project_id):
+    def get(self, request):
+        """Stream the user's calendar events as CSV or JSON Lines (?format=csv|jsonl)"""
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return JsonResponse({'error': 'Format must be csv or jsonl'}, status=400)
+
+        try:
+            start_str = request.GET.get('start')
+            end_str = request.GET.get('end')
+            start_date = datetime.fromisoformat(start_str.replace('Z', '+00:00')) if start_str else None
+            end_date = datetime.fromisoformat(end_str.replace('Z', '+00:00')) if end_str else None
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        events = iterate_cursor("""
+            SELECT * FROM get_user_calendar_events(%s, %s, %s)
+        """, [request.user.id, start_date, end_date])
+        rows = ([event.get(field) for field in CALENDAR_EXPORT_FIELDS] for event in events)
+
+        return streaming_export(request, f'calendar-{request.user.id}', CALENDAR_EXPORT_FIELDS, rows, export_format)
+
+
+class GetProjectMembersAPI(View):
+
+    @method_decorator(login_required)
+    async def dispatch(self, *args, **kwargs):
+        return await super().dispatch(*args, **kwargs)
+
+    async def get(self, request, project_id):
         """Get project members as JSON (for AJAX dropdown)"""
         try:
-            members = get_project_members(project_id)
+            members = await run_db(get_project_members, project_id)
 
             members_data = []
             for member in members:
@@ -898,6 +1056,159 @@ class GetProjectMembersAPI(View):
             return JsonResponse({'error': str(e)}, status=400)
 
 
+class FreeBusyAPI(View):
+
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get(self, request):
+        """Busy periods and common free slots for project members (for the meeting form)"""
+        try:
+            project_id = int(request.GET['project_id'])
+            user_ids = {int(uid) for uid in request.GET.get('users', '').split(',') if uid}
+            duration = int(request.GET.get('duration', 30))
+            limit = min(int(request.GET.get('limit', 5)), settings.FREEBUSY_MAX_SUGGESTIONS)
+            slot_minutes = int(request.GET.get('slot', settings.FREEBUSY_SLOT_MINUTES))
+
+            now = timezone.now()
+            start_str = request.GET.get('start')
+            end_str = request.GET.get('end')
+            start_date = datetime.fromisoformat(start_str.replace('Z', '+00:00')) if start_str else now
+            end_date = datetime.fromisoformat(end_str.replace('Z', '+00:00')) if end_str else start_date + timedelta(days=7)
+            if timezone.is_naive(start_date):
+                start_date = timezone.make_aware(start_date)
+            if timezone.is_naive(end_date):
+                end_date = timezone.make_aware(end_date)
+        except (KeyError, ValueError):
+            return JsonResponse({'error': 'project_id, users, start, end, duration and slot must be valid'}, status=400)
+
+        if not user_ids:
+            return JsonResponse({'error': 'At least one user is required'}, status=400)
+        if len(user_ids) > settings.FREEBUSY_MAX_USERS:
+            return JsonResponse({'error': f'At most {settings.FREEBUSY_MAX_USERS} users per request'}, status=400)
+        if slot_minutes <= 0 or duration <= 0:
+            return JsonResponse({'error': 'Duration and slot must be positive'}, status=400)
+        if end_date - start_date > timedelta(days=settings.FREEBUSY_MAX_DAYS):
+            return JsonResponse({'error': f'The window can span at most {settings.FREEBUSY_MAX_DAYS} days'}, status=400)
+
+        # Only members of the project can be looked up, and only by another member
+        member_ids = {member[0] for member in get_project_members(project_id)}
+        if request.user.id not in member_ids or not user_ids <= member_ids:
+            return HttpResponseForbidden("Free/busy is only available for members of your project")
+
+        # Never suggest the past; align the window to slot boundaries
+        slot = timedelta(minutes=slot_minutes)
+        window_start = max(start_date, now)
+        window_start += -(window_start - datetime(1970, 1, 1, tzinfo=dt_timezone.utc)) % slot
+        slot_count = max((end_date - window_start) // slot, 0)
+        window_end = window_start + slot * slot_count
+
+        working = working_hours_mask(
+            window_start, slot_count, slot,
+            settings.FREEBUSY_WORKDAY_START, settings.FREEBUSY_WORKDAY_END
+        )
+        length = -(-duration // slot_minutes)
+        bitmaps, starts = free_busy(get_busy_trees(user_ids), window_start, slot_count, slot, working, length, limit)
+
+        busy = {
+            user_id: [
+                [period_start.isoformat(), period_end.isoformat()]
+                for period_start, period_end in bitmap_periods(bitmap, window_start, slot)
+            ]
+            for user_id, bitmap in bitmaps.items()
+        }
+        suggestions = [
+            {
+                'start': (window_start + slot * index).isoformat(),
+                'end': (window_start + slot * (index + length)).isoformat(),
+            }
+            for index in starts
+        ]
+
+        return JsonResponse({
+            'start': window_start.isoformat(),
+            'end': window_end.isoformat(),
+            'slot_minutes': slot_minutes,
+            'busy': busy,
+            'suggestions': suggestions,
+        })
+
+
+class CalendarFeedLink(View):
+
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get(self, request):
+        """Return the user's personal iCalendar subscription URL"""
+        url = reverse('calendarevent_app:calendar_feed', kwargs={'token': make_feed_token(request.user.id)})
+        return JsonResponse({'url': request.build_absolute_uri(url)})
+
+
+class CalendarFeed(View):
+    """
+    iCalendar subscription feed, authenticated by the signed token in the URL.
+
+    Pass the X-Sync-Token of a previous response as ?sync-token= to receive
+    only the events changed or cancelled since then. A 410 means the token
+    is no longer usable and the client should fetch the full feed again.
+    """
+
+    def get(self, request, token):
+        user_id = read_feed_token(token)
+        if user_id is None:
+            raise Http404("Unknown calendar feed")
+
+        sync_param = request.GET.get('sync-token')
+        since = None
+        if sync_param:
+            since = read_sync_token(sync_param, user_id)
+            if since is None:
+                return HttpResponse('Sync token is invalid or expired', status=410)
+
+        # Nothing on this calendar changed since the client's copy: no database access
+        version = get_calendar_version(user_id)
+        etag = calendar_etag(user_id, version, 'ics', sync_param)
+        if etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        cache_key = calendar_window_key(user_id, version, 'ics', sync_param)
+        cached = get_cached_window(cache_key)
+        if cached is None:
+            cached = self._render(user_id, since)
+            set_cached_window(cache_key, cached)
+        body, next_token = cached
+
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        response['ETag'] = etag
+        response['X-Sync-Token'] = next_token
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def _render(self, user_id, since):
+        """Build the feed body and the sync token that follows it"""
+        now = timezone.now()
+        next_token = make_sync_token(user_id, now)
+        start_date = now - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+        end_date = now + timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS)
+
+        cancelled_ids = []
+        if since is None:
+            events = fetch_calendar_events(user_id, start_date, end_date)
+        else:
+            updated_ids, cancelled_ids = changed_since(user_id, since)
+            events = []
+            if updated_ids:
+                events = fetch_calendar_events(user_id, start_date, end_date, event_ids=updated_ids)
+
+        body = render_calendar(events, sorted(cancelled_ids), sync_token=next_token)
+        return body, next_token
+
+
 # ========== FUNCTION-BASED VIEWS (for backward compatibility) ==========
 
 @login_required
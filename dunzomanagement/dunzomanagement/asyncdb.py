@@ -0,0 +1,64 @@
+"""
+Bounded thread-pool bridge for database work done from async views.
+
+Django's own async ORM methods run every query through a single shared
+thread (``sync_to_async(thread_sensitive=True)``), so concurrent async
+requests still wait on each other. ``run_db`` instead runs a blocking
+function on a dedicated pool of ASYNC_DB_MAX_WORKERS threads, each keeping
+its own database connection. Keep the pool no larger than the number of
+connections the database allows for this process.
+
+Each call runs in a copy of the caller's context, so per-request state
+such as the query instrumentation follows the work into the pool thread.
+Calls do not share a transaction: do everything that must be atomic inside
+one function.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide database thread pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_DB_MAX_WORKERS,
+                    thread_name_prefix='asyncdb',
+                )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    # Same connection housekeeping Django does around a sync request
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def is_asgi_request(request):
+    """Whether the request is served by the ASGI handler rather than WSGI"""
+    return isinstance(request, ASGIRequest)
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking (ORM/cursor) function on the database pool and await its result"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        get_executor(),
+        functools.partial(context.run, _call, func, args, kwargs),
+    )
@@ -0,0 +1,99 @@
+"""
+Background batch writer for work that does not have to finish inside the
+request.
+
+A BatchWriter collects items from any thread and hands them to its flush
+function in batches from a single daemon thread: a batch is flushed when
+it reaches ``batch_size`` items or ``flush_interval`` seconds after its
+first item, whichever comes first. Whatever is still queued when the
+process exits normally is flushed by an atexit hook.
+
+Items live in memory until they are flushed, so a crash loses at most the
+current batch; only use this for writes that can tolerate that. A batch
+whose flush fails is dropped and logged, unless the writer was given a
+``spill`` function, which then gets the batch to keep somewhere durable.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Queue items from request threads; write them in batches from a background thread"""
+
+    def __init__(self, name, flush_items, batch_size, flush_interval, spill=None):
+        self.name = name
+        self.flush_items = flush_items
+        self.spill = spill
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+        atexit.register(self.flush)
+
+    def put(self, item):
+        """Queue one item; never blocks on the database"""
+        self.ensure_thread()
+        self.queue.put(item)
+
+    def ensure_thread(self):
+        # Started lazily, and again in a forked worker (threads do not survive fork)
+        if self.thread is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread is None or self.pid != os.getpid():
+                if self.pid is not None and self.pid != os.getpid():
+                    self.queue = queue.Queue()
+                self.pid = os.getpid()
+                self.thread = threading.Thread(target=self.run, name=f'{self.name}-writer', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.write(batch)
+            close_old_connections()
+
+    def write(self, batch):
+        try:
+            self.flush_items(batch)
+        except Exception:
+            if self.spill is None:
+                logger.exception('%s writer dropped a batch of %d items', self.name, len(batch))
+                return
+            logger.exception('%s writer spilled a batch of %d items', self.name, len(batch))
+            try:
+                self.spill(batch)
+            except Exception:
+                logger.exception('%s writer could not spill a batch of %d items', self.name, len(batch))
+
+    def flush(self):
+        """Write everything queued so far from the calling thread (exit hook, tests)"""
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                return
+            self.write(batch)
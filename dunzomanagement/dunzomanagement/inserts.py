@@ -0,0 +1,49 @@
+"""
+Bulk inserts that leave every object with its primary key.
+
+bulk_create fills in primary keys only where the database returns rows
+from a multi-row INSERT (PostgreSQL, SQLite, MariaDB). On MySQL it sends no
+RETURNING and the objects come back without ids, so ``bulk_insert`` reads
+the new rows back in one more query and matches them to the objects on a
+few of their column values. The ``auto_now_add`` timestamp every object
+gets from bulk_create (to the microsecond) keeps that match to the rows
+just inserted.
+
+Like bulk_create, it sends no post_save: callers do their own counting,
+publishing and cache invalidation once per batch.
+"""
+from collections import defaultdict
+
+from django.db import DatabaseError
+
+
+def bulk_insert(model, objs, stamp_field, match_fields, batch_size=None, **filters):
+    """
+    bulk_create ``objs`` and make sure each one has its primary key.
+
+    ``stamp_field`` is an auto_now_add field; ``match_fields`` (which should
+    include it) identify a row among the ones stamped in the same range, and
+    ``filters`` narrow the read-back query to an index. Call it inside the
+    inserting transaction.
+    """
+    objs = model.objects.bulk_create(objs, batch_size=batch_size)
+    if not objs or objs[0].pk is not None:
+        return objs
+
+    fields = [model._meta.get_field(name) for name in match_fields]
+    pending = defaultdict(list)
+    for obj in objs:
+        pending[tuple(getattr(obj, field.attname) for field in fields)].append(obj)
+
+    stamps = [getattr(obj, stamp_field) for obj in objs]
+    rows = model.objects.filter(
+        **filters, **{f'{stamp_field}__range': (min(stamps), max(stamps))}
+    ).order_by('pk').values_list('pk', *match_fields)
+    for pk, *key in rows:
+        matches = pending.get(tuple(key))
+        if matches:
+            matches.pop(0).pk = pk
+
+    if any(obj.pk is None for obj in objs):
+        raise DatabaseError(f'Could not read back the ids of inserted {model._meta.label} rows')
+    return objs
@@ -0,0 +1,213 @@
+"""
+Per-request SQL and template instrumentation.
+
+Every database connection gets an execute wrapper when it is opened, so
+both ORM queries and the raw ``connection.cursor()`` calls to stored
+functions are counted. The wrapper reports to the stats of the current
+request, found through a context variable; that also covers queries run
+from async views, whose database work happens on other threads
+(``sync_to_async`` or the dunzomanagement.asyncdb pool). The results are
+sent back as a ``Server-Timing`` header and written as one log line per
+request; requests that go over their query or latency budget are logged
+as warnings.
+
+Template render time is measured by TimedDjangoTemplates, a drop-in
+replacement for the default template backend.
+"""
+import contextvars
+import logging
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+# SELECT * FROM some_function(...) / SELECT EXISTS(SELECT 1 FROM some_function(...))
+STORED_FUNCTION_RE = re.compile(r'\bFROM\s+([A-Za-z_][A-Za-z0-9_]*)\s*\(', re.IGNORECASE)
+
+_current_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """Counters collected while a single request is being handled"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.stored_function_time = 0.0
+        self.render_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_sql = ''
+
+    def add_query(self, sql, duration):
+        self.query_count += 1
+        self.db_time += duration
+        if STORED_FUNCTION_RE.search(sql):
+            self.stored_function_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_sql = sql
+
+
+def get_current_stats():
+    """Return the stats object of the request being handled, if any"""
+    return _current_stats.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrapper() hook that times every statement"""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, time.perf_counter() - start)
+
+
+def install_query_wrapper(connection):
+    """Add record_query to a connection once, ahead of any temporary wrappers"""
+    # Inserted first: connection.execute_wrapper() removes its wrapper with pop()
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def on_connection_created(sender, connection, **kwargs):
+    install_query_wrapper(connection)
+
+
+connection_created.connect(on_connection_created, dispatch_uid='dunzomanagement.instrumentation')
+
+
+class TimedTemplate:
+    """Wraps a backend template so render() time is added to the request stats"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return self.template.render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.render_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that reports render time to the instrumentation"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def get_query_budget(request):
+    """Query budget for the resolved view, from QUERY_BUDGETS or QUERY_BUDGET"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.view_name in budgets:
+        return budgets[match.view_name]
+    return getattr(settings, 'QUERY_BUDGET', None)
+
+
+def get_latency_budget(request):
+    """Latency budget in milliseconds for the resolved view, from LATENCY_BUDGETS or LATENCY_BUDGET"""
+    budgets = getattr(settings, 'LATENCY_BUDGETS', {})
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.view_name in budgets:
+        return budgets[match.view_name]
+    return getattr(settings, 'LATENCY_BUDGET', None)
+
+
+class QueryInstrumentationMiddleware:
+    """Records SQL count/time, render time and slowest statement per request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported
+        for conn in connections.all(initialized_only=True):
+            install_query_wrapper(conn)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+
+        self.report(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+
+        self.report(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def report(self, request, response, stats, total_time):
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries"',
+            f'sp;dur={stats.stored_function_time * 1000:.1f};desc="stored functions"',
+            f'render;dur={stats.render_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match is not None else '-'
+        budget = get_query_budget(request)
+        over_budget = budget is not None and stats.query_count > budget
+        latency_budget = get_latency_budget(request)
+        over_latency_budget = latency_budget is not None and total_time * 1000 > latency_budget
+
+        log = logger.warning if over_budget or over_latency_budget else logger.info
+        log(
+            'method=%s path=%s view=%s status=%s queries=%d budget=%s db_ms=%.1f '
+            'sp_ms=%.1f render_ms=%.1f total_ms=%.1f latency_budget_ms=%s slowest_ms=%.1f slowest_sql=%r',
+            request.method, request.path, view_name, response.status_code,
+            stats.query_count, budget, stats.db_time * 1000,
+            stats.stored_function_time * 1000, stats.render_time * 1000,
+            total_time * 1000, latency_budget, stats.slowest_time * 1000, stats.slowest_sql[:200],
+            extra={
+                'view': view_name,
+                'query_count': stats.query_count,
+                'query_budget': budget,
+                'over_query_budget': over_budget,
+                'latency_budget_ms': latency_budget,
+                'over_latency_budget': over_latency_budget,
+                'db_time_ms': round(stats.db_time * 1000, 1),
+                'total_time_ms': round(total_time * 1000, 1),
+            },
+        )
+
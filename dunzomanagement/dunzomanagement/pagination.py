@@ -0,0 +1,80 @@
+"""
+Keyset (cursor) pagination helpers shared by the list views.
+
+Instead of OFFSET/LIMIT, each page is fetched with a WHERE clause that
+starts right after the last row of the previous page, so the cost of a
+page does not grow with how deep the client has scrolled.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Encode the ordering values of a row into an opaque URL-safe token"""
+    raw = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token, returning None when it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _row_values(row, model, fields):
+    """Read the ordering values from a model instance or a values() dict"""
+    values = []
+    for name in fields:
+        if isinstance(row, dict):
+            values.append(row[name])
+        else:
+            values.append(getattr(row, model._meta.get_field(name).attname))
+    return values
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=50):
+    """
+    Return one page of ``queryset`` ordered by ``ordering`` and the cursor
+    for the next page (None on the last page).
+
+    ``ordering`` is a list of field names, each optionally prefixed with
+    '-' for descending order. The last field must be unique (usually the
+    primary key) so that the ordering is total.
+    """
+    fields = [name.lstrip('-') for name in ordering]
+    queryset = queryset.order_by(*ordering)
+
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(fields):
+        # (a > x) OR (a = x AND b > y) OR ...
+        condition = Q()
+        for i, name in enumerate(fields):
+            lookup = 'lt' if ordering[i].startswith('-') else 'gt'
+            branch = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(fields[:i], values[:i]):
+                branch &= Q(**{prev_name: prev_value})
+            condition |= branch
+        try:
+            queryset = queryset.filter(condition)
+        except (ValidationError, ValueError, TypeError):
+            # Well-formed token, but values the fields cannot take: treat it
+            # like any other malformed cursor and start from the first page
+            pass
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(_row_values(rows[-1], queryset.model, fields))
+
+    return rows, next_cursor
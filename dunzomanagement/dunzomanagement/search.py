@@ -0,0 +1,386 @@
+"""
+Full-text search over tasks, comments and calendar events.
+
+Tasks are searched on title and description, comments on their content
+and events on their title, always limited to the projects of the caller.
+A query matches documents containing all of its words; hits come back
+ranked, with the matched words wrapped in <mark> in an HTML-escaped title
+and snippet.
+
+On PostgreSQL and MySQL the database's full-text indexes do the matching
+and ranking (GIN indexes on to_tsvector(), FULLTEXT indexes; see the
+search_indexes migrations of task_app and calendarevent_app). Any other
+database, such as SQLite in development, uses an inverted index held in
+memory by each process: it is built from the tables on the first search
+and kept current afterwards by index_saved()/index_deleted(), called from
+the post_save/post_delete receivers of task_app and calendarevent_app,
+plus index_instances() for rows written by bulk_create.
+"""
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.html import escape
+
+from calendarevent_app.models import CalendarEvent
+from task_app.models import Comment, Task
+
+TOKEN_RE = re.compile(r'\w+')
+
+# InnoDB's default full-text stopwords. Words this common match most of the
+# documents and barely change a ranking; leaving them out of queries and of
+# the in-process index keeps its searches from walking nearly every document.
+STOP_WORDS = frozenset((
+    'a about an are as at be by com de en for from how i in is it la of on '
+    'or that the this to was what when where who will with und www'
+).split())
+
+# Text search configuration; the GIN indexes are built with the same one,
+# and PostgreSQL only uses an index when the expression matches it exactly
+SEARCH_CONFIG = 'english'
+
+# InnoDB leaves words shorter than innodb_ft_min_token_size out of FULLTEXT indexes
+MYSQL_MIN_TERM_LENGTH = 3
+
+SearchSource = namedtuple('SearchSource', 'model fields via_task')
+
+SEARCH_SOURCES = {
+    'task': SearchSource(Task, ('title', 'description'), via_task=False),
+    'comment': SearchSource(Comment, ('content',), via_task=True),
+    'event': SearchSource(CalendarEvent, ('title',), via_task=True),
+}
+
+SOURCE_KINDS = {source.model: kind for kind, source in SEARCH_SOURCES.items()}
+
+
+def tokenize(text):
+    return [word for word in TOKEN_RE.findall(text.lower()) if word not in STOP_WORDS]
+
+
+def search(terms, project_ids, kinds=None, limit=None):
+    """
+    Ranked hits for ``terms`` in ``project_ids``, best first.
+
+    Returns dicts with kind, id, task_id, project_id, title, snippet and
+    score; title and snippet are HTML with the matches marked.
+    """
+    kinds = [kind for kind in (kinds or SEARCH_SOURCES) if kind in SEARCH_SOURCES]
+    limit = limit or settings.SEARCH_RESULT_LIMIT
+    project_ids = list(project_ids)
+    if not terms or not project_ids or not kinds:
+        return []
+
+    if connection.vendor == 'postgresql':
+        hits = [hit for kind in kinds for hit in search_postgresql(kind, terms, project_ids, limit)]
+    elif connection.vendor == 'mysql':
+        hits = [hit for kind in kinds for hit in search_mysql(kind, terms, project_ids, limit)]
+    else:
+        hits = search_index.search(terms, set(project_ids), set(kinds), limit)
+    hits = heapq.nlargest(limit, hits, key=lambda hit: hit[2])
+    return load_hits(hits, terms)
+
+
+# ========== DATABASE FULL-TEXT INDEXES ==========
+
+def source_sql(kind):
+    """(pk column, text columns, FROM clause, project column) of a source for raw SQL"""
+    source = SEARCH_SOURCES[kind]
+    meta = source.model._meta
+    columns = [f't.{meta.get_field(name).column}' for name in source.fields]
+    from_clause = f'{meta.db_table} t'
+    if source.via_task:
+        task_meta = Task._meta
+        from_clause += (
+            f' JOIN {task_meta.db_table} tk ON tk.{task_meta.pk.column} = t.{meta.get_field("task_id").column}'
+        )
+        project_column = f'tk.{task_meta.get_field("project_id").column}'
+    else:
+        project_column = f't.{meta.get_field("project_id").column}'
+    return f't.{meta.pk.column}', columns, from_clause, project_column
+
+
+def search_postgresql(kind, terms, project_ids, limit):
+    pk, columns, from_clause, project_column = source_sql(kind)
+    text = " || ' ' || ".join(columns)
+    vector = f"to_tsvector('{SEARCH_CONFIG}', {text})"
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {pk}, ts_rank_cd({vector}, query) AS score
+            FROM {from_clause}, plainto_tsquery('{SEARCH_CONFIG}', %s) query
+            WHERE {vector} @@ query AND {project_column} = ANY(%s)
+            ORDER BY score DESC
+            LIMIT %s
+        """, [' '.join(terms), project_ids, limit])
+        return [(kind, row[0], row[1]) for row in cursor.fetchall()]
+
+
+def search_mysql(kind, terms, project_ids, limit):
+    terms = [term for term in terms if len(term) >= MYSQL_MIN_TERM_LENGTH]
+    if not terms:
+        return []
+    pk, columns, from_clause, project_column = source_sql(kind)
+    # Terms are \w+ tokens, so they cannot carry boolean mode operators
+    match = f"MATCH({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)"
+    query = ' '.join(f'+{term}' for term in terms)
+    placeholders = ', '.join(['%s'] * len(project_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {pk}, {match} AS score
+            FROM {from_clause}
+            WHERE {match} AND {project_column} IN ({placeholders})
+            ORDER BY score DESC
+            LIMIT %s
+        """, [query, query, *project_ids, limit])
+        return [(kind, row[0], row[1]) for row in cursor.fetchall()]
+
+
+# ========== IN-PROCESS INVERTED INDEX ==========
+
+class InvertedIndex:
+    """
+    Word -> documents index kept in memory, ranked with BM25.
+
+    Every search is limited to the caller's projects, so ``postings`` maps
+    each word to {project_id: {docno: occurrences}} and a search only walks
+    the documents of those projects. ``docs`` keeps (kind, pk, project_id,
+    length, words) per internal document number, so a changed or deleted
+    document can be taken out of exactly the postings it is in.
+    """
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.state = 'empty'
+            self.postings = defaultdict(lambda: defaultdict(dict))
+            self.doc_freq = Counter()
+            self.docs = {}
+            self.docnos = {}
+            self.next_docno = 0
+            self.total_length = 0
+
+    @property
+    def active(self):
+        """Whether writes must be applied: the index is built or being built"""
+        return self.state != 'empty'
+
+    def ensure_built(self):
+        if self.state == 'ready':
+            return
+        with self.lock:
+            if self.state == 'ready':
+                return
+            # Writes committed from now on wait for the lock and are applied after the build
+            self.state = 'building'
+            try:
+                for kind in SEARCH_SOURCES:
+                    rows = source_rows(kind).iterator(chunk_size=settings.SEARCH_INDEX_CHUNK_SIZE)
+                    for pk, project_id, *texts in rows:
+                        self.add(kind, pk, project_id, ' '.join(texts))
+            except Exception:
+                self.reset()
+                raise
+            self.state = 'ready'
+
+    def add(self, kind, pk, project_id, text):
+        """Index a document, replacing its previous version"""
+        with self.lock:
+            self.remove(kind, pk)
+            words = Counter(tokenize(text))
+            docno = self.next_docno
+            self.next_docno += 1
+            for word, count in words.items():
+                self.postings[word][project_id][docno] = count
+            self.doc_freq.update(words.keys())
+            length = sum(words.values())
+            self.docs[docno] = (kind, pk, project_id, length, tuple(words))
+            self.docnos[(kind, pk)] = docno
+            self.total_length += length
+
+    def remove(self, kind, pk):
+        with self.lock:
+            docno = self.docnos.pop((kind, pk), None)
+            if docno is None:
+                return
+            _, _, project_id, length, words = self.docs.pop(docno)
+            for word in words:
+                by_project = self.postings[word]
+                del by_project[project_id][docno]
+                if not by_project[project_id]:
+                    del by_project[project_id]
+                    if not by_project:
+                        del self.postings[word]
+                self.doc_freq[word] -= 1
+                if not self.doc_freq[word]:
+                    del self.doc_freq[word]
+            self.total_length -= length
+
+    def search(self, terms, project_ids, kinds, limit):
+        """Top ``limit`` (kind, pk, score) of the documents containing every term"""
+        self.ensure_built()
+        with self.lock:
+            terms = set(terms)
+            if not all(term in self.postings for term in terms):
+                return []
+            doc_count = len(self.docs)
+            average_length = self.total_length / doc_count
+            idfs = {
+                term: math.log(1 + (doc_count - self.doc_freq[term] + 0.5) / (self.doc_freq[term] + 0.5))
+                for term in terms
+            }
+            docs = self.docs
+            k1, b = self.K1, self.B
+
+            hits = []
+            for project_id in project_ids:
+                postings = [(self.postings[term].get(project_id), idfs[term]) for term in terms]
+                if not all(posting for posting, _ in postings):
+                    continue
+                # Walk the project's rarest word and look the others up
+                postings.sort(key=lambda item: len(item[0]))
+                for docno in postings[0][0]:
+                    kind, pk, _, length, _ = docs[docno]
+                    if kind not in kinds:
+                        continue
+                    norm = k1 * (1 - b + b * length / average_length)
+                    score = 0.0
+                    for posting, idf in postings:
+                        count = posting.get(docno)
+                        if count is None:
+                            break
+                        score += idf * count * (k1 + 1) / (count + norm)
+                    else:
+                        hits.append((kind, pk, score))
+            return heapq.nlargest(limit, hits, key=lambda hit: hit[2])
+
+
+search_index = InvertedIndex()
+
+
+def source_rows(kind):
+    """(pk, project_id, *text fields) of every document of a source"""
+    source = SEARCH_SOURCES[kind]
+    project = 'task_id__project_id' if source.via_task else 'project_id'
+    return source.model.objects.values_list('pk', project, *source.fields).order_by()
+
+
+def uses_search_index():
+    return connection.vendor not in ('postgresql', 'mysql')
+
+
+def index_instances(instances):
+    """
+    Bring saved Task, Comment and CalendarEvent objects into the in-process
+    index once the transaction commits. The signals call this for ordinary
+    saves; call it for objects written with bulk_create.
+    """
+    if not uses_search_index() or not search_index.active:
+        return
+    documents = [(SOURCE_KINDS[type(instance)], instance) for instance in instances]
+    transaction.on_commit(lambda: add_documents(documents))
+
+
+def add_documents(documents):
+    task_ids = {instance.task_id_id for kind, instance in documents if kind != 'task'}
+    projects = dict(Task.objects.filter(task_id__in=task_ids).values_list('task_id', 'project_id')) if task_ids else {}
+    for kind, instance in documents:
+        source = SEARCH_SOURCES[kind]
+        project_id = projects.get(instance.task_id_id) if source.via_task else instance.project_id_id
+        text = ' '.join(getattr(instance, name) or '' for name in source.fields)
+        search_index.add(kind, instance.pk, project_id, text)
+
+
+def index_saved(instance, update_fields=None):
+    """Re-index a saved row, unless the save left its searched fields alone"""
+    fields = SEARCH_SOURCES[SOURCE_KINDS[type(instance)]].fields
+    if update_fields and not set(fields).intersection(update_fields):
+        return
+    index_instances([instance])
+
+
+def index_deleted(instance):
+    """Drop a deleted row from the index once the transaction commits"""
+    if uses_search_index() and search_index.active:
+        kind, pk = SOURCE_KINDS[type(instance)], instance.pk
+        transaction.on_commit(lambda: search_index.remove(kind, pk))
+
+
+# ========== HITS ==========
+
+def load_hits(hits, terms):
+    """Fetch the rows of ranked (kind, pk, score) hits, one query per kind"""
+    ids = defaultdict(list)
+    for kind, pk, _ in hits:
+        ids[kind].append(pk)
+
+    rows = {}
+    if ids['task']:
+        for pk, task_id, project_id, title, description in Task.objects.filter(pk__in=ids['task']).values_list(
+            'pk', 'task_id', 'project_id', 'title', 'description'
+        ):
+            rows[('task', pk)] = (task_id, project_id, title, description)
+    if ids['comment']:
+        for pk, task_id, project_id, title, content in Comment.objects.filter(pk__in=ids['comment']).values_list(
+            'pk', 'task_id', 'task_id__project_id', 'task_id__title', 'content'
+        ):
+            rows[('comment', pk)] = (task_id, project_id, title, content)
+    if ids['event']:
+        for pk, task_id, project_id, title in CalendarEvent.objects.filter(pk__in=ids['event']).values_list(
+            'pk', 'task_id', 'task_id__project_id', 'title'
+        ):
+            rows[('event', pk)] = (task_id, project_id, title, '')
+
+    pattern = term_pattern(terms)
+    results = []
+    for kind, pk, score in hits:
+        # Deleted since the index was read
+        if (kind, pk) not in rows:
+            continue
+        task_id, project_id, title, body = rows[(kind, pk)]
+        results.append({
+            'kind': kind,
+            'id': pk,
+            'task_id': task_id,
+            'project_id': project_id,
+            'title': highlight(title, pattern),
+            'snippet': highlight(snippet(body, pattern), pattern),
+            'score': round(float(score), 4),
+        })
+    return results
+
+
+def term_pattern(terms):
+    # Prefixes too, so stemmed database matches ("running" for "run") are marked
+    alternatives = '|'.join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True))
+    return re.compile(rf'\b(?:{alternatives})\w*', re.IGNORECASE)
+
+
+def snippet(text, pattern):
+    """Up to SEARCH_SNIPPET_LENGTH characters of ``text`` around its first match"""
+    length = settings.SEARCH_SNIPPET_LENGTH
+    if len(text) <= length:
+        return text
+    match = pattern.search(text)
+    start = max(0, match.start() - length // 3) if match else 0
+    end = start + length
+    return ('…' if start else '') + text[start:end] + ('…' if end < len(text) else '')
+
+
+def highlight(text, pattern):
+    """HTML-escape ``text`` and wrap every match in <mark>"""
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(f'<mark>{escape(match.group())}</mark>')
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
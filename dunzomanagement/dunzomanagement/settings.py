@@ -45,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'dunzomanagement.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +59,7 @@ ROOT_URLCONF = 'dunzomanagement.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'dunzomanagement.instrumentation.TimedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],  # templates
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,9 +87,83 @@ DATABASES = {
         'HOST': '127.0.0.1',
         'PORT': '3306',
         'OPTIONS': {'init_command': "SET SQL_MODE='STRICT_TRANS_TABLES'"},
+        # Seconds to keep a connection open between requests (0 = close after
+        # each one, Django's default). ASGI deployments should raise it, or
+        # the async database pool threads reconnect on every call; under
+        # WSGI every worker thread would hold its own idle connection.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Async views run their database work on a pool of this many threads
+# (dunzomanagement/asyncdb.py), each holding one connection. Keep it below
+# the database's connection limit divided by the number of ASGI workers.
+
+ASYNC_DB_MAX_WORKERS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use a shared Redis cache when REDIS_URL is set so every worker sees the same
+# entries and invalidations; fall back to a per-process cache for development.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a cached project/member lookup may live (invalidation is signal-driven)
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a cached CalendarAPI window may live (invalidation is version-driven)
+CALENDAR_CACHE_TIMEOUT = 15 * 60
+
+# Seconds a cached user dashboard may live (invalidation is version-driven),
+# how many days ahead count as an upcoming deadline, and items per widget list
+DASHBOARD_CACHE_TIMEOUT = 10 * 60
+DASHBOARD_DEADLINE_DAYS = 7
+DASHBOARD_LIST_SIZE = 5
+
+# Meeting conflict detection
+# Event types that count as double-booking, and how far back busy time is loaded
+
+CONFLICT_EVENT_TYPES = ('Meeting', 'Event')
+
+BUSY_LOOKBACK_DAYS = 1
+
+# Free/busy lookups for the meeting form
+
+FREEBUSY_SLOT_MINUTES = 15
+
+FREEBUSY_WORKDAY_START = 9
+
+FREEBUSY_WORKDAY_END = 17
+
+FREEBUSY_MAX_DAYS = 62
+
+FREEBUSY_MAX_USERS = 50
+
+FREEBUSY_MAX_SUGGESTIONS = 20
+
+# iCalendar subscription feed
+# Window of events in a full feed, and how long a sync token stays usable (seconds)
+
+CALENDAR_FEED_PAST_DAYS = 90
+
+CALENDAR_FEED_FUTURE_DAYS = 365
+
+CALENDAR_SYNC_TOKEN_MAX_AGE = 30 * 24 * 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -130,3 +205,151 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Task list pagination
+# Page size for the keyset-paginated task lists (overridable with ?page_size=)
+
+TASK_PAGE_SIZE = 50
+
+TASK_MAX_PAGE_SIZE = 200
+
+# Largest number of items accepted by the bulk task endpoints
+
+TASK_BULK_MAX_ITEMS = 500
+
+# Task import: rows written per transaction, and how many row errors are
+# kept for the report (the rest are only counted)
+
+TASK_IMPORT_BATCH_SIZE = 1000
+TASK_IMPORT_MAX_ERRORS = 1000
+
+# Search: results per request (default and cap), words used from a query,
+# characters of text shown around the first match, and rows read per query
+# while building the in-process index (databases without full-text search)
+
+SEARCH_RESULT_LIMIT = 20
+SEARCH_MAX_RESULT_LIMIT = 100
+SEARCH_MAX_TERMS = 10
+SEARCH_SNIPPET_LENGTH = 160
+SEARCH_INDEX_CHUNK_SIZE = 2000
+
+
+# Request instrumentation
+# Requests issuing more queries than their budget, or taking longer than
+# their latency budget (milliseconds), are logged as warnings.
+# QUERY_BUDGETS and LATENCY_BUDGETS override the defaults per URL name,
+# e.g. 'task_app:get_details'. LATENCY_BUDGET = None leaves other views unchecked.
+
+QUERY_BUDGET = 30
+
+QUERY_BUDGETS = {
+    'task_app:get_details': 10,
+    'task_app:manage_users_sp': 10,
+    'calendarevent_app:event_details': 10,
+    'project_app:project_board': 5,
+    'search': 10,
+}
+
+LATENCY_BUDGET = None
+
+LATENCY_BUDGETS = {
+    'project_app:project_board': 500,
+    'search': 100,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'dunzomanagement.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
+# Streaming exports
+# Rows read from the database per query, encoded lines per response chunk,
+# and (under ASGI) response chunks the export thread may read ahead
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_LINES_PER_CHUNK = 200
+
+EXPORT_BUFFER_CHUNKS = 8
+
+
+# Live notifications (Server-Sent Events)
+# The in-process broker only reaches streams held by the same process; with
+# more than one worker, set REDIS_URL so every worker shares Redis pub/sub.
+
+if os.environ.get('REDIS_URL'):
+    NOTIFICATION_BROKER = 'user_app.pubsub.RedisBroker'
+    NOTIFICATION_BROKER_URL = os.environ['REDIS_URL']
+else:
+    NOTIFICATION_BROKER = 'user_app.pubsub.InProcessBroker'
+
+# Seconds between keep-alive comments on an idle stream
+NOTIFICATION_STREAM_HEARTBEAT = 15
+
+# Messages buffered per stream before new ones are dropped
+NOTIFICATION_STREAM_QUEUE_SIZE = 100
+
+# Missed notifications replayed after a reconnect (Last-Event-ID)
+NOTIFICATION_STREAM_REPLAY_LIMIT = 50
+
+# The stream is only served under ASGI; under WSGI the pages poll the inbox
+# every this many seconds instead
+NOTIFICATION_POLL_INTERVAL = 30
+
+# Notification delivery runs in a background writer: jobs are written once
+# this many are queued, or this many seconds after the first one
+
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_FLUSH_INTERVAL = 0.2
+
+# Notification inbox page size (default and maximum), and how many
+# notifications "mark all read" updates per transaction
+
+NOTIFICATION_PAGE_SIZE = 20
+NOTIFICATION_MAX_PAGE_SIZE = 100
+NOTIFICATION_MARK_READ_CHUNK = 1000
+
+# Read notifications older than this many days are moved to the archive
+# table by the archive_notifications command
+
+NOTIFICATION_ARCHIVE_AFTER_DAYS = 90
+
+
+# Timeline entries are written by a background writer: a batch is inserted
+# once this many are queued, or this many seconds after the first one
+
+TIMELINE_BATCH_SIZE = 500
+TIMELINE_FLUSH_INTERVAL = 0.5
+
+# Directory where batches that could not be written are saved until the
+# database is back (None drops them, after logging the error)
+
+TIMELINE_SPILL_DIR = os.environ.get('TIMELINE_SPILL_DIR') or None
+
+# Project timeline feed page size (default and maximum)
+
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_MAX_PAGE_SIZE = 200
+
+# Days shown by the project activity chart (default and maximum)
+
+TIMELINE_ACTIVITY_DAYS = 30
+TIMELINE_ACTIVITY_MAX_DAYS = 365
+
+# Kanban card ranks: a column is rebalanced in the background once a move
+# produces a rank longer than this many characters
+
+KANBAN_RANK_REBALANCE_LENGTH = 12
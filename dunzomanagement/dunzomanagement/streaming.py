@@ -0,0 +1,197 @@
+"""
+Helpers for streaming large exports.
+
+Rows are read from the database in fixed-size chunks and encoded as they
+arrive, so memory use does not depend on the size of the export and the
+first bytes reach the client before the whole result has been read.
+
+Under ASGI, Django reads a plain iterator into a list before sending any
+of it. streaming_export() therefore hands ASGI requests an async iterator
+fed by a thread of its own (iterate_in_thread), which stays a few chunks
+ahead of the client; WSGI requests get the plain iterator.
+"""
+import asyncio
+import contextvars
+import csv
+import json
+import queue
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections
+from django.http import StreamingHttpResponse
+
+from .asyncdb import is_asgi_request
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose write() just returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def iterate_queryset(queryset, pk_field, chunk_size=None):
+    """
+    Yield values_list() rows chunk by chunk, paging on the primary key.
+
+    Keyset paging works the same on every backend, including MySQL, where
+    QuerySet.iterator() cannot stream. ``pk_field`` must be the first
+    field of the values_list().
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    last_pk = None
+    while True:
+        chunk = queryset.order_by(pk_field)
+        if last_pk is not None:
+            chunk = chunk.filter(**{f'{pk_field}__gt': last_pk})
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        last_pk = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+def iterate_cursor(sql, params, chunk_size=None, using='default'):
+    """
+    Yield the rows of a raw query as dicts, through a chunked cursor.
+
+    On PostgreSQL this is a server-side cursor, so rows are fetched from
+    the server in batches of ``chunk_size`` rather than all at once. On
+    MySQL, where chunked_cursor() still buffers the whole result on the
+    client, an unbuffered SSCursor is opened on the driver connection.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    connection = connections[using]
+    if connection.vendor == 'mysql':
+        from MySQLdb.cursors import SSCursor
+
+        connection.ensure_connection()
+        cursor = connection.connection.cursor(SSCursor)
+    else:
+        cursor = connection.chunked_cursor()
+    try:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            for row in rows:
+                yield dict(zip(columns, row))
+    finally:
+        cursor.close()
+
+
+class _Failed:
+    def __init__(self, error):
+        self.error = error
+
+
+_DONE = object()
+
+
+async def iterate_in_thread(iterable, buffer_size=None):
+    """
+    Async iterator over a blocking iterable, run on a thread of its own.
+
+    The whole iteration happens on that one thread, so a cursor opened by
+    the iterable stays with its connection; the thread waits once it is
+    ``buffer_size`` items ahead and stops when the client goes away.
+    """
+    items = queue.Queue(maxsize=buffer_size or settings.EXPORT_BUFFER_CHUNKS)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        close_old_connections()
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except Exception as error:
+            put(_Failed(error))
+        finally:
+            connections.close_all()
+
+    def get():
+        try:
+            return items.get(timeout=1)
+        except queue.Empty:
+            return None
+
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(produce,), name='export', daemon=True).start()
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            item = await loop.run_in_executor(None, get)
+            if item is None:
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+
+
+def _batched(lines, size):
+    """Join encoded lines into larger chunks to keep per-write overhead low"""
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def encode_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_jsonl(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def streaming_export(request, filename, fields, rows, export_format='csv'):
+    """
+    Build a StreamingHttpResponse that writes ``rows`` as CSV or JSON Lines.
+
+    ``rows`` must be lazy (a generator): under ASGI it is consumed on the
+    export thread, not the request's.
+    """
+    encoder = encode_jsonl if export_format == 'jsonl' else encode_csv
+    content = _batched(encoder(fields, rows), settings.EXPORT_LINES_PER_CHUNK)
+    if is_asgi_request(request):
+        content = iterate_in_thread(content)
+    response = StreamingHttpResponse(
+        content,
+        content_type=EXPORT_FORMATS.get(export_format, EXPORT_FORMATS['csv']),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
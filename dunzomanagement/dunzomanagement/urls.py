@@ -22,6 +22,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.index_view, name='index'),
     path('login/', views.login_view, name='login'),
+    path('search/', views.search_view, name='search'),
 
     path('user/', include('user_app.urls')),
     path('project/', include('project_app.urls')),
@@ -1,7 +1,41 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from project_app.models import Project
+from .search import SEARCH_SOURCES, search, tokenize
 
 def index_view(request):
     return render(request, 'index.html')
 
 def login_view(request):
     return render(request, 'login.html')
+
+
+def get_search_limit(request):
+    """Read ?limit=, falling back to SEARCH_RESULT_LIMIT and capped at SEARCH_MAX_RESULT_LIMIT"""
+    try:
+        limit = int(request.GET.get('limit', settings.SEARCH_RESULT_LIMIT))
+    except ValueError:
+        limit = settings.SEARCH_RESULT_LIMIT
+    return max(1, min(limit, settings.SEARCH_MAX_RESULT_LIMIT))
+
+
+@login_required
+@require_http_methods(["GET"])
+def search_view(request):
+    """Ranked, highlighted hits in the caller's projects (?q=, ?kind=task,comment,event, ?limit=)"""
+    terms = tokenize(request.GET.get('q', ''))[:settings.SEARCH_MAX_TERMS]
+    if not terms:
+        return JsonResponse({'success': False, 'message': 'Enter words to search for'}, status=400)
+
+    kinds = [kind for kind in request.GET.get('kind', '').split(',') if kind]
+    unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+    if unknown:
+        return JsonResponse({'success': False, 'message': f'Unknown kind: {", ".join(unknown)}'}, status=400)
+
+    project_ids = Project.objects.filter(user_id=request.user.pk).values_list('project_id', flat=True)
+    results = search(terms, project_ids, kinds, get_search_limit(request))
+    return JsonResponse({'success': True, 'query': ' '.join(terms), 'results': results})
@@ -0,0 +1,47 @@
+"""
+Cache for project membership lookups.
+
+get_user_projects() and get_project_members() are read on every calendar
+form render and AJAX member dropdown. Their results are cached here and
+dropped by the signal handlers in project_app.signals whenever membership,
+a project or a member's profile changes, once the change commits.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+USER_PROJECTS_KEY = 'membership:user-projects:{}'
+PROJECT_MEMBERS_KEY = 'membership:project-members:{}'
+
+
+def cached_lookup(key, loader):
+    """Return the cached value for key, calling loader() and caching it on a miss"""
+    value = cache.get(key)
+    if value is None:
+        value = loader()
+        cache.set(key, value, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    return value
+
+
+def _delete_on_commit(keys):
+    keys = list(keys)
+    if not keys:
+        return
+    # After commit, so a lookup made before then cannot cache the old rows past the delete
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_user_projects(user_ids):
+    """Forget the cached project lists of the given users once the transaction commits"""
+    _delete_on_commit(USER_PROJECTS_KEY.format(user_id) for user_id in set(user_ids))
+
+
+def invalidate_project_members(project_ids):
+    """Forget the cached member lists of the given projects once the transaction commits"""
+    _delete_on_commit(PROJECT_MEMBERS_KEY.format(project_id) for project_id in set(project_ids))
+
+
+def invalidate_membership(project_ids, user_ids):
+    """Forget both sides of a membership change"""
+    invalidate_project_members(project_ids)
+    invalidate_user_projects(user_ids)
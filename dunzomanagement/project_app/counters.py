@@ -0,0 +1,101 @@
+"""
+Per-project task status counters.
+
+ProjectStatusCount holds the number of tasks per (project, status). Every
+code path that creates, deletes or changes the status of tasks in bulk or
+through a stored function adjusts it in the same transaction:
+update_task_status, create_task and delete_task in task_app.views, and
+bulk_update_status and the importer in task_app.bulk, and the
+backfill_task_status command. Tasks written any
+other way (the admin, the shell) are picked up by the
+repair_status_counts command.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from task_app.models import Task
+from .models import ProjectStatusCount
+
+DONE_STATUS = 'Done'
+
+
+def adjust_status_counts(deltas):
+    """Apply a {(project_id, status): change} mapping (call inside the writing transaction)"""
+    deltas = {key: change for key, change in deltas.items() if change}
+    if not deltas:
+        return
+
+    # Make sure every row exists, then increment: rows created concurrently
+    # are incremented, never overwritten
+    ProjectStatusCount.objects.bulk_create([
+        ProjectStatusCount(project_id=project_id, status=status)
+        for project_id, status in deltas
+    ], ignore_conflicts=True)
+
+    by_amount = {}
+    for key, change in deltas.items():
+        by_amount.setdefault(change, []).append(key)
+    for change, keys in by_amount.items():
+        condition = Q()
+        for project_id, status in keys:
+            condition |= Q(project_id=project_id, status=status)
+        ProjectStatusCount.objects.filter(condition).update(count=F('count') + change)
+
+
+def count_status_change(project_id, old_status, new_status):
+    if old_status != new_status:
+        adjust_status_counts({(project_id, old_status): -1, (project_id, new_status): 1})
+
+
+def get_status_counts(project_ids):
+    """{project_id: {status: count}} for the given projects, from one query"""
+    counts = {project_id: {} for project_id in project_ids}
+    for project_id, status, count in ProjectStatusCount.objects.filter(
+        project_id__in=project_ids, count__gt=0
+    ).values_list('project_id', 'status', 'count'):
+        counts[project_id][status] = count
+    return counts
+
+
+def progress(status_counts):
+    """(total tasks, done tasks, percent done) of one project's status counts"""
+    total = sum(status_counts.values())
+    done = status_counts.get(DONE_STATUS, 0)
+    return total, done, round(100 * done / total) if total else 0
+
+
+def repair_project_counts(project_ids, fix=True):
+    """
+    Recount the given projects from their tasks and compare with the counters.
+
+    Returns a list of (project_id, status, stored, actual) mismatches; with
+    ``fix`` they are corrected in the same transaction. The counter rows are
+    locked while the tasks are counted, so counted writers wait rather than
+    racing the repair.
+    """
+    with transaction.atomic():
+        stored = {
+            (project_id, status): count
+            for project_id, status, count in ProjectStatusCount.objects.select_for_update().filter(
+                project_id__in=project_ids
+            ).values_list('project_id', 'status', 'count')
+        }
+        actual = Counter({
+            (row['project_id'], row['status']): row['total']
+            for row in Task.objects.filter(project_id__in=project_ids)
+            .values('project_id', 'status').annotate(total=Count('task_id')).order_by()
+        })
+
+        mismatches = [
+            (project_id, status, stored.get((project_id, status), 0), actual[(project_id, status)])
+            for project_id, status in sorted(stored.keys() | actual.keys())
+            if stored.get((project_id, status), 0) != actual[(project_id, status)]
+        ]
+        if fix and mismatches:
+            adjust_status_counts({
+                (project_id, status): actual_count - stored_count
+                for project_id, status, stored_count, actual_count in mismatches
+            })
+    return mismatches
@@ -0,0 +1,193 @@
+"""
+Kanban card moves.
+
+Cards are KanbanColumn rows ordered by their rank within (project, column
+name). Moving a card computes a rank between its new neighbours and
+rewrites that one row, however many cards the column holds; a move to
+another column also sets the task's status to match. The cards on either
+side of the gap are locked first, so concurrent drops into the same gap
+take their ranks one after the other.
+
+Keys grow a little with every move into the same gap. Once a move makes
+a key longer than KANBAN_RANK_REBALANCE_LENGTH, the column is queued for
+the rebalance writer, which gives all its cards fresh, evenly spaced
+ranks in the background.
+"""
+from datetime import date
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from dunzomanagement.buffering import BatchWriter
+from task_app.models import Assignment, Task
+from timeline_app.writer import log_entry
+from user_app.dashboard import bump_dashboards_for_tasks
+from .counters import count_status_change
+from .models import KanbanColumn, Project
+from .ranks import rank_between, spread_ranks
+
+# Kanban column name -> task status
+COLUMN_STATUS = {
+    'To do': 'To Do',
+    'In Progress': 'In Progress',
+    'Done': 'Done',
+}
+
+# Column for a task that has no card yet, by status
+STATUS_COLUMN = {
+    'To Do': 'To do',
+    'In Progress': 'In Progress',
+    'Blocked': 'In Progress',
+    'Done': 'Done',
+}
+
+BOARD_CARD_FIELDS = ('id', 'title', 'status', 'priority', 'due_date', 'assignees')
+
+
+def move_card(project_id, task_id, column, after_task_id, user_id):
+    """
+    Put a task's card in ``column`` right after the card of ``after_task_id``
+    (None puts it at the top). Returns (success, message, rank).
+    """
+    if not isinstance(column, str) or column not in COLUMN_STATUS:
+        return False, 'Unknown column', None
+
+    with transaction.atomic():
+        # Locking the task serializes concurrent moves of the same card
+        task = Task.objects.select_for_update().filter(
+            task_id=task_id, project_id=project_id
+        ).values('status', 'title').first()
+        if task is None:
+            return False, 'Task not found in this project', None
+
+        gap = lock_gap(project_id, task_id, column, after_task_id)
+        if gap is None:
+            return False, 'The card to move after is not in that column', None
+        rank = rank_between(*gap)
+
+        # The only write a reorder needs
+        if not KanbanColumn.objects.filter(project_id=project_id, task_id=task_id).update(name=column, rank=rank):
+            KanbanColumn.objects.create(project_id_id=project_id, task_id_id=task_id, name=column, rank=rank)
+
+        new_status = COLUMN_STATUS[column]
+        if task['status'] != new_status:
+            Task.objects.filter(task_id=task_id).update(status=new_status, updated_at=timezone.now())
+            count_status_change(project_id, task['status'], new_status)
+            log_entry(project_id, user_id, 'task_status_changed',
+                      {'task_id': task_id, 'from': task['status'], 'to': new_status})
+            bump_dashboards_for_tasks([task_id])
+
+        if len(rank) > settings.KANBAN_RANK_REBALANCE_LENGTH:
+            transaction.on_commit(lambda: rebalance_writer.put((project_id, column)))
+
+    return True, 'Card moved', rank
+
+
+def lock_gap(project_id, task_id, column, after_task_id):
+    """
+    Lock the cards around the gap after ``after_task_id`` (the top of the
+    column for None) and return their ranks as (before, after), or None when
+    that card is not in the column.
+
+    Every drop into a gap locks the card above it, or the first card for
+    the top (the project while the column is empty), so drops into the same
+    gap wait for each other. Neighbours are read again with each lock held,
+    as the gap may have changed while waiting.
+    """
+    cards = KanbanColumn.objects.select_for_update().filter(
+        project_id=project_id, name=column
+    ).exclude(task_id=task_id)
+
+    if after_task_id is not None:
+        before = cards.filter(task_id=after_task_id).values_list('rank', flat=True).first()
+        if before is None:
+            return None
+        after = cards.filter(rank__gt=before).order_by('rank').values_list('rank', flat=True).first()
+        return before, after
+
+    first = cards.order_by('rank').values_list('column_id', 'rank').first()
+    while True:
+        if first is None:
+            list(Project.objects.select_for_update().filter(project_id=project_id).values_list('project_id'))
+        current = cards.order_by('rank').values_list('column_id', 'rank').first()
+        if current == first:
+            return None, first[1] if first else None
+        first = current
+
+
+def load_board(project_id):
+    """
+    Columns, cards and assignees of a project's board, in two queries.
+
+    Cards are [id, title, status, priority, due_date, assignee ids] lists
+    (BOARD_CARD_FIELDS) in board order; assignees are sent once each in
+    ``users`` as [name, initials]. Tasks without a card are listed after
+    the ranked cards of the column matching their status.
+    """
+    columns = {name: [] for name in COLUMN_STATUS}
+    # LEFT JOIN to the card rows: tasks without one come back with NULLs
+    rows = Task.objects.filter(project_id=project_id).values_list(
+        'task_id', 'title', 'status', 'priority', 'due_date', 'kanban_columns__name', 'kanban_columns__rank'
+    )
+    placed = []
+    for task_id, title, status, priority, due_date, column, rank in rows:
+        card = [task_id, title, status, priority, due_date, []]
+        if column in columns:
+            placed.append(((0, rank, date.max, task_id), column, task_id, card))
+        else:
+            placed.append(((1, '', due_date or date.max, task_id), STATUS_COLUMN.get(status, 'To do'), task_id, card))
+    placed.sort(key=itemgetter(0))
+
+    cards = {}
+    for _, column, task_id, card in placed:
+        if task_id not in cards:
+            cards[task_id] = card
+            columns[column].append(card)
+
+    users = {}
+    for task_id, user_id, name in Assignment.objects.filter(task_id__project_id=project_id).values_list(
+        'task_id', 'user_id', 'user_id__name'
+    ).order_by('assignment_id'):
+        cards[task_id][5].append(user_id)
+        if user_id not in users:
+            users[user_id] = [name, ''.join(part[0] for part in name.split()[:2]).upper()]
+
+    return {
+        'card_fields': BOARD_CARD_FIELDS,
+        'columns': [{'name': name, 'cards': column_cards} for name, column_cards in columns.items()],
+        'users': users,
+    }
+
+
+def rebalance_column(project_id, column):
+    """Give every card of a column evenly spaced ranks, keeping their order"""
+    with transaction.atomic():
+        cards = (
+            KanbanColumn.objects.select_for_update()
+            .filter(project_id=project_id, name=column)
+            .order_by('rank', 'column_id').only('column_id', 'rank')
+        )
+        # Waits for moves in progress; read again once locked, so cards
+        # they dropped into the column are ranked too
+        list(cards.values_list('column_id'))
+        cards = list(cards)
+        for card, rank in zip(cards, spread_ranks(len(cards))):
+            card.rank = rank
+        KanbanColumn.objects.bulk_update(cards, ['rank'], batch_size=500)
+    return len(cards)
+
+
+def rebalance_columns(columns):
+    # A busy column is usually queued many times per batch
+    for project_id, column in set(columns):
+        rebalance_column(project_id, column)
+
+
+rebalance_writer = BatchWriter(
+    'kanban-rebalance',
+    rebalance_columns,
+    batch_size=100,
+    flush_interval=1.0,
+)
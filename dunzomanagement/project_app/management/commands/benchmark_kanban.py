@@ -0,0 +1,133 @@
+import datetime
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from project_app.kanban import COLUMN_STATUS, move_card, rebalance_column
+from project_app.models import KanbanColumn, Project
+from project_app.ranks import spread_ranks
+from task_app.models import Task
+from user_app.models import User
+
+KANBAN_TABLE = KanbanColumn._meta.db_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a throwaway board of --cards cards, make --moves random card "
+        "moves and report the rows each move wrote to the Kanban table, next "
+        "to the rows an integer order_index would have renumbered. Everything "
+        "runs in one transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=5000,
+                            help='Cards on the board (default 5000)')
+        parser.add_argument('--moves', type=int, default=1000,
+                            help='Random moves to make (default 1000)')
+        parser.add_argument('--hotspot', type=float, default=0.5,
+                            help='Share of moves that drop a card at the top of a column, '
+                                 'the worst case for key length (default 0.5)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            project, user = self.build_board(options['cards'])
+            self.run_moves(project, user, options, rng)
+            self.check_order(project)
+            transaction.set_rollback(True)
+
+    def build_board(self, count):
+        user = User.objects.create(name='Kanban benchmark', email=f'kanban-benchmark-{time.time_ns()}@example.com',
+                                   password_hash='!', role='Member')
+        project = Project.objects.create(project_name='Kanban benchmark', start_date=datetime.date.today())
+        project.user_id.add(user)
+        tasks = Task.objects.bulk_create([
+            Task(project_id=project, title=f'Card {i}', description='', status='To Do') for i in range(count)
+        ])
+        # Recover the ids where bulk_create does not return them
+        task_ids = list(Task.objects.filter(project_id=project).order_by('task_id').values_list('task_id', flat=True))
+        columns = list(COLUMN_STATUS)
+        per_column = {column: task_ids[i::len(columns)] for i, column in enumerate(columns)}
+        KanbanColumn.objects.bulk_create([
+            KanbanColumn(project_id=project, task_id_id=task_id, name=column, rank=rank)
+            for column, ids in per_column.items()
+            for task_id, rank in zip(ids, spread_ranks(len(ids)))
+        ], batch_size=1000)
+        Task.objects.filter(task_id__in=per_column['In Progress']).update(status='In Progress')
+        Task.objects.filter(task_id__in=per_column['Done']).update(status='Done')
+        self.stdout.write(f'Board: {len(tasks)} cards in {len(columns)} columns')
+        return project, user
+
+    def run_moves(self, project, user, options, rng):
+        writes = []
+        renumbered = []
+        timings = []
+        longest = 0
+        rebalances = 0
+
+        def count_writes(execute, sql, params, many, context):
+            if KANBAN_TABLE in sql and sql.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+                writes[-1] += 1
+            return execute(sql, params, many, context)
+
+        # Board order, kept in step with the moves instead of re-read each time
+        order = {
+            column: list(
+                KanbanColumn.objects.filter(project_id=project, name=column)
+                .order_by('rank', 'column_id').values_list('task_id', flat=True)
+            )
+            for column in COLUMN_STATUS
+        }
+        for _ in range(options['moves']):
+            source = rng.choice([column for column, ids in order.items() if ids])
+            task_id = rng.choice(order[source])
+            target = rng.choice(list(COLUMN_STATUS))
+            siblings = [sibling for sibling in order[target] if sibling != task_id]
+            position = 0 if rng.random() < options['hotspot'] else rng.randint(0, len(siblings))
+            after_task_id = siblings[position - 1] if position else None
+
+            writes.append(0)
+            with connection.execute_wrapper(count_writes):
+                start = time.perf_counter()
+                success, message, rank = move_card(project.project_id, task_id, target, after_task_id, user.id)
+                timings.append(time.perf_counter() - start)
+            if not success:
+                self.stderr.write(f'Move failed: {message}')
+                writes.pop()
+                continue
+
+            order[source].remove(task_id)
+            order[target].insert(position, task_id)
+            # An integer order_index shifts every card below the drop point
+            renumbered.append(len(siblings) - position + 1)
+            longest = max(longest, len(rank))
+            if len(rank) > settings.KANBAN_RANK_REBALANCE_LENGTH:
+                # The rebalance writer only runs after commit; do it inline here
+                rebalance_column(project.project_id, target)
+                rebalances += 1
+
+        self.stdout.write(
+            f'Rank moves: {statistics.mean(writes):.2f} rows written per move (max {max(writes)}), '
+            f'{statistics.mean(timings) * 1000:.2f} ms per move, longest key {longest}, '
+            f'{rebalances} column rebalances'
+        )
+        self.stdout.write(
+            f'Integer order_index: {statistics.mean(renumbered):.0f} rows per move '
+            f'(max {max(renumbered)})'
+        )
+
+    def check_order(self, project):
+        """Every column must still read back in a strict rank order"""
+        for column in COLUMN_STATUS:
+            ranks = list(
+                KanbanColumn.objects.filter(project_id=project, name=column)
+                .order_by('rank', 'column_id').values_list('rank', flat=True)
+            )
+            if any(low >= high for low, high in zip(ranks, ranks[1:])):
+                self.stderr.write(f'Column "{column}" has duplicate ranks')
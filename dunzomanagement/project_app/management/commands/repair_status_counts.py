@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from project_app.counters import repair_project_counts
+from project_app.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every project's tasks per status and correct ProjectStatusCount "
+        "where it drifted. Projects are processed in id order, one short "
+        "transaction per batch. With --check, only report the differences."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of projects per transaction (default 100)')
+        parser.add_argument('--check', action='store_true',
+                            help='Report mismatches without fixing them')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fix = not options['check']
+        last_id = 0
+        checked = 0
+        mismatched = 0
+
+        while True:
+            project_ids = list(
+                Project.objects.filter(project_id__gt=last_id).order_by('project_id')
+                .values_list('project_id', flat=True)[:batch_size]
+            )
+            if not project_ids:
+                break
+
+            for project_id, status, stored, actual in repair_project_counts(project_ids, fix=fix):
+                mismatched += 1
+                self.stdout.write(f'Project {project_id} "{status}": counter {stored}, tasks {actual}')
+
+            checked += len(project_ids)
+            last_id = project_ids[-1]
+            self.stdout.write(f'Checked {checked} projects...')
+
+        verb = 'fixed' if fix else 'found'
+        self.stdout.write(self.style.SUCCESS(f'Done: {checked} projects checked, {mismatched} counters {verb}.'))
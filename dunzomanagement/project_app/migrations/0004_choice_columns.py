@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0003_kanbancolumn_project_id'),
+        ('task_app', '0007_task_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancolumn',
+            name='name',
+            field=models.CharField(choices=[('To do', 'To do'), ('In Progress', 'In Progress'), ('Done', 'Done')], default='To do', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='status',
+            field=models.CharField(choices=[('Active', 'Active'), ('Archived', 'Archived'), ('Complete', 'Complete')], db_index=True, default='Active', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='kanbancolumn',
+            index=models.Index(fields=['project_id', 'name', 'order_index'], name='kanban_project_name_idx'),
+        ),
+    ]
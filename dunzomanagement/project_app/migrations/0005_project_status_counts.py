@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_status_counts(apps, schema_editor):
+    """Start the counters from the tasks that already exist"""
+    Task = apps.get_model('task_app', 'Task')
+    ProjectStatusCount = apps.get_model('project_app', 'ProjectStatusCount')
+    rows = Task.objects.values('project_id', 'status').annotate(total=Count('task_id')).order_by()
+    ProjectStatusCount.objects.bulk_create([
+        ProjectStatusCount(project_id=row['project_id'], status=row['status'], count=row['total'])
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0004_choice_columns'),
+        ('task_app', '0008_choice_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_counts', to='project_app.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'status'), name='project_status_count_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_status_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+from project_app.ranks import spread_ranks
+
+
+def ranks_from_order_index(apps, schema_editor):
+    """Give every column's cards evenly spaced ranks in their current order"""
+    KanbanColumn = apps.get_model('project_app', 'KanbanColumn')
+    columns = KanbanColumn.objects.values_list('project_id_id', 'name').distinct().order_by()
+    for project_id, name in list(columns):
+        cards = list(
+            KanbanColumn.objects.filter(project_id_id=project_id, name=name)
+            .order_by('order_index', 'column_id').only('column_id')
+        )
+        for card, rank in zip(cards, spread_ranks(len(cards))):
+            card.rank = rank
+        KanbanColumn.objects.bulk_update(cards, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0005_project_status_counts'),
+        ('task_app', '0008_choice_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancolumn',
+            name='rank',
+            field=models.CharField(default='i', max_length=64),
+        ),
+        migrations.RunPython(ranks_from_order_index, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='kanbancolumn',
+            name='kanban_project_name_idx',
+        ),
+        migrations.RemoveField(
+            model_name='kanbancolumn',
+            name='order_index',
+        ),
+        migrations.AddIndex(
+            model_name='kanbancolumn',
+            index=models.Index(fields=['project_id', 'name', 'rank'], name='kanban_project_rank_idx'),
+        ),
+    ]
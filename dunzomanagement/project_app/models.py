@@ -7,11 +7,13 @@ class Project(models.Model):
     description = models.TextField(blank=True, null=True)
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True)
-    status = (
-        'Active',
-        'Archived',
-        'Complete'
-    )
+    STATUS_CHOICES = [
+        ('Active', 'Active'),
+        ('Archived', 'Archived'),
+        ('Complete', 'Complete'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Active', db_index=True)
     last_login = models.DateTimeField(blank=True, null=True)
 
     user_id = models.ManyToManyField(User, related_name="projects")
@@ -19,14 +21,36 @@ class Project(models.Model):
     #
 
 
+class ProjectStatusCount(models.Model):
+    """
+    Number of tasks per status in a project.
+
+    Written in the same transaction as the task writes it counts (see
+    project_app.counters), so progress bars read a handful of rows instead
+    of the project's tasks.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='status_counts')
+    status = models.CharField(max_length=20)
+    # Not unsigned: a drifted counter must never make a task write fail
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'status'], name='project_status_count_unique'),
+        ]
+
+
 class KanbanColumn(models.Model):
     column_id = models.AutoField(primary_key=True)
-    name = (
-        'To do',
-        'In Progress',
-        'Done'
-    )
-    order_index = models.PositiveIntegerField(default=0)
+    NAME_CHOICES = [
+        ('To do', 'To do'),
+        ('In Progress', 'In Progress'),
+        ('Done', 'Done'),
+    ]
+
+    name = models.CharField(max_length=20, choices=NAME_CHOICES, default='To do')
+    # Position of the card in its column (see project_app.ranks); a move rewrites only this row
+    rank = models.CharField(max_length=64, default='i')
 
     # Foreign key: one project has many kanban columns
     project_id = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="columns")
@@ -40,6 +64,11 @@ class KanbanColumn(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project_id', 'name', 'rank'], name='kanban_project_rank_idx'),
+        ]
+
     def __str__(self):
         return f"{self.project.project_name} - {self.name}"
 
@@ -0,0 +1,60 @@
+"""
+Sortable rank keys for ordering Kanban cards.
+
+A rank is a string of base-36 digits (0-9, a-z) read as a fraction: "i"
+is 0.5, "0i" is 0.0138... Keys compare the same way as strings in any
+collation (no letter case involved), so ORDER BY rank is the board order.
+There is always a key between two others, which lets a card move by
+rewriting its own rank and nothing else.
+
+Keys never end in "0", so the key between two neighbours is always found
+without renumbering; each move into the same gap makes the key about one
+digit longer per five moves, until the column is rebalanced with
+spread_ranks().
+"""
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+
+def rank_between(before=None, after=None):
+    """A key that sorts strictly after ``before`` and before ``after`` (None is an open end)"""
+    before = before or ''
+    if after is not None and before >= after:
+        raise ValueError(f'{before!r} must sort before {after!r}')
+    return _midpoint(before, after)
+
+
+def _midpoint(low, high):
+    if high is not None:
+        # Copy the common prefix, reading missing digits of low as 0
+        prefix = 0
+        while prefix < len(high) and (low[prefix] if prefix < len(low) else '0') == high[prefix]:
+            prefix += 1
+        if prefix:
+            return high[:prefix] + _midpoint(low[prefix:], high[prefix:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # Adjacent first digits: high's own first digit fits if high continues
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def spread_ranks(count):
+    """``count`` evenly spaced keys of equal length, leaving room for many moves in every gap"""
+    length = 1
+    while BASE ** length < (count + 1) * BASE:
+        length += 1
+    step = BASE ** length / (count + 1)
+    return [_to_key(int(step * (i + 1)), length) for i in range(count)]
+
+
+def _to_key(number, length):
+    digits = []
+    for _ in range(length):
+        number, digit = divmod(number, BASE)
+        digits.append(DIGITS[digit])
+    return ''.join(reversed(digits)).rstrip('0')
@@ -0,0 +1,47 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from user_app.models import User
+from .cache import invalidate_membership
+from .models import Project
+
+
+@receiver(m2m_changed, sender=Project.user_id.through)
+def membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached lookups for exactly the projects and users whose membership changed"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if action == 'pre_clear':
+        # pk_set is not provided for clear(), so read the members before they go
+        if reverse:
+            pk_set = set(instance.projects.values_list('project_id', flat=True))
+        else:
+            pk_set = set(instance.user_id.values_list('id', flat=True))
+
+    if reverse:
+        # instance is a User, pk_set holds project ids
+        invalidate_membership(pk_set or [], [instance.pk])
+    else:
+        # instance is a Project, pk_set holds user ids
+        invalidate_membership([instance.pk], pk_set or [])
+
+
+@receiver(post_save, sender=Project)
+@receiver(pre_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    """Project title or status changes alter every member's project list"""
+    if kwargs.get('created'):
+        return
+    member_ids = list(instance.user_id.values_list('id', flat=True))
+    invalidate_membership([instance.pk], member_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(pre_delete, sender=User)
+def member_changed(sender, instance, **kwargs):
+    """Name, email or role changes show up in every member list the user appears in"""
+    if kwargs.get('created'):
+        return
+    project_ids = list(instance.projects.values_list('project_id', flat=True))
+    invalidate_membership(project_ids, [instance.pk])
@@ -1,3 +1,192 @@
-from django.test import TestCase
+import datetime
+import json
+import random
 
-# Create your tests here.
+from unittest import mock
+
+from django.contrib.auth.models import User as AuthUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from task_app.models import Assignment, Task
+from user_app.models import User
+from .cache import PROJECT_MEMBERS_KEY, USER_PROJECTS_KEY, cached_lookup
+from .counters import adjust_status_counts, get_status_counts
+from .kanban import move_card
+from .models import KanbanColumn, Project
+from .ranks import rank_between, spread_ranks
+from .views import ProjectBoardAPI
+
+
+class RankTests(SimpleTestCase):
+    """A move must always find a key between its neighbours"""
+
+    def test_random_moves_keep_order(self):
+        rng = random.Random(0)
+        ranks = spread_ranks(20)
+        for _ in range(2000):
+            position = rng.randint(0, len(ranks))
+            before = ranks[position - 1] if position else None
+            after = ranks[position] if position < len(ranks) else None
+            ranks.insert(position, rank_between(before, after))
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), len(ranks))
+
+    def test_spread_ranks_are_sorted_and_distinct(self):
+        ranks = spread_ranks(5000)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), 5000)
+        self.assertFalse(any(rank.endswith('0') for rank in ranks))
+
+    def test_rejects_neighbours_out_of_order(self):
+        with self.assertRaises(ValueError):
+            rank_between('b', 'a')
+
+
+class BoardQueryCountTests(TestCase):
+    """The board payload must not issue one query per card or assignee"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.member = User.objects.create(name='Ada Lovelace', email='ada@example.com', password_hash='x', role='Member')
+        self.auth_user = AuthUser.objects.create_user(id=self.member.pk, username='ada', password='secret')
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.project.user_id.add(self.member)
+        self.top_rank = None
+
+    def add_cards(self, count):
+        # Each new card goes to the top of the column
+        for _ in range(count):
+            task = Task.objects.create(
+                project_id=self.project, title=f'Card {Task.objects.count()}', description='', status='In Progress'
+            )
+            self.top_rank = rank_between(None, self.top_rank)
+            KanbanColumn.objects.create(project_id=self.project, task_id=task, name='In Progress', rank=self.top_rank)
+            Assignment.objects.create(task_id=task, user_id=self.member, role='Contributor')
+
+    def get_board(self):
+        request = self.factory.get(f'/project/{self.project.project_id}/board/')
+        request.user = self.auth_user
+        response = ProjectBoardAPI.as_view()(request, project_id=self.project.project_id)
+        return json.loads(response.content)
+
+    def test_board_query_count_is_constant(self):
+        for count in (1, 10):
+            self.add_cards(count)
+            with self.assertNumQueries(3):
+                board = self.get_board()
+
+        columns = {column['name']: column['cards'] for column in board['columns']}
+        self.assertEqual(len(columns['In Progress']), 11)
+        # Ranked cards come in rank order, each assignee is sent once
+        self.assertEqual([card[1] for card in columns['In Progress']][:2], ['Card 10', 'Card 9'])
+        self.assertEqual(board['users'], {str(self.member.pk): ['Ada Lovelace', 'AL']})
+
+    def test_unplaced_tasks_follow_their_status(self):
+        Task.objects.create(project_id=self.project, title='Loose', description='', status='Done')
+        columns = {column['name']: column['cards'] for column in self.get_board()['columns']}
+        self.assertEqual([card[1] for card in columns['Done']], ['Loose'])
+
+
+class MoveCardTests(TestCase):
+    """A move rewrites the moved card only, and keeps status, counts and timeline in step"""
+
+    def setUp(self):
+        self.member = User.objects.create(name='Ada Lovelace', email='ada@example.com', password_hash='x', role='Member')
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.cards = {}
+        for title, rank in zip('ABC', spread_ranks(3)):
+            task = Task.objects.create(project_id=self.project, title=title, description='', status='To Do')
+            KanbanColumn.objects.create(project_id=self.project, task_id=task, name='To do', rank=rank)
+            self.cards[title] = task.task_id
+        adjust_status_counts({(self.project.project_id, 'To Do'): 3})
+
+    def ranks(self):
+        return dict(KanbanColumn.objects.filter(project_id=self.project).values_list('task_id', 'rank'))
+
+    def move(self, title, column, after=None):
+        after_task_id = self.cards[after] if after else None
+        with mock.patch('timeline_app.writer.timeline_writer.put') as put:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = move_card(self.project.project_id, self.cards[title], column, after_task_id, self.member.pk)
+        return result, [call.args[0] for call in put.call_args_list]
+
+    def test_reorder_writes_one_row(self):
+        before = self.ranks()
+        with CaptureQueriesContext(connection) as queries:
+            (success, _, rank), entries = self.move('C', 'To do', after='A')
+
+        self.assertTrue(success)
+        writes = [query['sql'] for query in queries if query['sql'].startswith(('UPDATE', 'INSERT'))]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('project_app_kanbancolumn', writes[0])
+        after = self.ranks()
+        self.assertEqual({task_id: after[task_id] for task_id in before if task_id != self.cards['C']},
+                         {task_id: before[task_id] for task_id in before if task_id != self.cards['C']})
+        self.assertTrue(after[self.cards['A']] < rank < after[self.cards['B']])
+        self.assertEqual(Task.objects.get(task_id=self.cards['C']).status, 'To Do')
+        self.assertEqual(entries, [])
+
+    def test_move_to_other_column_changes_status(self):
+        (success, _, _), entries = self.move('B', 'Done')
+
+        self.assertTrue(success)
+        self.assertEqual(Task.objects.get(task_id=self.cards['B']).status, 'Done')
+        self.assertEqual(get_status_counts([self.project.project_id])[self.project.project_id],
+                         {'To Do': 2, 'Done': 1})
+        self.assertEqual([(entry['action'], json.loads(entry['details'])) for entry in entries], [
+            ('task_status_changed', {'task_id': self.cards['B'], 'from': 'To Do', 'to': 'Done'}),
+        ])
+
+    def test_unknown_neighbour_is_rejected(self):
+        (success, _, _), _ = self.move('A', 'Done', after='C')
+        self.assertFalse(success)
+        self.assertEqual(Task.objects.get(task_id=self.cards['A']).status, 'To Do')
+
+    def test_malformed_column_is_a_bad_request(self):
+        self.project.user_id.add(self.member)
+        AuthUser.objects.create_user(id=self.member.pk, username='ada', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.member.pk))
+        url = reverse('project_app:move_card', kwargs={'project_id': self.project.project_id})
+
+        for column in (['Done'], {'name': 'Done'}, None, 'Backlog'):
+            response = self.client.post(url, json.dumps({'task_id': self.cards['A'], 'column': column}),
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.get(task_id=self.cards['A']).status, 'To Do')
+
+
+class MembershipCacheTests(TestCase):
+    """Cached membership lookups are dropped once the change commits"""
+
+    def setUp(self):
+        cache.clear()
+        self.member, self.other = [
+            User.objects.create(name=name, email=f'{name.lower()}@example.com', password_hash='x', role='Member')
+            for name in ('Ada', 'Alan')
+        ]
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.keys = [USER_PROJECTS_KEY.format(self.member.pk), USER_PROJECTS_KEY.format(self.other.pk),
+                     PROJECT_MEMBERS_KEY.format(self.project.pk)]
+        for key in self.keys:
+            cached_lookup(key, lambda: ['stale'])
+
+    def test_membership_change_invalidates_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.user_id.add(self.member)
+            self.assertEqual(len(cache.get_many(self.keys)), 3)
+
+        self.assertEqual(list(cache.get_many(self.keys)), [USER_PROJECTS_KEY.format(self.other.pk)])
+
+    def test_loader_is_called_once_until_invalidated(self):
+        loader = mock.Mock(return_value=['fresh'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.user_id.add(self.member)
+
+        key = PROJECT_MEMBERS_KEY.format(self.project.pk)
+        self.assertEqual(cached_lookup(key, loader), ['fresh'])
+        self.assertEqual(cached_lookup(key, loader), ['fresh'])
+        self.assertEqual(loader.call_count, 1)
@@ -5,4 +5,6 @@ app_name = 'project_app'
 
 urlpatterns = [
     path('projectpage/', views.projectpage, name='projectpage'),
+    path('<int:project_id>/board/', views.ProjectBoardAPI.as_view(), name='project_board'),
+    path('<int:project_id>/board/move/', views.MoveCardAPI.as_view(), name='move_card'),
 ]
@@ -1,7 +1,63 @@
+import json
+
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import require_http_methods
+
+from .kanban import load_board, move_card
+from .models import Project
 
 # Create your views here.
 def projectpage(request):
     return render(request, 'project_app/projectpage.html')
 
 
+class ProjectBoardAPI(View):
+
+    @method_decorator(login_required)
+    @method_decorator(require_http_methods(["GET"]))
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get(self, request, project_id):
+        """The whole board: columns of compact card rows plus the assignees they reference"""
+        project = Project.objects.filter(
+            project_id=project_id, user_id=request.user.pk
+        ).values('project_id', 'project_name').first()
+        if project is None:
+            return JsonResponse({'success': False, 'message': 'Only project members can view its board'}, status=403)
+
+        board = load_board(project_id)
+        return JsonResponse({'success': True, 'project': project, **board})
+
+
+class MoveCardAPI(View):
+
+    @method_decorator(login_required)
+    @method_decorator(require_http_methods(["POST"]))
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def post(self, request, project_id):
+        """Move a card: {"task_id", "column", "after_task_id"} (after_task_id null = top of the column)"""
+        try:
+            data = json.loads(request.body)
+            task_id = int(data['task_id'])
+            after_task_id = data.get('after_task_id')
+            after_task_id = int(after_task_id) if after_task_id is not None else None
+            column = data['column']
+            if not isinstance(column, str):
+                raise TypeError('column must be a string')
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse({'success': False, 'message': 'Expected task_id, column and after_task_id'}, status=400)
+
+        if not Project.objects.filter(project_id=project_id, user_id=request.user.pk).exists():
+            return JsonResponse({'success': False, 'message': 'Only project members can move its cards'}, status=403)
+
+        success, message, rank = move_card(project_id, task_id, column, after_task_id, request.user.id)
+        if not success:
+            return JsonResponse({'success': False, 'message': message}, status=400)
+        return JsonResponse({'success': True, 'message': message, 'rank': rank})
@@ -0,0 +1,418 @@
+"""
+Set-based task operations used by the bulk endpoints.
+
+Each operation does its permission check, its write and its side effects
+(timeline entries, notifications) with a fixed number of statements, no
+matter how many tasks are involved.
+"""
+import csv
+import json
+from collections import Counter
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Case, CharField, Value, When
+from django.utils import timezone
+
+from calendarevent_app.cache import bump_calendar_versions, bump_for_tasks
+from calendarevent_app.models import CalendarEvent
+from dunzomanagement.inserts import bulk_insert
+from dunzomanagement.search import index_instances
+from project_app.counters import adjust_status_counts
+from project_app.models import Project
+from timeline_app.writer import log_entry
+from user_app.cache import bump_dashboard_versions
+from user_app.dashboard import bump_dashboards_for_tasks
+from user_app.delivery import notify_task_participants, notify_users
+from .models import Task, Assignment
+
+VALID_STATUSES = {value for value, _ in Task.STATUS_CHOICES}
+VALID_PRIORITIES = {value for value, _ in Task.PRIORITY_CHOICES}
+VALID_ROLES = {value for value, _ in Assignment.ROLE_CHOICES}
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+TITLE_MAX_LENGTH = Task._meta.get_field('title').max_length
+
+
+def parse_status_updates(updates):
+    """
+    Validate a list of {"task_id", "status"} items.
+
+    Returns ({task_id: status}, [error results]); when a task appears more
+    than once the last entry wins.
+    """
+    changes = {}
+    errors = []
+    for item in updates:
+        try:
+            task_id = int(item.get('task_id'))
+        except (AttributeError, TypeError, ValueError):
+            errors.append({'task_id': None, 'success': False, 'message': 'Invalid task_id'})
+            continue
+        status = item.get('status')
+        if not isinstance(status, str) or status not in VALID_STATUSES:
+            errors.append({'task_id': task_id, 'success': False, 'message': f'Invalid status: {status}'})
+            continue
+        changes[task_id] = status
+    return changes, errors
+
+
+def bulk_update_status(user_id, changes):
+    """
+    Apply {task_id: status} for tasks in the user's projects, in one transaction.
+
+    Returns one result dict per requested task.
+    """
+    results = []
+    with transaction.atomic():
+        # One query for permissions and current values; rows are locked until commit
+        current = {
+            task_id: (status, project_id, title)
+            for task_id, status, project_id, title in Task.objects.select_for_update().filter(
+                task_id__in=changes.keys(),
+                project_id__user_id=user_id,
+            ).values_list('task_id', 'status', 'project_id', 'title')
+        }
+
+        changed = {}
+        for task_id, new_status in changes.items():
+            if task_id not in current:
+                results.append({'task_id': task_id, 'success': False,
+                                'message': 'Task not found or not in your projects'})
+                continue
+            old_status = current[task_id][0]
+            results.append({'task_id': task_id, 'success': True, 'old_status': old_status,
+                            'new_status': new_status,
+                            'message': 'Status unchanged' if old_status == new_status else 'Status updated'})
+            if old_status != new_status:
+                changed[task_id] = new_status
+
+        if changed:
+            # A single UPDATE ... SET status = CASE task_id WHEN ... END
+            Task.objects.filter(task_id__in=changed.keys()).update(
+                status=Case(
+                    *[When(task_id=task_id, then=Value(status)) for task_id, status in changed.items()],
+                    output_field=CharField(),
+                ),
+                updated_at=timezone.now(),
+            )
+            deltas = Counter()
+            for task_id, status in changed.items():
+                deltas[(current[task_id][1], current[task_id][0])] -= 1
+                deltas[(current[task_id][1], status)] += 1
+            adjust_status_counts(deltas)
+            record_status_side_effects(user_id, changed, current)
+
+    return results
+
+
+def record_status_side_effects(user_id, changed, current):
+    """Timeline entries and assignee notifications for a batch of status changes"""
+    # Both are queued for the background writers; assignees are looked up there
+    for task_id, status in changed.items():
+        log_entry(
+            current[task_id][1], user_id, 'task_status_changed',
+            {'task_id': task_id, 'from': current[task_id][0], 'to': status}
+        )
+        notify_task_participants(
+            task_id, 'Status Update', f'Task "{current[task_id][2]}" moved to {status}',
+            exclude_user_id=user_id
+        )
+    # The CASE update sends no post_save
+    bump_dashboards_for_tasks(changed.keys())
+
+
+def reassign_task_users(task_id, assignments, user_id):
+    """
+    Replace a task's assignments with a list of {"user_id", "role"} items.
+
+    Only a task Owner may do this, everyone assigned must be a member of the
+    project and at least one Owner must remain. Returns (success, message).
+    """
+    new_roles = {}
+    for item in assignments:
+        try:
+            assignee_id = int(item.get('user_id'))
+        except (AttributeError, TypeError, ValueError):
+            return False, 'Invalid user_id'
+        role = item.get('role')
+        if role not in VALID_ROLES:
+            return False, f'Invalid role: {role}'
+        new_roles[assignee_id] = role
+    if 'Owner' not in new_roles.values():
+        return False, 'A task must have at least one Owner'
+
+    with transaction.atomic():
+        task = Task.objects.select_for_update().filter(task_id=task_id).values('title', 'project_id').first()
+        if task is None:
+            return False, 'Task not found'
+
+        current = dict(Assignment.objects.filter(task_id=task_id).values_list('user_id', 'role'))
+        if current.get(user_id) != 'Owner':
+            return False, 'Only the task owner can manage user assignments'
+
+        members = set(Project.user_id.through.objects.filter(
+            project_id=task['project_id'], user_id__in=new_roles.keys()
+        ).values_list('user_id', flat=True))
+        if new_roles.keys() - members:
+            return False, 'Only project members can be assigned to the task'
+
+        removed = current.keys() - new_roles.keys()
+        added = {uid: role for uid, role in new_roles.items() if uid not in current}
+        changed = {uid: role for uid, role in new_roles.items() if uid in current and current[uid] != role}
+
+        if removed:
+            Assignment.objects.filter(task_id=task_id, user_id__in=removed).delete()
+        for role in set(changed.values()):
+            Assignment.objects.filter(
+                task_id=task_id, user_id__in=[uid for uid, r in changed.items() if r == role]
+            ).update(role=role)
+        Assignment.objects.bulk_create([
+            Assignment(task_id_id=task_id, user_id_id=uid, role=role) for uid, role in added.items()
+        ])
+
+        title = task['title']
+        for uid, role in added.items():
+            notify_users([uid], 'Task Assignment', f'You were assigned to "{title}" as {role}',
+                         exclude_user_id=user_id)
+        for uid, role in changed.items():
+            notify_users([uid], 'Task Assignment', f'Your role on "{title}" is now {role}',
+                         exclude_user_id=user_id)
+        if removed:
+            notify_users(removed, 'Task Assignment', f'You were removed from "{title}"',
+                         exclude_user_id=user_id)
+
+        # bulk_create and update() send no signals; the deletes already did
+        if added:
+            bump_for_tasks([task_id], added.keys())
+            bump_dashboards_for_tasks([task_id], added.keys())
+
+    return True, 'Task assignments updated'
+
+
+# ========== TASK IMPORT ==========
+
+def read_import_rows(stream, import_format='csv'):
+    """Yield one dict per CSV row or JSON line of a text stream"""
+    if import_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        # Bad lines are passed on so they are reported with their row number
+        yield row if isinstance(row, dict) else {'__invalid__': line}
+
+
+def parse_due_date(value):
+    """Accept YYYY-MM-DD or an ISO datetime; return (date, deadline start, deadline end)"""
+    value = str(value or '').strip()
+    if not value:
+        raise ValueError('due_date is required')
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            start, end = datetime.combine(day, time.min), datetime.combine(day, time(23, 59))
+        else:
+            start = end = datetime.fromisoformat(value.replace(' ', 'T', 1))
+    except ValueError:
+        raise ValueError(f'Invalid due_date: {value}')
+
+    if timezone.is_naive(start):
+        start, end = timezone.make_aware(start), timezone.make_aware(end)
+    return start.date(), start, end
+
+
+def parse_assignees(value, members):
+    """
+    Parse "email[:Role]" entries separated by ';' (or a JSON list of them).
+
+    ``members`` maps project member emails to user ids; assignees must be
+    members of the project.
+    """
+    if not value:
+        return []
+    entries = value if isinstance(value, list) else str(value).split(';')
+
+    assignments = {}
+    for entry in entries:
+        email, _, role = str(entry).strip().partition(':')
+        email, role = email.strip().lower(), role.strip() or 'Contributor'
+        if not email:
+            continue
+        if email not in members:
+            raise ValueError(f'{email} is not a member of this project')
+        if role not in VALID_ROLES:
+            raise ValueError(f'Invalid role: {role}')
+        assignments[members[email]] = role
+    return list(assignments.items())
+
+
+def clean_import_row(row, members):
+    """Validate one import row; returns (Task fields, deadline, assignments) or raises ValueError"""
+    if '__invalid__' in row:
+        raise ValueError('Invalid JSON line')
+
+    title = row.get('title') or ''
+    if not isinstance(title, (str, int, float)):
+        raise ValueError('title must be text')
+    title = str(title).strip()
+    if not title:
+        raise ValueError('title is required')
+    if len(title) > TITLE_MAX_LENGTH:
+        raise ValueError(f'title is longer than {TITLE_MAX_LENGTH} characters')
+
+    # JSON lines can hold lists or objects, which are not even hashable
+    status = row.get('status') or 'To Do'
+    if not isinstance(status, str) or status not in VALID_STATUSES:
+        raise ValueError(f'Invalid status: {status}')
+    priority = row.get('priority') or 'Medium'
+    if not isinstance(priority, str) or priority not in VALID_PRIORITIES:
+        raise ValueError(f'Invalid priority: {priority}')
+    description = row.get('description') or ''
+    if not isinstance(description, (str, int, float)):
+        raise ValueError('description must be text')
+
+    due_date, deadline_start, deadline_end = parse_due_date(row.get('due_date'))
+    fields = {
+        'title': title,
+        'description': str(description),
+        'status': status,
+        'priority': priority,
+        'due_date': due_date,
+    }
+    return fields, (deadline_start, deadline_end), parse_assignees(row.get('assignees'), members)
+
+
+def insert_task_batch(project_id, batch):
+    """
+    Insert a batch of cleaned rows with their assignments and deadline events.
+
+    Three bulk INSERTs per batch on every backend; where the database does
+    not return primary keys from them (MySQL) the task ids are read back with
+    one more query on the (project, due date) index. No post_save is sent:
+    the caller invalidates caches once per batch.
+    """
+    tasks = [Task(project_id_id=project_id, **fields) for fields, _, _ in batch]
+
+    with transaction.atomic():
+        bulk_insert(
+            Task, tasks, 'created_at', ('project_id', 'due_date', 'title', 'created_at'),
+            project_id=project_id, due_date__in={task.due_date for task in tasks},
+        )
+
+        Assignment.objects.bulk_create([
+            Assignment(task_id=task, user_id_id=user_id, role=role)
+            for task, (_, _, assignments) in zip(tasks, batch)
+            for user_id, role in assignments
+        ])
+        events = CalendarEvent.objects.bulk_create([
+            CalendarEvent(task_id=task, title=task.title, start_time=start,
+                          end_time=end, type='Deadline')
+            for task, (_, (start, end), _) in zip(tasks, batch)
+        ])
+        adjust_status_counts(Counter((project_id, task.status) for task in tasks))
+        # bulk_create sends no post_save for the search index either
+        index_instances(tasks + events)
+    return tasks
+
+
+def import_tasks(project_id, user_id, rows, batch_size=None, progress=None):
+    """
+    Import task rows into a project in batches.
+
+    Invalid rows are reported and skipped; they never abort the import. A
+    file that cannot be read any further (malformed CSV, not UTF-8) ends it
+    with an error on the row it stopped at, keeping the batches before it.
+    ``progress`` is called with the running total after each batch. Returns
+    {'created', 'error_count', 'errors'}, where errors lists at most
+    TASK_IMPORT_MAX_ERRORS {'row', 'message'} items (rows count from 1).
+    """
+    batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+    max_errors = settings.TASK_IMPORT_MAX_ERRORS
+    members = {
+        email.lower(): member_id
+        for member_id, email in Project.user_id.through.objects.filter(
+            project_id=project_id
+        ).values_list('user_id', 'user__email')
+    }
+
+    result = {'created': 0, 'error_count': 0, 'errors': []}
+    assignee_counts = {}
+
+    def add_error(row_number, message):
+        result['error_count'] += 1
+        if len(result['errors']) < max_errors:
+            result['errors'].append({'row': row_number, 'message': message})
+
+    def flush(batch, row_numbers):
+        try:
+            insert_task_batch(project_id, batch)
+        except DatabaseError as e:
+            for row_number in row_numbers:
+                add_error(row_number, f'Database error: {e}')
+            return
+        result['created'] += len(batch)
+        # bulk_create sends no post_save, so the calendar and dashboard signals never ran
+        bump_calendar_versions(members.values())
+        bump_dashboard_versions(members.values())
+        for _, _, assignments in batch:
+            for assignee_id, _ in assignments:
+                assignee_counts[assignee_id] = assignee_counts.get(assignee_id, 0) + 1
+        if progress:
+            progress(result['created'])
+
+    batch, row_numbers = [], []
+    for row_number, row in enumerate(readable_rows(rows, add_error), start=1):
+        try:
+            batch.append(clean_import_row(row, members))
+        except ValueError as e:
+            add_error(row_number, str(e))
+            continue
+        row_numbers.append(row_number)
+        if len(batch) >= batch_size:
+            flush(batch, row_numbers)
+            batch, row_numbers = [], []
+    if batch:
+        flush(batch, row_numbers)
+
+    if result['created']:
+        record_import_side_effects(project_id, user_id, result, assignee_counts)
+    return result
+
+
+def readable_rows(rows, add_error):
+    """Yield rows until the file cannot be read any further, reporting where it stopped"""
+    rows = iter(rows)
+    row_number = 0
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            add_error(row_number + 1, f'Malformed CSV: {e}')
+            return
+        except UnicodeDecodeError:
+            add_error(row_number + 1, 'File must be UTF-8 encoded')
+            return
+        row_number += 1
+        yield row
+
+
+def record_import_side_effects(project_id, user_id, result, assignee_counts):
+    """One timeline entry and one queued notification per assignee per import"""
+    log_entry(project_id, user_id, 'tasks_imported', {'created': result['created'], 'errors': result['error_count']})
+    for assignee_id, count in assignee_counts.items():
+        notify_users(
+            [assignee_id], 'Task Assignment',
+            f'You were assigned {count} imported task{"s" if count != 1 else ""}',
+            exclude_user_id=user_id
+        )
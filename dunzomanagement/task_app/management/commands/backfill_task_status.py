@@ -0,0 +1,89 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from project_app.counters import adjust_status_counts
+from task_app.models import Task
+
+
+def spelling(value):
+    """Case- and whitespace-insensitive form of a stored choice value"""
+    return ' '.join(value.split()).casefold()
+
+
+# Variant spelling -> stored value, per choice column
+CANONICAL = {
+    'status': {spelling(value): value for value, _ in Task.STATUS_CHOICES},
+    'priority': {spelling(value): value for value, _ in Task.PRIORITY_CHOICES},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Normalise Task.status and Task.priority to their choice values "
+        "('to do ', 'DONE' and 'high' become 'To Do', 'Done' and 'High') so the "
+        "status indexes and counters see every task. Rows are processed in "
+        "task id order, one short transaction per batch; pass the last id "
+        "printed to --start-id to resume. Values that match no choice are "
+        "reported and left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of tasks per transaction (default 5000)')
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help='Seconds to pause between batches (default 0.05)')
+        parser.add_argument('--start-id', type=int, default=None,
+                            help='Resume from this task id')
+        parser.add_argument('--check', action='store_true',
+                            help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = (options['start_id'] or 1) - 1
+        updated = 0
+        unknown = 0
+
+        while True:
+            with transaction.atomic():
+                tasks = list(
+                    Task.objects.select_for_update().filter(task_id__gt=last_id).order_by('task_id')
+                    .values('task_id', 'project_id', 'status', 'priority')[:batch_size]
+                )
+                if not tasks:
+                    break
+
+                changes = {}
+                deltas = {}
+                for task in tasks:
+                    for field, canonical in CANONICAL.items():
+                        value = task[field]
+                        if value in canonical.values():
+                            continue
+                        new_value = canonical.get(spelling(value or ''))
+                        if new_value is None:
+                            unknown += 1
+                            self.stdout.write(f'Task {task["task_id"]}: unknown {field} {value!r}')
+                            continue
+                        changes.setdefault((field, new_value), []).append(task['task_id'])
+                        if field == 'status':
+                            key_old, key_new = (task['project_id'], value), (task['project_id'], new_value)
+                            deltas[key_old] = deltas.get(key_old, 0) - 1
+                            deltas[key_new] = deltas.get(key_new, 0) + 1
+
+                updated += sum(len(task_ids) for task_ids in changes.values())
+                if changes and not options['check']:
+                    for (field, new_value), task_ids in changes.items():
+                        Task.objects.filter(task_id__in=task_ids).update(**{field: new_value})
+                    adjust_status_counts(deltas)
+
+            last_id = tasks[-1]['task_id']
+            self.stdout.write(f'Processed task ids up to {last_id} ({updated} values normalised so far)')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        verb = 'would be normalised' if options['check'] else 'normalised'
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfill complete: {updated} values {verb}, {unknown} left unknown.'
+        ))
@@ -0,0 +1,65 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from project_app.models import Project
+from task_app.bulk import IMPORT_FORMATS, import_tasks, read_import_rows
+from user_app.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks into a project from a CSV or JSON Lines file. Columns: "
+        "title, description, status, priority, due_date and assignees "
+        "(\"email[:Role]\" separated by ';'). Each task gets its deadline "
+        "event; rows are written in batches and invalid rows are reported "
+        "without stopping the import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input")
+        parser.add_argument('--project', type=int, required=True, help='Project id to import into')
+        parser.add_argument('--user', required=True,
+                            help='Id or email of the user recorded as the importer')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, default=None,
+                            help='File format (default: from the file extension, else csv)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows per transaction (default TASK_IMPORT_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        if not Project.objects.filter(project_id=options['project']).exists():
+            raise CommandError(f"Project {options['project']} does not exist")
+        user_ref = options['user']
+        user = User.objects.filter(**{'pk' if user_ref.isdigit() else 'email': user_ref}).first()
+        if user is None:
+            raise CommandError(f'User {user_ref} does not exist')
+
+        def progress(created):
+            self.stdout.write(f'{created} tasks imported...')
+
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+            result = import_tasks(options['project'], user.pk, read_import_rows(stream, import_format),
+                                  options['batch_size'], progress)
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(str(e))
+            with stream:
+                result = import_tasks(options['project'], user.pk, read_import_rows(stream, import_format),
+                                      options['batch_size'], progress)
+
+        for error in result['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['message']}")
+        if result['error_count'] > len(result['errors']):
+            self.stderr.write(f"... and {result['error_count'] - len(result['errors'])} more errors")
+
+        style = self.style.WARNING if result['error_count'] else self.style.SUCCESS
+        self.stdout.write(style(
+            f"Import complete: {result['created']} tasks created, {result['error_count']} rows rejected."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0003_kanbancolumn_project_id'),
+        ('task_app', '0006_rename_notification_task_notification_id_and_more'),
+        ('user_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project_id', 'due_date', 'task_id'], name='task_project_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['due_date', 'task_id'], name='task_due_idx'),
+        ),
+    ]
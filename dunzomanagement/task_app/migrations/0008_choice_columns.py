@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0004_choice_columns'),
+        ('task_app', '0007_task_list_indexes'),
+        ('user_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='role',
+            field=models.CharField(choices=[('Owner', 'Owner'), ('Contributor', 'Contributor'), ('Reviewer', 'Reviewer')], default='Contributor', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority',
+            field=models.CharField(choices=[('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High')], default='Medium', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='status',
+            field=models.CharField(choices=[('To Do', 'To Do'), ('In Progress', 'In Progress'), ('Done', 'Done'), ('Blocked', 'Blocked')], default='To Do', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['task_id', 'role'], name='assignment_task_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['user_id', 'role'], name='assignment_user_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project_id', 'status', 'due_date'], name='task_project_status_due_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# Full-text indexes used by dunzomanagement.search. The PostgreSQL
+# expressions must stay identical to the ones search_postgresql() queries
+# with, or the planner will not use them. Other databases get nothing: the
+# search falls back to its in-process index.
+SEARCH_INDEXES = {
+    'postgresql': [
+        (
+            "CREATE INDEX task_search_idx ON task_app_task "
+            "USING GIN (to_tsvector('english', title || ' ' || description))",
+            "DROP INDEX task_search_idx",
+        ),
+        (
+            "CREATE INDEX comment_search_idx ON task_app_comment "
+            "USING GIN (to_tsvector('english', content))",
+            "DROP INDEX comment_search_idx",
+        ),
+    ],
+    'mysql': [
+        (
+            "CREATE FULLTEXT INDEX task_search_idx ON task_app_task (title, description)",
+            "DROP INDEX task_search_idx ON task_app_task",
+        ),
+        (
+            "CREATE FULLTEXT INDEX comment_search_idx ON task_app_comment (content)",
+            "DROP INDEX comment_search_idx ON task_app_comment",
+        ),
+    ],
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    for create, _ in SEARCH_INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(create)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for _, drop in SEARCH_INDEXES.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(drop)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0008_choice_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
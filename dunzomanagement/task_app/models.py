@@ -14,18 +14,21 @@ class Task(models.Model):
 
     title = models.CharField(max_length=100)
     description = models.TextField()
-    status = (
-        'To Do',
-        'In Progress',
-        'Done',
-        'Blocked'
-    )
+    STATUS_CHOICES = [
+        ('To Do', 'To Do'),
+        ('In Progress', 'In Progress'),
+        ('Done', 'Done'),
+        ('Blocked', 'Blocked'),
+    ]
 
-    priority = (
-        'Low',
-        'Medium',
-        'High'
-    )
+    PRIORITY_CHOICES = [
+        ('Low', 'Low'),
+        ('Medium', 'Medium'),
+        ('High', 'High'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='To Do')
+    priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='Medium')
 
     due_date = models.DateField(default=datetime.date.today)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -42,6 +45,14 @@ class Task(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of task lists on (due_date, task_id)
+            models.Index(fields=['project_id', 'due_date', 'task_id'], name='task_project_due_idx'),
+            models.Index(fields=['due_date', 'task_id'], name='task_due_idx'),
+            models.Index(fields=['project_id', 'status', 'due_date'], name='task_project_status_due_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -54,13 +65,21 @@ class Assignment(models.Model):
         default=1
     )
 
-    role = (
-        'Owner',
-        'Contributor',
-        'Reviewer'
-    )
+    ROLE_CHOICES = [
+        ('Owner', 'Owner'),
+        ('Contributor', 'Contributor'),
+        ('Reviewer', 'Reviewer'),
+    ]
+
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='Contributor')
     assigned_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['task_id', 'role'], name='assignment_task_role_idx'),
+            models.Index(fields=['user_id', 'role'], name='assignment_user_role_idx'),
+        ]
+
 
 class Comment(models.Model):
     comment_id = models.AutoField(primary_key=True)
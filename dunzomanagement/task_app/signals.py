@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from dunzomanagement.search import index_deleted, index_saved
+from .models import Comment, Task
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Comment)
+def document_saved(sender, instance, update_fields=None, **kwargs):
+    """Keep the in-memory search index in step with task and comment edits"""
+    index_saved(instance, update_fields)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Comment)
+def document_deleted(sender, instance, **kwargs):
+    index_deleted(instance)
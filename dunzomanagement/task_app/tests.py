@@ -1,3 +1,235 @@
+import datetime
+import io
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User as AuthUser
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dunzomanagement.search import search, search_index
+from project_app.counters import adjust_status_counts, get_status_counts
+from project_app.models import Project
+from user_app.models import User
+from .bulk import import_tasks, parse_status_updates, read_import_rows
+from .models import Task, Assignment, Comment
+from .views import get_assignments_data, get_task_details
+
+
+class TaskQueryCountTests(TestCase):
+    """Detail and assignment payloads must not issue one query per row"""
+
+    def setUp(self):
+        self.project = Project.objects.create(
+            project_name='Board',
+            start_date=datetime.date.today()
+        )
+        self.task = Task.objects.create(
+            project_id=self.project,
+            title='Write report',
+            description='Quarterly report'
+        )
+
+    def add_participants(self, count):
+        for i in range(count):
+            user = User.objects.create(
+                name=f'Member {i}',
+                email=f'member{i}-{User.objects.count()}@example.com',
+                password_hash='x',
+                role='Member'
+            )
+            Assignment.objects.create(task_id=self.task, user_id=user, role='Contributor')
+            Comment.objects.create(task_id=self.task, user_id=user, content=f'Comment {i}')
+
+    def test_task_details_query_count_is_constant(self):
+        for count in (1, 10):
+            self.add_participants(count)
+            with self.assertNumQueries(3):
+                context = get_task_details(self.task.task_id)
+                # What the details page reads from each row
+                project_name = context['task'].project_id.project_name
+                names = [row.user_id.name for row in context['assignments'] + context['comments']]
+            self.assertEqual(project_name, 'Board')
+            self.assertEqual(len(names), 2 * Comment.objects.filter(task_id=self.task).count())
+
+    def test_assignments_payload_uses_one_query(self):
+        self.add_participants(5)
+        with self.assertNumQueries(1):
+            data = get_assignments_data(self.task.task_id)
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0]['username'], 'Member 0')
+        self.assertEqual(data[0]['role'], 'Contributor')
+
+
+class SearchTests(TestCase):
+    """Search hits stay inside the caller's projects and follow later edits"""
+
+    def setUp(self):
+        search_index.reset()
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.other_project = Project.objects.create(project_name='Other', start_date=datetime.date.today())
+        self.task = Task.objects.create(
+            project_id=self.project, title='Quarterly report', description='Collect <sales> figures'
+        )
+        Task.objects.create(project_id=self.other_project, title='Secret report', description='Not yours')
+
+    def tearDown(self):
+        search_index.reset()
+
+    def test_hits_are_limited_to_projects_and_highlighted(self):
+        results = search(['report'], [self.project.project_id])
+        self.assertEqual([(hit['kind'], hit['id']) for hit in results], [('task', self.task.task_id)])
+        self.assertEqual(results[0]['title'], 'Quarterly <mark>report</mark>')
+        self.assertEqual(search(['sales'], [self.project.project_id])[0]['snippet'], 'Collect &lt;<mark>sales</mark>&gt; figures')
+        self.assertEqual(search(['report', 'missing'], [self.project.project_id]), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        search(['report'], [self.project.project_id])
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(task_id=self.task, content='Report draft attached')
+            self.task.title = 'Yearly summary'
+            self.task.save()
+
+        results = search(['report'], [self.project.project_id])
+        self.assertEqual([(hit['kind'], hit['id']) for hit in results], [('comment', comment.comment_id)])
+        self.assertEqual(results[0]['title'], 'Yearly summary')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+        self.assertEqual(search(['report'], [self.project.project_id]), [])
+
+
+class ImportTests(TestCase):
+    """Bad rows and unreadable files are reported, never a 500 halfway through an import"""
+
+    def setUp(self):
+        self.member = User.objects.create(name='Ada Lovelace', email='ada@example.com', password_hash='x', role='Member')
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.project.user_id.add(self.member)
+        AuthUser.objects.create_user(id=self.member.pk, username='ada', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.member.pk))
+
+    def upload(self, name, content):
+        return self.client.post(
+            reverse('task_app:import_tasks_by_project', kwargs={'project_id': self.project.project_id}),
+            {'file': SimpleUploadedFile(name, content.encode())}
+        )
+
+    def test_non_text_values_are_row_errors(self):
+        lines = [
+            {'title': 'Good', 'due_date': '2030-01-07', 'assignees': 'ada@example.com:Owner'},
+            {'title': 'Listed status', 'status': ['Done'], 'due_date': '2030-01-07'},
+            {'title': 'Object priority', 'priority': {'level': 'High'}, 'due_date': '2030-01-07'},
+            {'title': ['Listed title'], 'due_date': '2030-01-07'},
+            {'title': 'Also good', 'status': 'Done', 'due_date': '2030-01-08'},
+        ]
+        response = self.upload('tasks.jsonl', '\n'.join(json.dumps(line) for line in lines))
+
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual(body['created'], 2)
+        self.assertEqual([error['row'] for error in body['errors']], [2, 3, 4])
+        self.assertEqual(sorted(Task.objects.values_list('title', flat=True)), ['Also good', 'Good'])
+
+    def test_malformed_csv_keeps_earlier_batches(self):
+        content = 'title,due_date\nFirst,2030-01-07\nSecond,2030-01-07\n"%s,2030-01-07\n' % ('x' * 200000)
+        result = import_tasks(self.project.project_id, self.member.pk, read_import_rows(io.StringIO(content)),
+                              batch_size=1)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(result['errors'][0]['row'], 3)
+        self.assertTrue(result['errors'][0]['message'].startswith('Malformed CSV'))
+
+    def import_rows(self, count, batch_size):
+        rows = [
+            {'title': f'Task {i}', 'due_date': f'2030-01-{i % 28 + 1:02d}', 'assignees': 'ada@example.com:Owner'}
+            for i in range(count)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = import_tasks(self.project.project_id, self.member.pk, rows, batch_size=batch_size)
+        return result, len(queries)
+
+    def test_batches_without_returning_read_the_ids_back(self):
+        # MySQL: bulk_create returns no task ids
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            result, _ = self.import_rows(5, batch_size=2)
+            _, small = self.import_rows(4, batch_size=4)
+            _, large = self.import_rows(40, batch_size=40)
+
+        self.assertEqual(result['created'], 5)
+        # Same statements per batch, however many rows it holds
+        self.assertEqual(small, large)
+        for task in Task.objects.filter(title__in=[f'Task {i}' for i in range(5)]):
+            self.assertEqual(list(task.assignment_set.values_list('user_id', flat=True)), [self.member.pk])
+            self.assertEqual(list(task.calendarevent_set.values_list('title', flat=True)), [task.title])
+
+
+class BulkStatusTests(TestCase):
+    """Malformed bulk status requests are rejected, unknown statuses reported per task"""
+
+    def setUp(self):
+        self.member = User.objects.create(name='Ada Lovelace', email='ada@example.com', password_hash='x', role='Member')
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.project.user_id.add(self.member)
+        self.task = Task.objects.create(project_id=self.project, title='Write report', description='')
+        AuthUser.objects.create_user(id=self.member.pk, username='ada', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.member.pk))
+
+    def post(self, updates):
+        return self.client.post(reverse('task_app:bulk_update_status'), json.dumps({'updates': updates}),
+                                content_type='application/json')
+
+    def test_non_text_status_is_a_bad_request(self):
+        for status in (['Done'], {'name': 'Done'}, None):
+            response = self.post([{'task_id': self.task.task_id, 'status': status}])
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post(['not an object']).status_code, 400)
+
+    def test_unknown_status_is_reported_per_task(self):
+        changes, errors = parse_status_updates([
+            {'task_id': self.task.task_id, 'status': 'Done'},
+            {'task_id': self.task.task_id + 1, 'status': 'Finished'},
+            {'task_id': self.task.task_id + 2, 'status': ['Done']},
+            {'task_id': 'abc', 'status': 'Done'},
+        ])
+
+        self.assertEqual(changes, {self.task.task_id: 'Done'})
+        self.assertEqual([error['task_id'] for error in errors],
+                         [self.task.task_id + 1, self.task.task_id + 2, None])
+
+
+class BackfillTaskStatusTests(TestCase):
+    """Variant spellings are normalised in resumable batches and the counters follow"""
+
+    def setUp(self):
+        self.project = Project.objects.create(project_name='Board', start_date=datetime.date.today())
+        self.tasks = [
+            Task.objects.create(project_id=self.project, title=title, description='', status=status, priority=priority)
+            for title, status, priority in [
+                ('A', 'to  do ', 'high'), ('B', 'DONE', 'Low'), ('C', 'Someday', 'MEDIUM'), ('D', 'Done', 'Medium'),
+            ]
+        ]
+        adjust_status_counts({(self.project.pk, 'to  do '): 1, (self.project.pk, 'DONE'): 1,
+                              (self.project.pk, 'Someday'): 1, (self.project.pk, 'Done'): 1})
+
+    def values(self):
+        return list(Task.objects.order_by('task_id').values_list('status', 'priority'))
+
+    def test_normalises_and_moves_counters(self):
+        out = io.StringIO()
+        call_command('backfill_task_status', batch_size=2, sleep=0, stdout=out)
+
+        self.assertEqual(self.values(), [('To Do', 'High'), ('Done', 'Low'), ('Someday', 'Medium'), ('Done', 'Medium')])
+        self.assertEqual(get_status_counts([self.project.pk])[self.project.pk], {'To Do': 1, 'Done': 2, 'Someday': 1})
+        self.assertIn("unknown status 'Someday'", out.getvalue())
+
+    def test_check_and_resume(self):
+        call_command('backfill_task_status', check=True, sleep=0, stdout=io.StringIO())
+        self.assertEqual(self.values()[0], ('to  do ', 'high'))
 
-# Create your tests here.
+        call_command('backfill_task_status', start_id=self.tasks[1].task_id, sleep=0, stdout=io.StringIO())
+        self.assertEqual(self.values()[:2], [('to  do ', 'high'), ('Done', 'Low')])
@@ -17,9 +17,9 @@
 
 from django.urls import path
 from .views import (
-    GetTasks, GetTasksByProject, GetTasksByStatus, GetTaskDetails,
-    CreateTaskSP, UpdateTaskStatusSP, AddCommentSP, ManageTaskUsersSP,
-    DeleteTaskSP
+    GetTasks, GetTasksByProject, GetTasksByStatus, GetTaskDetails, ExportTasksByProject,
+    ImportTasksByProject, CreateTaskSP, UpdateTaskStatusSP, BulkUpdateStatusSP, AddCommentSP,
+    ManageTaskUsersSP, DeleteTaskSP
 )
 
 app_name = "task_app"
@@ -28,6 +28,8 @@ urlpatterns = [
     # Class-based view URLs
     path('', GetTasks.as_view(), name='get_tasks'),
     path('project/<int:project_id>/', GetTasksByProject.as_view(), name='tasks_by_project'),
+    path('project/<int:project_id>/export/', ExportTasksByProject.as_view(), name='export_tasks_by_project'),
+    path('project/<int:project_id>/import/', ImportTasksByProject.as_view(), name='import_tasks_by_project'),
     path('status/<str:status>/', GetTasksByStatus.as_view(), name='tasks_by_status'),
     path('<int:task_id>/', GetTaskDetails.as_view(), name='get_details'),
 
@@ -37,10 +39,10 @@ urlpatterns = [
     path('<int:task_id>/comment/add/', AddCommentSP.as_view(), name='add_comment_sp'),
     path('<int:task_id>/users/manage/', ManageTaskUsersSP.as_view(), name='manage_users_sp'),
     path('<int:task_id>/delete/sp/', DeleteTaskSP.as_view(), name='delete_task_sp'),
+    path('bulk/status/', BulkUpdateStatusSP.as_view(), name='bulk_update_status'),
 
     #To be considered(tan-awn lang kung makaya)
     # path('<int:task_id>/assign/self/', AssignSelfToTaskSP.as_view(), name='assign_self_sp'),
-    # path('bulk/status/', BulkUpdateStatusSP.as_view(), name='bulk_update_status'),
 
     # API endpoints (class-based)
     # path('api/<str:action>/', TaskAPI.as_view(), name='task_api'),
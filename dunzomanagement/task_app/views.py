@@ -60,17 +60,33 @@ from django.views import View
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden, JsonResponse, HttpResponse
-from django.db import connection
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.views import View
 from django.utils.decorators import method_decorator
+from django.utils import timezone
+import io
 import json
 from datetime import datetime
 
 from .models import Task, Assignment, Comment
-from project_app.models import Project, Tag
+from .bulk import (
+    parse_status_updates, bulk_update_status, reassign_task_users,
+    IMPORT_FORMATS, import_tasks, read_import_rows
+)
+from project_app.models import Project
 from user_app.models import User
+from user_app.pubsub import publish_created_in_transaction
+from user_app.cache import bump_dashboard_versions
+from user_app.dashboard import bump_dashboards_for_tasks
+from calendarevent_app.cache import task_audience
+from project_app.counters import adjust_status_counts, count_status_change
+from dunzomanagement.asyncdb import run_db
+from dunzomanagement.pagination import keyset_page
+from dunzomanagement.streaming import EXPORT_FORMATS, iterate_queryset, streaming_export
 
 # Template paths (kept as module-level variables for consistency)
 TASK_TEMPLATE = 'task_app/task_app.html'
@@ -86,6 +102,15 @@ DELETE_COMMENT_TEMPLATE = 'task_app/delete_comment.html'
 MANAGE_TAGS_TEMPLATE = 'task_app/manage_tags.html'
 STATISTICS_TEMPLATE = 'task_app/statistics.html'
 
+# Task lists are paginated on (due_date, task_id) so every page is an index range scan
+TASK_LIST_ORDERING = ['due_date', 'task_id']
+TASK_LIST_DEFERRED_FIELDS = ['description']
+
+TASK_EXPORT_FIELDS = [
+    'task_id', 'title', 'description', 'status', 'priority',
+    'due_date', 'created_at', 'updated_at',
+]
+
 
 # ========== HELPER DECORATOR ==========
 def login_required_cbv(view_func):
@@ -93,6 +118,162 @@ def login_required_cbv(view_func):
     return method_decorator(login_required, name='dispatch')(view_func)
 
 
+# ========== HELPER FUNCTIONS ==========
+def get_page_size(request):
+    """Read ?page_size=, falling back to TASK_PAGE_SIZE and capped at TASK_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(request.GET.get('page_size', settings.TASK_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.TASK_PAGE_SIZE
+    return max(1, min(page_size, settings.TASK_MAX_PAGE_SIZE))
+
+
+def render_task_page(request, template, queryset):
+    """Render one keyset page of a task queryset, leaving heavy columns unloaded"""
+    page_size = get_page_size(request)
+    tasks, next_cursor = keyset_page(
+        queryset.defer(*TASK_LIST_DEFERRED_FIELDS),
+        TASK_LIST_ORDERING,
+        cursor=request.GET.get('cursor'),
+        page_size=page_size,
+    )
+    return render(request, template, {
+        "tasks": tasks,
+        "next_cursor": next_cursor,
+        "page_size": page_size,
+    })
+
+
+def get_assignments_data(task_id):
+    """Serialize a task's assignments with a single joined query"""
+    rows = Assignment.objects.filter(task_id=task_id).values(
+        'user_id', 'user_id__name', 'role'
+    ).order_by('assignment_id')
+    return [
+        {'user_id': row['user_id'], 'username': row['user_id__name'], 'role': row['role']}
+        for row in rows
+    ]
+
+
+def get_task_details(task_id):
+    """Context of the details page: three queries, however many assignees and comments the task has"""
+    obj_task = get_object_or_404(Task.objects.select_related('project_id'), pk=task_id)
+    assignments = list(
+        Assignment.objects.filter(task_id=obj_task).select_related('user_id')
+    )
+    comments = list(
+        Comment.objects.filter(task_id=obj_task).select_related('user_id').order_by('create_time')
+    )
+    return {
+        "task": obj_task,
+        "assignments": assignments,
+        "comments": comments,
+    }
+
+
+def assigned_user_ids(task_id):
+    """Subquery of the users assigned to a task"""
+    return Assignment.objects.filter(task_id=task_id).values('user_id')
+
+
+def update_task_status(task_id, new_status, user_id):
+    """
+    Run update_task_status and mirror the change on the Task row and the
+    project's status counts, in one transaction; returns (success, message)
+    """
+    with transaction.atomic():
+        # Locked, so the status read here is still the old one when it is counted
+        task = Task.objects.select_for_update().filter(task_id=task_id).values('project_id', 'status').first()
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM update_task_status(%s, %s, %s)
+            """, [task_id, new_status, user_id])
+            results = cursor.fetchall()
+
+        if not results:
+            return False, 'No results returned from database'
+
+        success, message = results[0]
+        if success:
+            Task.objects.filter(task_id=task_id).update(status=new_status, updated_at=timezone.now())
+            if task is not None:
+                count_status_change(task['project_id'], task['status'], new_status)
+            publish_created_in_transaction(assigned_user_ids(task_id))
+            bump_dashboards_for_tasks([task_id])
+    return success, message
+
+
+def comment_recipient_ids(task_id):
+    """Subquery of the users a comment on a task can notify: its assignees and commenters"""
+    return User.objects.filter(Q(assignment__task_id=task_id) | Q(comment__task_id=task_id)).values('id')
+
+
+def add_comment(task_id, user_id, content, parent_comment_id=None):
+    """
+    Run add_comment_with_notification, which checks who may comment and
+    handles replies, then count and publish the notifications it wrote;
+    returns (success, message, comment)
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM add_comment_with_notification(%s, %s, %s, %s)
+            """, [task_id, user_id, content, parent_comment_id])
+            results = cursor.fetchall()
+
+        if not results:
+            return False, 'No results returned from database', None
+
+        comment_id, message = results[0]
+        if comment_id <= 0:
+            return False, message, None
+        publish_created_in_transaction(comment_recipient_ids(task_id))
+    return True, message, Comment.objects.get(comment_id=comment_id)
+
+
+def create_task(project_id, title, description, status, due_date, user_id, assignments, tag_ids):
+    """Run create_task_with_deadline and count the new task in its project; returns the result rows"""
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM create_task_with_deadline(
+                    %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb
+                )
+            """, [
+                project_id,
+                title,
+                description,
+                status,
+                due_date,
+                user_id,
+                json.dumps(assignments) if assignments else None,
+                json.dumps(tag_ids) if tag_ids else None
+            ])
+            results = cursor.fetchall()
+
+        if results and results[0][0] > 0:
+            task = Task.objects.filter(task_id=results[0][0]).values('project_id', 'status').first()
+            if task is not None:
+                adjust_status_counts({(task['project_id'], task['status']): 1})
+            publish_created_in_transaction(assigned_user_ids(results[0][0]))
+    return results
+
+
+def delete_task(task_id, user_id):
+    """Run delete_task_with_cleanup and uncount the task from its project; returns the result rows"""
+    with transaction.atomic():
+        task = Task.objects.select_for_update().filter(task_id=task_id).values('project_id', 'status').first()
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT * FROM delete_task_with_cleanup(%s, %s)
+            """, [task_id, user_id])
+            results = cursor.fetchall()
+
+        if results and results[0][0] and task is not None:
+            adjust_status_counts({(task['project_id'], task['status']): -1})
+    return results
+
+
 # ========== CLASS-BASED VIEWS ==========
 
 class GetTasks(View):
@@ -103,8 +284,8 @@ class GetTasks(View):
         return super().dispatch(*args, **kwargs)
 
     def get(self, request):
-        tasks = Task.objects.filter(users=request.user.pk)
-        return render(request, self.template, {"tasks": tasks})
+        tasks = Task.objects.filter(user_id=request.user.pk)
+        return render_task_page(request, self.template, tasks)
 
 
 class GetTasksByProject(View):
@@ -116,7 +297,62 @@ class GetTasksByProject(View):
 
     def get(self, request, project_id):
         tasks = Task.objects.filter(project_id=project_id)
-        return render(request, self.template, {"tasks": tasks})
+        return render_task_page(request, self.template, tasks)
+
+
+class ExportTasksByProject(View):
+
+    @method_decorator(login_required)
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get(self, request, project_id):
+        """Stream every task of a project as CSV or JSON Lines (?format=csv|jsonl)"""
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return JsonResponse({'success': False, 'message': 'Format must be csv or jsonl'}, status=400)
+
+        if not Project.objects.filter(project_id=project_id, user_id=request.user.pk).exists():
+            return HttpResponseForbidden("Only project members can export its tasks")
+
+        rows = iterate_queryset(
+            Task.objects.filter(project_id=project_id).values_list(*TASK_EXPORT_FIELDS),
+            'task_id'
+        )
+        return streaming_export(request, f'project-{project_id}-tasks', TASK_EXPORT_FIELDS, rows, export_format)
+
+
+class ImportTasksByProject(View):
+
+    @method_decorator(login_required)
+    @method_decorator(require_http_methods(["POST"]))
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def post(self, request, project_id):
+        """Import an uploaded CSV or JSON Lines file of tasks into a project"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({'success': False, 'message': 'No file uploaded'}, status=400)
+
+        import_format = request.POST.get('format') or (
+            'jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+        )
+        if import_format not in IMPORT_FORMATS:
+            return JsonResponse({'success': False, 'message': 'Format must be csv or jsonl'}, status=400)
+
+        if not Project.objects.filter(project_id=project_id, user_id=request.user.pk).exists():
+            return HttpResponseForbidden("Only project members can import tasks")
+
+        # Unreadable files (malformed CSV, not UTF-8) come back as row errors
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = import_tasks(project_id, request.user.id, read_import_rows(stream, import_format))
+
+        return JsonResponse({
+            'success': result['error_count'] == 0,
+            'message': f"{result['created']} tasks imported, {result['error_count']} rows rejected",
+            **result
+        })
 
 
 class GetTasksByStatus(View):
@@ -127,8 +363,9 @@ class GetTasksByStatus(View):
         return super().dispatch(*args, **kwargs)
 
     def get(self, request, status):
-        tasks = Task.objects.filter(status=status)
-        return render(request, self.template, {"tasks": tasks})
+        # Only tasks from projects the caller belongs to
+        tasks = Task.objects.filter(project_id__user_id=request.user.pk, status=status)
+        return render_task_page(request, self.template, tasks)
 
 
 class GetTaskDetails(View):
@@ -139,15 +376,7 @@ class GetTaskDetails(View):
         return super().dispatch(*args, **kwargs)
 
     def get(self, request, task_id):
-        obj_task = get_object_or_404(Task, pk=task_id)
-        assignments = Assignment.objects.filter(task=obj_task)
-        comments = Comment.objects.filter(task=obj_task)
-
-        return render(request, self.template, {
-            "task": obj_task,
-            "assignments": assignments,
-            "comments": comments,
-        })
+        return render(request, self.template, get_task_details(task_id))
 
 
 # ========== STORED PROCEDURE CLASS-BASED VIEWS ==========
@@ -162,10 +391,8 @@ class CreateTaskSP(View):
     def get(self, request):
         # Get available projects for the current user
         user_projects = Project.objects.filter(users=request.user)
-        tags = Tag.objects.all()
         return render(request, self.template, {
             'projects': user_projects,
-            'tags': tags,
             'status_choices': Task.STATUS_CHOICES,
             'role_choices': Assignment.ROLE_CHOICES
         })
@@ -181,10 +408,8 @@ class CreateTaskSP(View):
 
             if not all([project_id, title, description, due_date_str]):
                 user_projects = Project.objects.filter(users=request.user)
-                tags = Tag.objects.all()
                 return render(request, self.template, {
                     'projects': user_projects,
-                    'tags': tags,
                     'error': 'All required fields must be filled',
                     'form_data': request.POST
                 })
@@ -227,57 +452,36 @@ class CreateTaskSP(View):
             tag_ids = [int(tag_id) for tag_id in tag_ids if tag_id]
 
             # Call the PostgreSQL function
-            with connection.cursor() as cursor:
-                user_assignments_json = json.dumps(user_assignments) if user_assignments else None
-                tag_ids_json = json.dumps(tag_ids) if tag_ids else None
-
-                cursor.execute("""
-                    SELECT * FROM create_task_with_deadline(
-                        %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb
-                    )
-                """, [
-                    int(project_id),
-                    title,
-                    description,
-                    status,
-                    due_date,
-                    request.user.id,
-                    user_assignments_json,
-                    tag_ids_json
-                ])
-
-                results = cursor.fetchall()
-
-                if results:
-                    task_id, message = results[0]
-
-                    if task_id > 0:
-                        return redirect('task_app:get_details', task_id=task_id)
-                    else:
-                        user_projects = Project.objects.filter(users=request.user)
-                        tags = Tag.objects.all()
-                        return render(request, self.template, {
-                            'projects': user_projects,
-                            'tags': tags,
-                            'error': message,
-                            'form_data': request.POST
-                        })
+            results = create_task(
+                int(project_id), title, description, status, due_date,
+                request.user.id, user_assignments, tag_ids
+            )
+
+            if results:
+                task_id, message = results[0]
+
+                if task_id > 0:
+                    bump_dashboards_for_tasks([task_id])
+                    return redirect('task_app:get_details', task_id=task_id)
                 else:
                     user_projects = Project.objects.filter(users=request.user)
-                    tags = Tag.objects.all()
                     return render(request, self.template, {
                         'projects': user_projects,
-                        'tags': tags,
-                        'error': 'No results returned from database',
+                        'error': message,
                         'form_data': request.POST
                     })
+            else:
+                user_projects = Project.objects.filter(users=request.user)
+                return render(request, self.template, {
+                    'projects': user_projects,
+                    'error': 'No results returned from database',
+                    'form_data': request.POST
+                })
 
         except Exception as e:
             user_projects = Project.objects.filter(users=request.user)
-            tags = Tag.objects.all()
             return render(request, self.template, {
                 'projects': user_projects,
-                'tags': tags,
                 'error': f"Error: {str(e)}",
                 'form_data': request.POST
             })
@@ -287,10 +491,10 @@ class UpdateTaskStatusSP(View):
 
     @method_decorator(login_required)
     @method_decorator(require_http_methods(["POST"]))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    async def dispatch(self, *args, **kwargs):
+        return await super().dispatch(*args, **kwargs)
 
-    def post(self, request, task_id):
+    async def post(self, request, task_id):
         try:
             if request.content_type == 'application/json':
                 data = json.loads(request.body)
@@ -301,39 +505,61 @@ class UpdateTaskStatusSP(View):
             if not new_status:
                 return JsonResponse({'success': False, 'message': 'Status is required'})
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM update_task_status(%s, %s, %s)
-                """, [task_id, new_status, request.user.id])
+            user = await request.auser()
+            success, message = await run_db(update_task_status, task_id, new_status, user.id)
+            if success:
+                return JsonResponse({
+                    'success': True,
+                    'message': message,
+                    'new_status': new_status
+                })
+            return JsonResponse({'success': False, 'message': message})
 
-                results = cursor.fetchall()
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
 
-                if results:
-                    success, message = results[0]
 
-                    if success:
-                        try:
-                            task = Task.objects.get(task_id=task_id)
-                            task.status = new_status
-                            task.save()
-                        except Task.DoesNotExist:
-                            pass
-
-                        return JsonResponse({
-                            'success': True,
-                            'message': message,
-                            'new_status': new_status
-                        })
-                    else:
-                        return JsonResponse({'success': False, 'message': message})
-                else:
-                    return JsonResponse({'success': False, 'message': 'No results returned from database'})
+class BulkUpdateStatusSP(View):
+
+    @method_decorator(login_required)
+    @method_decorator(require_http_methods(["POST"]))
+    async def dispatch(self, *args, **kwargs):
+        return await super().dispatch(*args, **kwargs)
 
-        except Task.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'Task not found'})
+    async def post(self, request):
+        """Apply many {"task_id", "status"} changes in one transaction"""
+        try:
+            data = json.loads(request.body)
+            updates = data.get('updates')
+        except (ValueError, AttributeError):
+            return JsonResponse({'success': False, 'message': 'Invalid JSON body'}, status=400)
+
+        if not isinstance(updates, list) or not updates:
+            return JsonResponse({'success': False, 'message': 'updates must be a non-empty list'}, status=400)
+        if len(updates) > settings.TASK_BULK_MAX_ITEMS:
+            return JsonResponse({
+                'success': False,
+                'message': f'At most {settings.TASK_BULK_MAX_ITEMS} updates per request'
+            }, status=400)
+        if not all(isinstance(item, dict) and isinstance(item.get('status'), str) for item in updates):
+            return JsonResponse({
+                'success': False,
+                'message': 'Each update must be an object with a task_id and a status string'
+            }, status=400)
+
+        changes, results = parse_status_updates(updates)
+        try:
+            if changes:
+                user = await request.auser()
+                results += await run_db(bulk_update_status, user.id, changes)
         except Exception as e:
             return JsonResponse({'success': False, 'message': f'Error: {str(e)}'})
 
+        return JsonResponse({
+            'success': all(result['success'] for result in results),
+            'results': results
+        })
+
 
 class AddCommentSP(View):
     template = COMMENT_TEMPLATE
@@ -377,53 +603,26 @@ class AddCommentSP(View):
             else:
                 parent_comment_id = None
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM add_comment_with_notification(%s, %s, %s, %s)
-                """, [task_id, request.user.id, content, parent_comment_id])
-
-                results = cursor.fetchall()
-
-                if results:
-                    new_comment_id, message = results[0]
-
-                    if new_comment_id > 0:
-                        if request.content_type == 'application/json':
-                            comment = Comment.objects.get(comment_id=new_comment_id)
-                            comment_data = {
-                                'comment_id': comment.comment_id,
-                                'content': comment.content,
-                                'created_at': comment.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                                'user_id': comment.user_id,
-                                'user_name': comment.user.username if comment.user else 'Unknown',
-                                'parent_id': comment.parent_id
-                            }
-
-                            return JsonResponse({
-                                'success': True,
-                                'message': message,
-                                'comment': comment_data
-                            })
-                        else:
-                            return redirect('task_app:get_details', task_id=task_id)
-                    else:
-                        if request.content_type == 'application/json':
-                            return JsonResponse({'success': False, 'message': message})
-                        else:
-                            task = get_object_or_404(Task, pk=task_id)
-                            return render(request, self.template, {
-                                'task': task,
-                                'error': message
-                            })
-                else:
-                    if request.content_type == 'application/json':
-                        return JsonResponse({'success': False, 'message': 'No results returned from database'})
-                    else:
-                        task = get_object_or_404(Task, pk=task_id)
-                        return render(request, self.template, {
-                            'task': task,
-                            'error': 'No results returned from database'
-                        })
+            success, message, comment = add_comment(task_id, request.user.id, content, parent_comment_id)
+            if success:
+                if request.content_type == 'application/json':
+                    return JsonResponse({
+                        'success': True,
+                        'message': message,
+                        'comment': {
+                            'comment_id': comment.comment_id,
+                            'content': comment.content,
+                            'created_at': comment.create_time.strftime('%Y-%m-%d %H:%M:%S'),
+                            'user_id': request.user.id,
+                            'parent_id': parent_comment_id,
+                        }
+                    })
+                return redirect('task_app:get_details', task_id=task_id)
+
+            if request.content_type == 'application/json':
+                return JsonResponse({'success': False, 'message': message})
+            task = get_object_or_404(Task, pk=task_id)
+            return render(request, self.template, {'task': task, 'error': message})
 
         except Exception as e:
             if request.content_type == 'application/json':
@@ -445,7 +644,7 @@ class ManageTaskUsersSP(View):
 
     def get(self, request, task_id):
         task = get_object_or_404(Task, pk=task_id)
-        current_assignments = Assignment.objects.filter(task=task)
+        current_assignments = Assignment.objects.filter(task_id=task).select_related('user_id')
         project_users = User.objects.filter(project__project_id=task.project_id).distinct()
         is_owner = Assignment.objects.filter(
             task_id=task_id,
@@ -494,60 +693,28 @@ class ManageTaskUsersSP(View):
                         'error': 'No assignments provided'
                     })
 
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM reassign_users_to_task(%s, %s::jsonb, %s)
-                """, [
-                    task_id,
-                    json.dumps(new_assignments),
-                    request.user.id
-                ])
-
-                results = cursor.fetchall()
-
-                if results:
-                    success, message = results[0]
-
-                    if success:
-                        if request.content_type == 'application/json':
-                            updated_assignments = Assignment.objects.filter(task_id=task_id)
-                            assignments_data = []
-                            for assignment in updated_assignments:
-                                assignments_data.append({
-                                    'user_id': assignment.user_id,
-                                    'username': assignment.user.username,
-                                    'role': assignment.role
-                                })
-
-                            return JsonResponse({
-                                'success': True,
-                                'message': message,
-                                'assignments': assignments_data
-                            })
-                        else:
-                            return redirect('task_app:get_details', task_id=task_id)
-                    else:
-                        if request.content_type == 'application/json':
-                            return JsonResponse({'success': False, 'message': message})
-                        else:
-                            task = get_object_or_404(Task, pk=task_id)
-                            project_users = User.objects.filter(project__project_id=task.project_id).distinct()
-                            return render(request, self.template, {
-                                'task': task,
-                                'project_users': project_users,
-                                'error': message
-                            })
+            success, message = reassign_task_users(task_id, new_assignments, request.user.id)
+
+            if success:
+                if request.content_type == 'application/json':
+                    return JsonResponse({
+                        'success': True,
+                        'message': message,
+                        'assignments': get_assignments_data(task_id)
+                    })
                 else:
-                    if request.content_type == 'application/json':
-                        return JsonResponse({'success': False, 'message': 'No results returned from database'})
-                    else:
-                        task = get_object_or_404(Task, pk=task_id)
-                        project_users = User.objects.filter(project__project_id=task.project_id).distinct()
-                        return render(request, self.template, {
-                            'task': task,
-                            'project_users': project_users,
-                            'error': 'No results returned from database'
-                        })
+                    return redirect('task_app:get_details', task_id=task_id)
+            else:
+                if request.content_type == 'application/json':
+                    return JsonResponse({'success': False, 'message': message})
+                else:
+                    task = get_object_or_404(Task, pk=task_id)
+                    project_users = User.objects.filter(project__project_id=task.project_id).distinct()
+                    return render(request, self.template, {
+                        'task': task,
+                        'project_users': project_users,
+                        'error': message
+                    })
 
         except Exception as e:
             if request.content_type == 'application/json':
@@ -584,30 +751,28 @@ class DeleteTaskSP(View):
 
     def post(self, request, task_id):
         try:
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT * FROM delete_task_with_cleanup(%s, %s)
-                """, [task_id, request.user.id])
-
-                results = cursor.fetchall()
-
-                if results:
-                    success, message = results[0]
-
-                    if success:
-                        return redirect('task_app:get_tasks')
-                    else:
-                        task = get_object_or_404(Task, pk=task_id)
-                        return render(request, self.template, {
-                            'task': task,
-                            'error': message
-                        })
+            # Looked up first: the stored function deletes the assignments too
+            audience = task_audience([task_id])
+            results = delete_task(task_id, request.user.id)
+
+            if results:
+                success, message = results[0]
+
+                if success:
+                    bump_dashboard_versions(audience)
+                    return redirect('task_app:get_tasks')
                 else:
                     task = get_object_or_404(Task, pk=task_id)
                     return render(request, self.template, {
                         'task': task,
-                        'error': 'No results returned from database'
+                        'error': message
                     })
+            else:
+                task = get_object_or_404(Task, pk=task_id)
+                return render(request, self.template, {
+                    'task': task,
+                    'error': 'No results returned from database'
+                })
 
         except Exception as e:
             task = get_object_or_404(Task, pk=task_id)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from project_app.models import Project
+from timeline_app.rollups import rebuild_project_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute TimelineDailyRollup from TimelineEntry, one project per "
+        "transaction. Run once to backfill the rollups, or after timeline "
+        "entries were written outside the timeline writer."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='project_ids',
+                            help='Only rebuild this project (can be repeated)')
+
+    def handle(self, *args, **options):
+        project_ids = options['project_ids'] or list(
+            Project.objects.order_by('project_id').values_list('project_id', flat=True)
+        )
+        rows = 0
+        for done, project_id in enumerate(project_ids, start=1):
+            rows += rebuild_project_rollups(project_id)
+            self.stdout.write(f'Rebuilt {done} of {len(project_ids)} projects...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {rows} rollup rows written.'))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from timeline_app.writer import replay_spill
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the timeline entries spilled to TIMELINE_SPILL_DIR while the "
+        "database was unavailable, and delete their files. Workers also do "
+        "this on their next flush; run it when no worker is left to do so. "
+        "Files claimed by workers that have exited are replayed as well."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reclaim-all', action='store_true',
+                            help='Also replay files claimed by workers that still look alive '
+                                 '(only when no worker is running)')
+
+    def handle(self, *args, **options):
+        if not settings.TIMELINE_SPILL_DIR:
+            raise CommandError('TIMELINE_SPILL_DIR is not set.')
+        written = replay_spill(reclaim_all=options['reclaim_all'])
+        self.stdout.write(self.style.SUCCESS(f'Done: {written} timeline entries written.'))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0004_choice_columns'),
+        ('timeline_app', '0003_timelineentry_action_timelineentry_created_at_and_more'),
+        ('user_app', '0003_archived_notification'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='timeline_id',
+            field=models.AutoField(primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['project_id', 'created_at', 'timeline_id'], name='timeline_project_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['project_id', 'user_id', 'created_at', 'timeline_id'], name='timeline_project_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['project_id', 'action', 'created_at', 'timeline_id'], name='timeline_project_action_idx'),
+        ),
+    ]
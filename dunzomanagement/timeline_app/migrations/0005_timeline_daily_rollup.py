@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('project_app', '0004_choice_columns'),
+        ('timeline_app', '0004_timeline_feed_indexes'),
+        ('user_app', '0003_archived_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('action', models.CharField(max_length=255)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_rollups', to='project_app.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_rollups', to='user_app.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'day'], name='timeline_rollup_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'user', 'day', 'action'), name='timeline_rollup_unique')],
+            },
+        ),
+    ]
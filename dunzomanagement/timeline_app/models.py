@@ -19,3 +19,34 @@ class TimelineEntry(models.Model):
     details = models.TextField(default="null")
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        # The project feed pages newest first through (created_at, timeline_id);
+        # the user and action filters each get an index with the same suffix
+        indexes = [
+            models.Index(fields=['project_id', 'created_at', 'timeline_id'], name='timeline_project_created_idx'),
+            models.Index(fields=['project_id', 'user_id', 'created_at', 'timeline_id'], name='timeline_project_user_idx'),
+            models.Index(fields=['project_id', 'action', 'created_at', 'timeline_id'], name='timeline_project_action_idx'),
+        ]
+
+
+class TimelineDailyRollup(models.Model):
+    """
+    Number of timeline entries per project, member, day and action.
+
+    Kept up to date by timeline_app.writer as entries are inserted, so the
+    activity charts never aggregate TimelineEntry itself; the
+    rebuild_timeline_rollups command recomputes it from the entries.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='timeline_rollups')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline_rollups')
+    day = models.DateField()
+    action = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'user', 'day', 'action'], name='timeline_rollup_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'day'], name='timeline_rollup_day_idx'),
+        ]
@@ -0,0 +1,94 @@
+"""
+Daily activity rollups for the timeline charts.
+
+TimelineDailyRollup holds one counter per (project, user, day, action).
+The timeline writer calls add_to_rollups in the transaction that inserts
+a batch, so the counters move with the entries. Days are calendar days in
+TIME_ZONE.
+"""
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import TimelineDailyRollup, TimelineEntry
+
+# Rollup rows corrected per UPDATE by rebuild_project_rollups
+REBUILD_CHUNK_SIZE = 500
+
+
+def rollup_key(entry):
+    """(project_id, user_id, day, action) of a queued entry"""
+    return (entry['project_id'], entry['user_id'], timezone.localdate(entry['created_at']), entry['action'])
+
+
+def add_to_rollups(entries):
+    """Count a batch of entries into their rollup rows (call inside the inserting transaction)"""
+    counts = Counter(rollup_key(entry) for entry in entries)
+    if not counts:
+        return
+
+    # Make sure every row exists, then increment: rows created concurrently
+    # by another worker are incremented, never overwritten
+    TimelineDailyRollup.objects.bulk_create([
+        TimelineDailyRollup(project_id=project_id, user_id=user_id, day=day, action=action)
+        for project_id, user_id, day, action in counts
+    ], ignore_conflicts=True)
+
+    by_amount = {}
+    for key, amount in counts.items():
+        by_amount.setdefault(amount, []).append(key)
+    for amount, keys in by_amount.items():
+        TimelineDailyRollup.objects.filter(reduce(or_, (
+            Q(project_id=project_id, user_id=user_id, day=day, action=action)
+            for project_id, user_id, day, action in keys
+        ))).update(count=F('count') + amount)
+
+
+def rebuild_project_rollups(project_id):
+    """
+    Recompute a project's rollups from its timeline entries; returns the number of rows.
+
+    The project's rollup rows are locked before the entries are counted, so
+    writers adding to them wait and increment the recount instead of racing
+    it. Rows are corrected in place (a day with no entries left drops to
+    zero) rather than deleted and recreated, which would lose those waiting
+    increments.
+    """
+    with transaction.atomic():
+        stored = {
+            (user_id, day, action): count
+            for user_id, day, action, count in TimelineDailyRollup.objects.select_for_update().filter(
+                project_id=project_id
+            ).values_list('user_id', 'day', 'action', 'count')
+        }
+        actual = {
+            (row['user_id'], row['day'], row['action']): row['total']
+            for row in TimelineEntry.objects.filter(project_id=project_id)
+            .annotate(day=TruncDate('created_at', tzinfo=timezone.get_current_timezone()))
+            .values('user_id', 'day', 'action')
+            .annotate(total=Count('timeline_id'))
+            .order_by()
+        }
+
+        TimelineDailyRollup.objects.bulk_create([
+            TimelineDailyRollup(project_id=project_id, user_id=user_id, day=day, action=action)
+            for user_id, day, action in actual.keys() - stored.keys()
+        ], batch_size=1000, ignore_conflicts=True)
+
+        by_count = {}
+        for key in stored.keys() | actual.keys():
+            count = actual.get(key, 0)
+            if stored.get(key) != count:
+                by_count.setdefault(count, []).append(key)
+        for count, keys in by_count.items():
+            for start in range(0, len(keys), REBUILD_CHUNK_SIZE):
+                TimelineDailyRollup.objects.filter(project_id=project_id).filter(reduce(or_, (
+                    Q(user_id=user_id, day=day, action=action)
+                    for user_id, day, action in keys[start:start + REBUILD_CHUNK_SIZE]
+                ))).update(count=count)
+    return len(stored.keys() | actual.keys())
@@ -3,4 +3,7 @@ from . import views
 
 urlpatterns = [
     path('timeline', views.timeline_index, name='timeline_index'),
+    path('project/<int:project_id>/', views.project_timeline, name='project_timeline'),
+    path('project/<int:project_id>/feed/', views.project_timeline_feed, name='project_timeline_feed'),
+    path('project/<int:project_id>/activity/', views.project_activity, name='project_activity'),
 ]
\ No newline at end of file
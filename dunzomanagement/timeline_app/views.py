@@ -1,7 +1,146 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db.models import Sum
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import render
+from django.utils import timezone
+
+from dunzomanagement.pagination import keyset_page
+from project_app.models import Project
+from .models import TimelineDailyRollup, TimelineEntry
+
+TIMELINE_TEMPLATE = 'timeline_app/timeline_app.html'
+
+# Newest first; matches the (project_id, created_at, timeline_id) indexes
+TIMELINE_ORDERING = ['-created_at', '-timeline_id']
+
+TIMELINE_FIELDS = ('timeline_id', 'user_id', 'user_id__name', 'action', 'details', 'created_at')
 
-# Create your views here.
-from django.http import HttpRequest, HttpResponse
 
 def timeline_index(request: HttpRequest) -> HttpResponse:
-    return render(request, 'timeline_app/timeline_app.html', {})
+    return render(request, TIMELINE_TEMPLATE, {})
+
+
+def get_timeline_page_size(request: HttpRequest) -> int:
+    """Read ?page_size=, falling back to TIMELINE_PAGE_SIZE and capped at TIMELINE_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(request.GET.get('page_size', settings.TIMELINE_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.TIMELINE_PAGE_SIZE
+    return max(1, min(page_size, settings.TIMELINE_MAX_PAGE_SIZE))
+
+
+def get_timeline_page(request: HttpRequest, project_id: int):
+    """
+    One keyset page of a project's timeline, filtered by ?user= and ?action=.
+
+    Every filter combination is served by an index that ends in
+    (created_at, timeline_id), so a page costs the same on the first
+    screen and a million entries deep.
+    """
+    entries = TimelineEntry.objects.filter(project_id=project_id)
+    user_filter = request.GET.get('user')
+    if user_filter and user_filter.isdigit():
+        entries = entries.filter(user_id=int(user_filter))
+    action_filter = request.GET.get('action')
+    if action_filter:
+        entries = entries.filter(action=action_filter)
+
+    rows, next_cursor = keyset_page(
+        entries.values(*TIMELINE_FIELDS),
+        TIMELINE_ORDERING,
+        cursor=request.GET.get('cursor'),
+        page_size=get_timeline_page_size(request),
+    )
+    return [serialize_entry(row) for row in rows], next_cursor
+
+
+def serialize_entry(row):
+    try:
+        details = json.loads(row['details'])
+    except (TypeError, ValueError):
+        details = row['details']
+    return {
+        'id': row['timeline_id'],
+        'user_id': row['user_id'],
+        'username': row['user_id__name'],
+        'action': row['action'],
+        'details': details,
+        'created_at': row['created_at'],
+    }
+
+
+def is_project_member(request: HttpRequest, project_id: int) -> bool:
+    return Project.objects.filter(project_id=project_id, user_id=request.user.pk).exists()
+
+
+@login_required
+def project_timeline(request: HttpRequest, project_id: int) -> HttpResponse:
+    """The project activity feed; later pages are loaded from project_timeline_feed"""
+    if not is_project_member(request, project_id):
+        return HttpResponseForbidden("Only project members can view its timeline")
+
+    entries, next_cursor = get_timeline_page(request, project_id)
+    return render(request, TIMELINE_TEMPLATE, {
+        'project_id': project_id,
+        'entries': entries,
+        'next_cursor': next_cursor,
+        'user_filter': request.GET.get('user', ''),
+        'action_filter': request.GET.get('action', ''),
+    })
+
+
+@login_required
+def project_timeline_feed(request: HttpRequest, project_id: int) -> JsonResponse:
+    """JSON page of the project timeline for infinite scroll (?cursor=, ?user=, ?action=, ?page_size=)"""
+    if not is_project_member(request, project_id):
+        return JsonResponse({'success': False, 'message': 'Only project members can view its timeline'}, status=403)
+
+    entries, next_cursor = get_timeline_page(request, project_id)
+    return JsonResponse({'entries': entries, 'next_cursor': next_cursor})
+
+
+def get_activity_days(request: HttpRequest) -> int:
+    """Read ?days=, falling back to TIMELINE_ACTIVITY_DAYS and capped at TIMELINE_ACTIVITY_MAX_DAYS"""
+    try:
+        days = int(request.GET.get('days', settings.TIMELINE_ACTIVITY_DAYS))
+    except ValueError:
+        days = settings.TIMELINE_ACTIVITY_DAYS
+    return max(1, min(days, settings.TIMELINE_ACTIVITY_MAX_DAYS))
+
+
+@login_required
+def project_activity(request: HttpRequest, project_id: int) -> JsonResponse:
+    """
+    Activity per day per member for the last ?days= days (optionally one ?action=).
+
+    Reads TimelineDailyRollup only; the chart never touches TimelineEntry.
+    """
+    if not is_project_member(request, project_id):
+        return JsonResponse({'success': False, 'message': 'Only project members can view its activity'}, status=403)
+
+    end = timezone.localdate()
+    start = end - timedelta(days=get_activity_days(request) - 1)
+    rollups = TimelineDailyRollup.objects.filter(project_id=project_id, day__gte=start, day__lte=end)
+    action_filter = request.GET.get('action')
+    if action_filter:
+        rollups = rollups.filter(action=action_filter)
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    day_index = {day: index for index, day in enumerate(days)}
+    members = {}
+    for row in rollups.values('user_id', 'user__name', 'day').annotate(total=Sum('count')).order_by():
+        member = members.setdefault(row['user_id'], {
+            'user_id': row['user_id'],
+            'username': row['user__name'],
+            'counts': [0] * len(days),
+        })
+        member['counts'][day_index[row['day']]] = row['total']
+
+    return JsonResponse({
+        'days': days,
+        'members': sorted(members.values(), key=lambda member: member['username']),
+    })
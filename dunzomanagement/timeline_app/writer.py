@@ -0,0 +1,217 @@
+"""
+Buffered timeline logging.
+
+Views and bulk operations call log_entry() instead of inserting a
+TimelineEntry themselves. Entries are queued when the surrounding
+transaction commits and the timeline writer inserts them in batches from a
+background thread (see dunzomanagement.buffering), so a bulk status change
+of 500 tasks costs the request nothing for its timeline.
+
+Whatever is still queued is written when the process exits normally. With
+TIMELINE_SPILL_DIR set, a batch that cannot be written (database down,
+exit hook failing) is saved to a JSON lines file in that directory instead
+of being dropped; spilled files are written ahead of the next batch, or by
+the replay_timeline_spill command.
+
+Entries that can never be inserted (their project or user was deleted
+meanwhile) are set aside one by one, in a ``.failed`` file next to the
+spill files when there is a spill directory, so they never hold up the
+rest of the timeline.
+"""
+import json
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from dunzomanagement.buffering import BatchWriter
+from .models import TimelineEntry
+from .rollups import add_to_rollups
+
+logger = logging.getLogger(__name__)
+
+SPILL_PREFIX = 'timeline-'
+SPILL_SUFFIX = '.jsonl'
+FAILED_SUFFIX = '.failed'
+CLAIM_SUFFIX = '.replaying'
+
+
+def log_entry(project_id, user_id, action, details=None):
+    """Queue one timeline entry; written in the background after the transaction commits"""
+    entry = {
+        'project_id': project_id,
+        'user_id': user_id,
+        'action': action,
+        'details': json.dumps(details),
+        # Stamped now, so a batch written later keeps the real order of events
+        'created_at': timezone.now(),
+    }
+    transaction.on_commit(lambda: timeline_writer.put(entry))
+
+
+def write_entries(entries):
+    """Insert a batch of queued entries, after any batches spilled earlier"""
+    if settings.TIMELINE_SPILL_DIR:
+        replay_spill()
+    insert_or_set_aside(entries, spill_name())
+
+
+def insert_entries(entries):
+    """Insert entries and count them into the daily rollups in one transaction"""
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(
+                project_id_id=entry['project_id'],
+                user_id_id=entry['user_id'],
+                action=entry['action'],
+                details=entry['details'],
+                created_at=entry['created_at'],
+            )
+            for entry in entries
+        ], batch_size=settings.TIMELINE_BATCH_SIZE)
+        add_to_rollups(entries)
+
+
+def insert_or_set_aside(entries, name):
+    """
+    Insert entries; when the batch breaks a constraint, insert them one by
+    one and set the failing ones aside as ``<name>.failed``. Returns the
+    number of entries written.
+    """
+    try:
+        insert_entries(entries)
+        return len(entries)
+    except IntegrityError:
+        pass
+
+    failed = []
+    for entry in entries:
+        try:
+            insert_entries([entry])
+        except IntegrityError:
+            failed.append(entry)
+    if failed:
+        set_aside(failed, name)
+    return len(entries) - len(failed)
+
+
+# ========== DURABLE SPILL ==========
+
+def spill_name():
+    return f'{SPILL_PREFIX}{os.getpid()}-{time.time_ns()}{SPILL_SUFFIX}'
+
+
+def spill_entries(entries):
+    """Save a batch that could not be written to its own file in TIMELINE_SPILL_DIR"""
+    write_spill_file(entries, spill_name())
+
+
+def set_aside(entries, name):
+    """Keep entries that cannot be inserted out of the replay, in a .failed file"""
+    if not settings.TIMELINE_SPILL_DIR:
+        logger.error('Dropped %d timeline entries that cannot be inserted', len(entries))
+        return
+    write_spill_file(entries, f'{name}{FAILED_SUFFIX}')
+    logger.error('Set aside %d timeline entries that cannot be inserted in %s%s',
+                 len(entries), name, FAILED_SUFFIX)
+
+
+def write_spill_file(entries, name):
+    spill_dir = settings.TIMELINE_SPILL_DIR
+    os.makedirs(spill_dir, exist_ok=True)
+    partial = os.path.join(spill_dir, f'.{name}.tmp')
+    with open(partial, 'w', encoding='utf-8') as spill_file:
+        for entry in entries:
+            spill_file.write(json.dumps(entry, cls=DjangoJSONEncoder) + '\n')
+        spill_file.flush()
+        os.fsync(spill_file.fileno())
+    # Renamed only once complete, so replay never reads half a file
+    os.replace(partial, os.path.join(spill_dir, name))
+
+
+def read_spill_file(path):
+    with open(path, encoding='utf-8') as spill_file:
+        entries = [json.loads(line) for line in spill_file if line.strip()]
+    for entry in entries:
+        entry['created_at'] = parse_datetime(entry['created_at'])
+    return entries
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def reclaim_stale_claims(spill_dir, reclaim_all=False):
+    """Put back files claimed by workers that died while replaying them"""
+    for name in os.listdir(spill_dir):
+        if not (name.startswith(SPILL_PREFIX) and name.endswith(CLAIM_SUFFIX)):
+            continue
+        original, pid, _ = name.rsplit('.', 2)
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        if reclaim_all or not process_alive(int(pid)):
+            try:
+                os.rename(os.path.join(spill_dir, name), os.path.join(spill_dir, original))
+            except FileNotFoundError:
+                continue
+            logger.warning('Reclaimed %s from worker %s', original, pid)
+
+
+def replay_spill(reclaim_all=False):
+    """
+    Insert every spilled batch and delete its file; returns the number of
+    entries written. A file that cannot be replayed now is left for the next
+    attempt and the others are still written.
+    """
+    spill_dir = settings.TIMELINE_SPILL_DIR
+    if not spill_dir or not os.path.isdir(spill_dir):
+        return 0
+
+    reclaim_stale_claims(spill_dir, reclaim_all)
+    written = 0
+    for name in sorted(os.listdir(spill_dir)):
+        if not (name.startswith(SPILL_PREFIX) and name.endswith(SPILL_SUFFIX)):
+            continue
+        path = os.path.join(spill_dir, name)
+        # Claim the file first, so two workers never replay the same batch
+        claimed = f'{path}.{os.getpid()}{CLAIM_SUFFIX}'
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue
+        try:
+            entries = read_spill_file(claimed)
+        except (ValueError, TypeError, KeyError):
+            logger.exception('Unreadable timeline spill file %s; set aside', name)
+            os.rename(claimed, f'{path}{FAILED_SUFFIX}')
+            continue
+        try:
+            count = insert_or_set_aside(entries, name)
+        except Exception:
+            os.rename(claimed, path)
+            logger.exception('Could not replay timeline spill file %s', name)
+            continue
+        os.remove(claimed)
+        written += count
+        logger.info('Replayed %d spilled timeline entries from %s', count, name)
+    return written
+
+
+timeline_writer = BatchWriter(
+    'timeline',
+    write_entries,
+    batch_size=settings.TIMELINE_BATCH_SIZE,
+    flush_interval=settings.TIMELINE_FLUSH_INTERVAL,
+    spill=spill_entries if settings.TIMELINE_SPILL_DIR else None,
+)
@@ -0,0 +1,58 @@
+"""
+Versioned cache for the user dashboard.
+
+Every user has a dashboard version number, bumped once a transaction that
+changes anything the dashboard shows (their tasks, assignments, project
+memberships or notifications) commits. Cached dashboards are keyed by the
+version, so a bump makes the old entry unreachable and the next view
+rebuilds it.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+DASHBOARD_VERSION_KEY = 'dashboard:version:{}'
+DASHBOARD_DATA_KEY = 'dashboard:data:{}:{}'
+
+
+def _initial_version():
+    # Time based, so a version that was evicted never comes back with an old number
+    return int(time.time() * 1000)
+
+
+def get_dashboard_version(user_id):
+    """Current dashboard version of a user"""
+    key = DASHBOARD_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_dashboard_versions(user_ids):
+    """Invalidate the cached dashboards of the given users once the transaction commits"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def bump():
+        for user_id in user_ids:
+            key = DASHBOARD_VERSION_KEY.format(user_id)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, _initial_version(), None)
+
+    # After commit, so a dashboard rebuilt in between never caches the old rows under the new version
+    transaction.on_commit(bump)
+
+
+def get_cached_dashboard(user_id, version):
+    return cache.get(DASHBOARD_DATA_KEY.format(user_id, version))
+
+
+def set_cached_dashboard(user_id, version, data):
+    cache.set(DASHBOARD_DATA_KEY.format(user_id, version), data, settings.DASHBOARD_CACHE_TIMEOUT)
@@ -0,0 +1,91 @@
+"""
+Per-user unread notification counters.
+
+The badge reads NotificationCounter instead of counting Notification rows.
+Every code path that creates or reads notifications adjusts the counter
+with an atomic ``unread = unread + n`` UPDATE in the same transaction.
+A user without a counter row gets one on first read, from a single COUNT.
+Both adjustments also invalidate the user's cached dashboard.
+
+Notifications inserted by stored functions are counted when they are
+picked up by user_app.pubsub.publish_created_in_transaction. The
+rebuild_notification_counters command recounts everything, for rows
+written by any other path.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .cache import bump_dashboard_versions
+from .models import Notification, NotificationCounter
+
+
+def add_unread(user_ids):
+    """Add one unread notification per occurrence of a user id"""
+    # Users without a counter row are skipped: their first read counts them
+    counts = Counter(user_ids)
+    by_amount = {}
+    for user_id, amount in counts.items():
+        by_amount.setdefault(amount, []).append(user_id)
+    for amount, user_ids in by_amount.items():
+        NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + amount)
+    bump_dashboard_versions(counts)
+
+
+def subtract_unread(user_id, amount):
+    if amount:
+        NotificationCounter.objects.filter(user_id=user_id).update(unread=F('unread') - amount)
+        bump_dashboard_versions([user_id])
+
+
+def get_unread_count(user_id):
+    """Unread count from the counter row, created from a COUNT the first time"""
+    unread = NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first()
+    if unread is not None:
+        return max(unread, 0)
+
+    try:
+        with transaction.atomic():
+            counter = NotificationCounter.objects.create(
+                user_id=user_id,
+                unread=Notification.objects.filter(user_id=user_id, is_read=False).count(),
+            )
+    except IntegrityError:
+        # Created concurrently by another request
+        return get_unread_count(user_id)
+    return counter.unread
+
+
+def mark_read(user_id, notification_ids):
+    """Mark some of a user's notifications read; returns how many changed"""
+    with transaction.atomic():
+        updated = Notification.objects.filter(
+            user_id=user_id, id__in=notification_ids, is_read=False
+        ).update(is_read=True)
+        subtract_unread(user_id, updated)
+    return updated
+
+
+def mark_all_read(user_id):
+    """
+    Mark every unread notification of a user read.
+
+    Works through NOTIFICATION_MARK_READ_CHUNK rows at a time, each chunk in
+    its own short transaction, so a large backlog never holds long locks.
+    Each chunk is one UPDATE up to the chunk's last id; only that id is read.
+    """
+    total = 0
+    chunk_size = settings.NOTIFICATION_MARK_READ_CHUNK
+    while True:
+        with transaction.atomic():
+            unread = Notification.objects.filter(user_id=user_id, is_read=False)
+            bound = list(unread.order_by('id').values_list('id', flat=True)[chunk_size - 1:chunk_size])
+            if bound:
+                unread = unread.filter(id__lte=bound[0])
+            updated = unread.update(is_read=True)
+            subtract_unread(user_id, updated)
+        total += updated
+        if not bound:
+            return total
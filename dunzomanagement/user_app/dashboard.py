@@ -0,0 +1,84 @@
+"""
+Data behind the user dashboard.
+
+The user's own counters come from one aggregate query over their
+assignments; project progress is read from the per-project status
+counters (project_app.counters), never from the projects' tasks. The lists
+are small indexed queries. The result is cached per user under their
+dashboard version (see user_app.cache), so a repeat view reads two cache
+keys and nothing else.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from calendarevent_app.cache import task_audience
+from project_app.counters import get_status_counts, progress
+from project_app.models import Project
+from task_app.models import Assignment, Task
+from .cache import bump_dashboard_versions, get_cached_dashboard, get_dashboard_version, set_cached_dashboard
+from .counters import get_unread_count
+from .models import Notification
+
+
+def bump_dashboards_for_tasks(task_ids, extra_user_ids=()):
+    """Invalidate the dashboards of everyone who sees the given tasks (members and assignees)"""
+    user_ids = task_audience(task_ids)
+    user_ids.update(extra_user_ids)
+    bump_dashboard_versions(user_ids)
+
+
+def get_dashboard(user_id):
+    """Dashboard data of a user, from the cache when their version has not moved"""
+    version = get_dashboard_version(user_id)
+    data = get_cached_dashboard(user_id, version)
+    if data is None:
+        data = build_dashboard(user_id)
+        set_cached_dashboard(user_id, version, data)
+    return data
+
+
+def build_dashboard(user_id):
+    today = timezone.localdate()
+    horizon = today + timedelta(days=settings.DASHBOARD_DEADLINE_DAYS)
+    list_size = settings.DASHBOARD_LIST_SIZE
+
+    # COUNT(DISTINCT) because a user may hold several roles on a task
+    mine = Assignment.objects.filter(user_id=user_id).exclude(task_id__status='Done').aggregate(
+        active_tasks=Count('task_id', distinct=True),
+        upcoming_deadlines=Count('task_id', filter=Q(task_id__due_date__range=(today, horizon)), distinct=True),
+    )
+    projects = list(
+        Project.objects.filter(user_id=user_id).values('project_id', 'project_name').order_by('-project_id')
+    )
+    status_counts = get_status_counts([project['project_id'] for project in projects])
+    for project in projects:
+        project['total_tasks'], project['done_tasks'], project['percent_complete'] = progress(
+            status_counts[project['project_id']]
+        )
+
+    open_tasks = (
+        Task.objects.filter(assignment__user_id=user_id).exclude(status='Done')
+        .values('task_id', 'title', 'priority', 'due_date', 'project_id__project_name')
+        .distinct()
+        .order_by('due_date', 'task_id')
+    )
+
+    return {
+        'counters': {
+            'active_tasks': mine['active_tasks'],
+            'projects': len(projects),
+            'unread_notifications': get_unread_count(user_id),
+            'upcoming_deadlines': mine['upcoming_deadlines'],
+        },
+        'my_tasks': list(open_tasks[:list_size]),
+        'recent_projects': projects[:list_size],
+        'notifications': list(
+            Notification.objects.filter(user_id=user_id)
+            .order_by('-created_at', '-id')
+            .values('id', 'type', 'message', 'is_read', 'created_at')[:list_size]
+        ),
+        'upcoming_deadlines': list(open_tasks.filter(due_date__range=(today, horizon))[:list_size]),
+    }
@@ -0,0 +1,94 @@
+"""
+Background notification delivery.
+
+Views describe who should be notified (a list of users, or everyone on a
+task) and return right away; the notification writer resolves task
+participants and inserts the rows for many events at once, then publishes
+them to the live streams. Reassigning a task with fifty participants
+costs the request the same as one with two.
+
+Comments are the exception: add_comment_with_notification stores replies
+and checks who may comment, so it still writes its notifications in the
+database, and the view only counts and publishes them.
+
+Jobs are queued when the surrounding transaction commits, so a rolled
+back comment or assignment never notifies anyone.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from dunzomanagement.buffering import BatchWriter
+from dunzomanagement.inserts import bulk_insert
+from .counters import add_unread
+from .models import Notification, User
+from .pubsub import publish_notifications
+
+
+def notify_users(user_ids, notification_type, message, exclude_user_id=None):
+    """Queue one notification for each of the given users"""
+    queue_job({
+        'user_ids': list(user_ids),
+        'exclude_user_id': exclude_user_id,
+        'type': notification_type,
+        'message': message,
+    })
+
+
+def notify_task_participants(task_id, notification_type, message, exclude_user_id=None):
+    """Queue a notification for everyone assigned to a task (resolved at delivery time)"""
+    queue_job({
+        'task_id': task_id,
+        'exclude_user_id': exclude_user_id,
+        'type': notification_type,
+        'message': message,
+    })
+
+
+def queue_job(job):
+    transaction.on_commit(lambda: notification_writer.put(job))
+
+
+def write_notifications(jobs):
+    """Resolve the recipients of a batch of jobs and insert all their notifications"""
+    task_ids = {job['task_id'] for job in jobs if 'task_id' in job}
+    participants = {}
+    if task_ids:
+        for task_id, user_id in User.objects.filter(
+            assignment__task_id__in=task_ids
+        ).values_list('assignment__task_id', 'id'):
+            participants.setdefault(task_id, set()).add(user_id)
+
+    notifications = []
+    for job in jobs:
+        if 'task_id' in job:
+            recipients = participants.get(job['task_id'], ())
+        else:
+            recipients = dict.fromkeys(job['user_ids'])
+        notifications.extend(
+            Notification(user_id=user_id, type=job['type'], message=job['message'])
+            for user_id in recipients
+            if user_id != job['exclude_user_id']
+        )
+
+    if not notifications:
+        return
+
+    # The streams need each notification's id, which MySQL does not return
+    # from bulk_create; no post_save is sent, so counting and publishing
+    # happen here, once
+    with transaction.atomic():
+        bulk_insert(
+            Notification, notifications, 'created_at', ('user', 'type', 'message', 'created_at'),
+            batch_size=settings.NOTIFICATION_BATCH_SIZE,
+            user_id__in={notification.user_id for notification in notifications},
+        )
+        add_unread(notification.user_id for notification in notifications)
+    publish_notifications(notifications)
+
+
+notification_writer = BatchWriter(
+    'notifications',
+    write_notifications,
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    flush_interval=settings.NOTIFICATION_FLUSH_INTERVAL,
+)
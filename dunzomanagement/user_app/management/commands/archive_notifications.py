@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from user_app.models import ArchivedNotification, Notification
+
+ARCHIVED_FIELDS = ('id', 'user_id', 'type', 'message', 'created_at')
+
+
+class Command(BaseCommand):
+    help = (
+        "Move read notifications older than --days into ArchivedNotification. "
+        "Rows are moved in id order, one short transaction per batch (copy, "
+        "then delete), so the Notification table is never locked for long. "
+        "Safe to rerun or to run from a scheduler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.NOTIFICATION_ARCHIVE_AFTER_DAYS,
+                            help='Archive read notifications older than this many days '
+                                 '(default NOTIFICATION_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of notifications per transaction (default 1000)')
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help='Seconds to pause between batches (default 0.05)')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        last_id = 0
+        archived = 0
+
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Notification.objects.select_for_update().filter(
+                        id__gt=last_id, is_read=True, created_at__lt=cutoff
+                    ).order_by('id').values_list(*ARCHIVED_FIELDS)[:options['batch_size']]
+                )
+                if not rows:
+                    break
+
+                # ignore_conflicts: rows copied by an interrupted earlier run
+                ArchivedNotification.objects.bulk_create(
+                    [ArchivedNotification(**dict(zip(ARCHIVED_FIELDS, row))) for row in rows],
+                    ignore_conflicts=True,
+                )
+                Notification.objects.filter(id__in=[row[0] for row in rows]).delete()
+
+            archived += len(rows)
+            last_id = rows[-1][0]
+            self.stdout.write(f'Archived {archived} notifications (up to id {last_id})')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Archive complete: {archived} notifications moved.'))
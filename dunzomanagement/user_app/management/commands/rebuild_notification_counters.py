@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from user_app.models import Notification, NotificationCounter, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount every user's unread notifications into NotificationCounter. "
+        "Run after notifications were written outside the application (for "
+        "example by stored functions or by hand). Users are processed in "
+        "id order, one short transaction per batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of users per transaction (default 1000)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        rebuilt = 0
+
+        while True:
+            user_ids = list(
+                User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not user_ids:
+                break
+
+            with transaction.atomic():
+                NotificationCounter.objects.bulk_create(
+                    [NotificationCounter(user_id=user_id) for user_id in user_ids],
+                    ignore_conflicts=True,
+                )
+                # Lock the counters before counting: an add_unread for a
+                # notification committed after the count waits and applies
+                # on top of the recount instead of being overwritten
+                list(
+                    NotificationCounter.objects.select_for_update()
+                    .filter(user_id__in=user_ids).values_list('user_id', flat=True)
+                )
+                unread = dict(
+                    Notification.objects.filter(user_id__in=user_ids, is_read=False)
+                    .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+                )
+                by_count = {}
+                for user_id in user_ids:
+                    by_count.setdefault(unread.get(user_id, 0), []).append(user_id)
+                for count, counted_ids in by_count.items():
+                    NotificationCounter.objects.filter(user_id__in=counted_ids).update(unread=count)
+
+            rebuilt += len(user_ids)
+            last_id = user_ids[-1]
+            self.stdout.write(f'Rebuilt counters for {rebuilt} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {rebuilt} counters rebuilt.'))
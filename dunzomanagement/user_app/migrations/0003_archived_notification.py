@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_app', '0002_notification_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('type', models.CharField(max_length=50)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to='user_app.user')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at', 'id'], name='archived_user_created_idx')],
+            },
+        ),
+    ]
@@ -29,5 +29,43 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Unread badge/tab and the inbox, newest first
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Notification for {self.user.name}: {self.type}"
+
+
+class NotificationCounter(models.Model):
+    """Unread notification count per user, kept in step with Notification writes"""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.IntegerField(default=0)
+
+
+class ArchivedNotification(models.Model):
+    """Read notifications moved out of Notification by the archive_notifications command"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications',
+        db_index=False  # covered by archived_user_created_idx
+    )
+    type = models.CharField(max_length=50)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='archived_user_created_idx'),
+        ]
@@ -0,0 +1,190 @@
+"""
+Publish/subscribe channel for live notifications.
+
+Request handlers publish a notification to the channel of its user once
+the transaction that created it commits; each open notification stream
+subscribes to its user's channel and waits on it without touching the
+database.
+
+The broker class is set with the NOTIFICATION_BROKER setting:
+
+- InProcessBroker delivers to streams served by the same process. It is
+  enough when the site runs as a single ASGI process.
+- RedisBroker goes through Redis pub/sub, so a notification created by any
+  worker (WSGI or ASGI) reaches streams held open by any other worker.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .counters import add_unread
+from .models import Notification
+
+CHANNEL_PREFIX = 'notifications:'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the configured broker, creating it on first use"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.NOTIFICATION_BROKER)()
+    return _broker
+
+
+def serialize_notification(notification):
+    """JSON payload sent to the browser for one Notification"""
+    return json.dumps({
+        'id': notification.pk,
+        'type': notification.type,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at,
+    }, cls=DjangoJSONEncoder)
+
+
+def publish_notifications(notifications):
+    """Publish notifications to their users once the current transaction commits"""
+    messages = [(n.user_id, serialize_notification(n)) for n in notifications]
+    if not messages:
+        return
+
+    def publish():
+        broker = get_broker()
+        for user_id, message in messages:
+            broker.publish(user_id, message)
+
+    transaction.on_commit(publish)
+
+
+def publish_created_in_transaction(user_ids):
+    """
+    Count and publish the notifications a stored function created for
+    ``user_ids`` in the current transaction.
+
+    Stored functions insert notifications in SQL, so no post_save is sent.
+    The rows this transaction wrote are the ones whose xmin is its own
+    transaction id (PostgreSQL, like the stored functions); rows committed
+    meanwhile by other requests or the background writer are left to their
+    own writers. ``created_at >= now()`` (the transaction's start) keeps the
+    lookup on the per-user index. Call it inside the transaction.
+    """
+    notifications = list(Notification.objects.filter(user__in=user_ids).extra(where=[
+        'user_app_notification.created_at >= now()',
+        'user_app_notification.xmin::text::bigint = txid_current() %% 4294967296',
+    ]))
+    add_unread(n.user_id for n in notifications if not n.is_read)
+    publish_notifications(notifications)
+
+
+class InProcessSubscription:
+    """One stream's queue, fed from any thread through its event loop"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+
+    async def open(self):
+        pass
+
+    def deliver(self, message):
+        # Runs on the subscriber's loop; a stream that stopped reading drops messages
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """Next message, or None when nothing arrives within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Delivers messages to subscribers in the current process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def subscribe(self, user_id):
+        subscription = InProcessSubscription(self, user_id)
+        with self.lock:
+            self.subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[subscription.channel]
+
+    def publish(self, user_id, message):
+        """Thread-safe: may be called from request threads or the event loop"""
+        with self.lock:
+            subscribers = list(self.subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop has already shut down
+                self.unsubscribe(subscription)
+
+
+class RedisSubscription:
+    """A Redis pub/sub connection listening on one user's channel (one per open stream)"""
+
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+        self.pubsub = None
+
+    async def open(self):
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.channel)
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(timeout=timeout)
+        if message is None:
+            return None
+        data = message['data']
+        return data.decode() if isinstance(data, bytes) else data
+
+    async def close(self):
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(self.channel)
+            await self.pubsub.aclose()
+
+
+class RedisBroker:
+    """Redis pub/sub broker shared by all workers (needs the redis package)"""
+
+    def __init__(self):
+        import redis
+        import redis.asyncio
+
+        url = settings.NOTIFICATION_BROKER_URL
+        self.client = redis.Redis.from_url(url)
+        self.async_client = redis.asyncio.Redis.from_url(url)
+
+    def subscribe(self, user_id):
+        return RedisSubscription(self.async_client, f'{CHANNEL_PREFIX}{user_id}')
+
+    def publish(self, user_id, message):
+        self.client.publish(f'{CHANNEL_PREFIX}{user_id}', message)
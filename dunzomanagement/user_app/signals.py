@@ -0,0 +1,45 @@
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from project_app.models import Project
+from task_app.models import Task, Assignment
+from .cache import bump_dashboard_versions
+from .counters import add_unread
+from .dashboard import bump_dashboards_for_tasks
+from .models import Notification
+from .pubsub import publish_notifications
+
+
+@receiver(post_save, sender=Notification)
+def notification_created(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_read:
+            add_unread([instance.user_id])
+        publish_notifications([instance])
+
+
+@receiver(post_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    bump_dashboards_for_tasks([instance.pk])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(pre_delete, sender=Assignment)
+def assignment_changed(sender, instance, **kwargs):
+    bump_dashboards_for_tasks([instance.task_id_id], [instance.user_id_id])
+
+
+@receiver(m2m_changed, sender=Project.user_id.through)
+def membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Joining or leaving a project changes the project list and counters"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if reverse:
+        # instance is a User
+        bump_dashboard_versions([instance.pk])
+    elif action == 'pre_clear':
+        bump_dashboard_versions(instance.user_id.values_list('id', flat=True))
+    else:
+        bump_dashboard_versions(pk_set or [])
@@ -1,3 +1,155 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User as AuthUser
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .counters import get_unread_count, mark_all_read, mark_read
+from .delivery import write_notifications
+from .models import Notification, NotificationCounter, User
+from .pubsub import InProcessBroker
+from .views import stream_notifications
+
+
+class WriteNotificationsTests(TestCase):
+    """A batch is inserted with its ids, counted once and published once on every backend"""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create(name=f'User {i}', email=f'user{i}@example.com', password_hash='x', role='Member')
+            for i in range(2)
+        ]
+        for user in self.users:
+            # Creates the counter rows, at zero
+            get_unread_count(user.pk)
+
+    def write(self, jobs):
+        with mock.patch('user_app.pubsub.get_broker') as get_broker:
+            with self.captureOnCommitCallbacks(execute=True):
+                write_notifications(jobs)
+        return [json.loads(call.args[1]) for call in get_broker.return_value.publish.call_args_list]
+
+    def check_batch(self):
+        published = self.write([
+            {'user_ids': [user.pk for user in self.users], 'exclude_user_id': None, 'type': 'Comment', 'message': 'Hi'},
+            {'user_ids': [self.users[0].pk], 'exclude_user_id': None, 'type': 'Comment', 'message': 'Again'},
+        ])
+        self.assertEqual(sorted(message['id'] for message in published),
+                         sorted(Notification.objects.values_list('id', flat=True)))
+        self.assertEqual(len(published), 3)
+        self.assertEqual([get_unread_count(user.pk) for user in self.users], [2, 1])
+
+    def test_backend_returning_ids(self):
+        self.check_batch()
+
+    def test_backend_without_returning(self):
+        # MySQL: bulk_create leaves the ids unset and they are read back
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            self.check_batch()
+
+
+class UnreadCounterTests(TestCase):
+    """The badge count follows creates and reads without counting Notification rows"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Ada', email='ada@example.com', password_hash='x', role='Member')
+        self.notifications = [
+            Notification.objects.create(user=self.user, type='Comment', message=f'Hi {i}') for i in range(5)
+        ]
+
+    def test_first_read_counts_then_counter_follows_creates(self):
+        self.assertEqual(get_unread_count(self.user.pk), 5)
+        Notification.objects.create(user=self.user, type='Comment', message='One more')
+        Notification.objects.create(user=self.user, type='Comment', message='Seen', is_read=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_unread_count(self.user.pk), 6)
+        self.assertEqual(len(queries), 1)
+
+    def test_mark_read_only_counts_changed_rows(self):
+        get_unread_count(self.user.pk)
+        ids = [self.notifications[0].pk, self.notifications[1].pk]
+
+        self.assertEqual(mark_read(self.user.pk, ids), 2)
+        self.assertEqual(mark_read(self.user.pk, ids), 0)
+        self.assertEqual(get_unread_count(self.user.pk), 3)
+
+    @override_settings(NOTIFICATION_MARK_READ_CHUNK=2)
+    def test_mark_all_read_in_chunks(self):
+        get_unread_count(self.user.pk)
+        AuthUser.objects.create_user(id=self.user.pk, username='ada', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.user.pk))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('mark_all_notifications_read'))
+
+        self.assertEqual(response.json(), {'success': True, 'updated': 5, 'unread_count': 0})
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "user_app_notification"')]
+        self.assertEqual(len(updates), 3)
+        self.assertFalse(Notification.objects.filter(is_read=False).exists())
+        self.assertEqual(mark_all_read(self.user.pk), 0)
+
+    def test_rebuild_corrects_drift(self):
+        get_unread_count(self.user.pk)
+        NotificationCounter.objects.filter(user_id=self.user.pk).update(unread=42)
+        Notification.objects.filter(pk=self.notifications[0].pk).update(is_read=True)
+
+        call_command('rebuild_notification_counters', batch_size=1, stdout=io.StringIO())
+
+        self.assertEqual(get_unread_count(self.user.pk), 4)
+
+
+class NotificationStreamTests(TestCase):
+    """New notifications reach their user's stream once committed, and only under ASGI"""
+
+    def setUp(self):
+        self.user = User.objects.create(name='Ada', email='ada@example.com', password_hash='x', role='Member')
+
+    def test_published_after_commit(self):
+        with mock.patch('user_app.pubsub.get_broker') as get_broker:
+            with self.captureOnCommitCallbacks() as callbacks:
+                notification = Notification.objects.create(user=self.user, type='Comment', message='Hi')
+            get_broker.return_value.publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        get_broker.return_value.publish.assert_called_once()
+        user_id, message = get_broker.return_value.publish.call_args.args
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(json.loads(message)['id'], notification.pk)
+
+    def test_wsgi_answers_no_content(self):
+        AuthUser.objects.create_user(id=self.user.pk, username='ada', password='secret')
+        self.client.force_login(AuthUser.objects.get(pk=self.user.pk))
+
+        response = self.client.get(reverse('notification_stream'))
+
+        self.assertEqual(response.status_code, 204)
+
+    def test_stream_delivers_messages_published_from_other_threads(self):
+        broker = InProcessBroker()
+
+        async def read():
+            stream = stream_notifications(self.user.pk, None)
+            retry = await anext(stream)
+            # Publish the way a request thread does, once the stream is subscribed
+            thread = threading.Thread(target=broker.publish, args=(self.user.pk, '{"id": 7}'))
+            thread.start()
+            event = await anext(stream)
+            thread.join()
+            await stream.aclose()
+            return retry, event
+
+        with mock.patch('user_app.views.get_broker', return_value=broker):
+            retry, event = asyncio.run(read())
+
+        self.assertTrue(retry.startswith('retry: '))
+        self.assertEqual(event, 'id: 7\nevent: notification\ndata: {"id": 7}\n\n')
+        self.assertEqual(broker.subscribers, {})
@@ -6,4 +6,8 @@ urlpatterns = [
     path('dashboard/', views.user_dashboard, name='dashboard'),
     path('edit-profile/', views.edit_profile, name='edit_profile'),
     path('notifications/', views.view_notifications, name='notifications'),
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
+    path('notifications/inbox/', views.notification_inbox, name='notification_inbox'),
+    path('notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
+    path('notifications/read-all/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
 ]
@@ -1,10 +1,157 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db.models import Value
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from dunzomanagement.asyncdb import is_asgi_request, run_db
+from dunzomanagement.pagination import keyset_page
+from .counters import get_unread_count, mark_all_read, mark_read
+from .dashboard import get_dashboard
+from .models import ArchivedNotification, Notification
+from .pubsub import get_broker, serialize_notification
+
+def live_notification_context(request):
+    """Template flags: open the SSE stream (ASGI only) or poll the inbox every few seconds"""
+    return {
+        'notification_stream': is_asgi_request(request),
+        'notification_poll_interval': settings.NOTIFICATION_POLL_INTERVAL * 1000,
+    }
 
+@login_required
 def user_dashboard(request):
-    return render(request, 'user_app/user_dashboard.html')
+    context = {**get_dashboard(request.user.id), **live_notification_context(request)}
+    return render(request, 'user_app/user_dashboard.html', context)
 
 def edit_profile(request):
     return render(request, 'user_app/edit_profile.html')
 
 def view_notifications(request):
-    return render(request, 'user_app/view_notifications.html')
+    return render(request, 'user_app/view_notifications.html', live_notification_context(request))
+
+
+def format_event(message):
+    """One SSE 'notification' event; the id lets the browser resume after a reconnect"""
+    notification_id = json.loads(message).get('id')
+    event_id = f'id: {notification_id}\n' if notification_id else ''
+    return f'{event_id}event: notification\ndata: {message}\n\n'
+
+
+def get_missed_notifications(user_id, last_event_id):
+    """Serialized notifications created after the last one the browser received"""
+    notifications = Notification.objects.filter(
+        user_id=user_id, id__gt=last_event_id
+    ).order_by('id')[:settings.NOTIFICATION_STREAM_REPLAY_LIMIT]
+    return [serialize_notification(notification) for notification in notifications]
+
+
+async def stream_notifications(user_id, last_event_id):
+    """Yield SSE events for a user; idle streams only wait on the broker"""
+    subscription = get_broker().subscribe(user_id)
+    try:
+        # Subscribe before replaying so nothing created in between is lost
+        await subscription.open()
+        yield f'retry: {settings.NOTIFICATION_STREAM_HEARTBEAT * 1000}\n\n'
+        if last_event_id is not None:
+            for message in await run_db(get_missed_notifications, user_id, last_event_id):
+                yield format_event(message)
+
+        while True:
+            message = await subscription.get(settings.NOTIFICATION_STREAM_HEARTBEAT)
+            if message is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield format_event(message)
+    finally:
+        await subscription.close()
+
+
+@login_required
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new notifications.
+
+    Only served under ASGI: WSGI collects a streaming response's async
+    iterator into a list, so the endless stream would never send a byte and
+    would hold a worker thread for good. Elsewhere it answers 204, which
+    also tells EventSource not to reconnect; the pages poll instead.
+    """
+    if not is_asgi_request(request):
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        stream_notifications(user.id, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def get_inbox_page_size(request):
+    """Read ?page_size=, falling back to NOTIFICATION_PAGE_SIZE and capped at NOTIFICATION_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(request.GET.get('page_size', settings.NOTIFICATION_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.NOTIFICATION_PAGE_SIZE
+    return max(1, min(page_size, settings.NOTIFICATION_MAX_PAGE_SIZE))
+
+
+@login_required
+@require_http_methods(["GET"])
+def notification_inbox(request):
+    """One page of the user's notifications, newest first (?tab=all|unread|archived, ?cursor=)"""
+    tab = request.GET.get('tab')
+    if tab == 'archived':
+        # Archived notifications are always read
+        notifications = ArchivedNotification.objects.filter(user_id=request.user.id).values(
+            'id', 'type', 'message', 'created_at', is_read=Value(True)
+        )
+    else:
+        notifications = Notification.objects.filter(user_id=request.user.id)
+        if tab == 'unread':
+            notifications = notifications.filter(is_read=False)
+        notifications = notifications.values('id', 'type', 'message', 'is_read', 'created_at')
+
+    rows, next_cursor = keyset_page(
+        notifications,
+        ['-created_at', '-id'],
+        cursor=request.GET.get('cursor'),
+        page_size=get_inbox_page_size(request),
+    )
+    return JsonResponse({
+        'notifications': rows,
+        'next_cursor': next_cursor,
+        'unread_count': get_unread_count(request.user.id),
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def mark_notification_read(request, notification_id):
+    updated = mark_read(request.user.id, [notification_id])
+    return JsonResponse({
+        'success': True,
+        'updated': updated,
+        'unread_count': get_unread_count(request.user.id),
+    })
+
+
+@login_required
+@require_http_methods(["POST"])
+def mark_all_notifications_read(request):
+    updated = mark_all_read(request.user.id)
+    return JsonResponse({
+        'success': True,
+        'updated': updated,
+        'unread_count': get_unread_count(request.user.id),
+    })